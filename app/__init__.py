@@ -9,6 +9,33 @@ def create_app(config_class="app.config.DevConfig"):
     )
     app.config.from_object(config_class)
 
+    # Optional SQLite glossary backend (default: JSON files)
+    if app.config.get("GLOSSARY_BACKEND") == "sqlite":
+        from .glossary_sqlite import configure
+        from .glossary_store import store
+        store.use_backend(configure(app.config["GLOSSARY_SQLITE_PATH"]))
+
+    # /data/exercises/<id>_v<N>.json lookups: how long a miss is remembered
+    from .exercise_index import exercise_files
+    exercise_files.miss_ttl = app.config.get("EXERCISE_FILE_MISS_TTL", exercise_files.miss_ttl)
+
+    # Static files go through the same sender as data JSON: ETags, and
+    # precompressed .br/.gz siblings (python -m app.precompress) when present
+    from .http_cache import send_static
+    app.view_functions["static"] = send_static
+
+    # Request timing and cache/JSON-load counters, served at /metrics (app/metrics.py)
+    from . import metrics
+    metrics.init_app(app)
+
+    # Opt-in per-request profiler (PROFILER_TOKEN; app/profiler.py)
+    from . import profiler
+    profiler.init_app(app)
+
+    # Background jobs: slow admin work runs off the request (app/jobs.py)
+    from . import jobs
+    jobs.init_app(app)
+
     # Import blueprints
     from . import routes_public
     app.register_blueprint(routes_public.bp)
@@ -17,7 +44,7 @@ def create_app(config_class="app.config.DevConfig"):
     app.register_blueprint(routes_admin.bp)
 
     # ✅ Global aliases for all glossaries in country_map
-    from .routes_public import country_map  # Import your country mapping
+    from .glossary_store import country_map  # Import your country mapping
 
     for code, filename in country_map.items():
         endpoint_name = f"public.glosario_{code}"
@@ -43,6 +70,18 @@ def create_app(config_class="app.config.DevConfig"):
         # available in Jinja: {{ lang }}
         return {'lang': getattr(g, 'lang', 'es')}
 
+    # --- glossary cards rendered through the fragment cache ---
+    # {{ entry_cards("_glossary_card.html", entries, snapshot) }}
+    from jinja2 import pass_context
+    from . import fragment_cache
+    fragment_cache.cache.max_bytes = app.config.get("FRAGMENT_CACHE_MAX_BYTES", fragment_cache.DEFAULT_MAX_BYTES)
+
+    @app.template_global('entry_cards')
+    @pass_context
+    def entry_cards(ctx, template_name, entries, snapshot=None):
+        return fragment_cache.render_entry_cards(app.jinja_env, template_name, entries, ctx.get('lang', 'es'),
+                                                 snapshot or None)
+
     # --- localized date filter without external deps ---
     from datetime import datetime, date
 
@@ -1,10 +1,52 @@
 import os
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev")
     DATA_FOLDER = "data"
     AUDIO_WORD_FOLDER = "static/audio/word"
     AUDIO_EXAMPLES_FOLDER = "static/audio/examples"
+    # Seconds admin glossary edits are held before one batched file write
+    GLOSSARY_FLUSH_DELAY = float(os.environ.get("GLOSSARY_FLUSH_DELAY", "0.5"))
+    # Where glossaries live: "json" (data/glossaries/*.json) or "sqlite"
+    # (GLOSSARY_SQLITE_PATH; load it with `python -m app.glossary_sqlite import`)
+    GLOSSARY_BACKEND = os.environ.get("GLOSSARY_BACKEND", "json")
+    GLOSSARY_SQLITE_PATH = os.environ.get("GLOSSARY_SQLITE_PATH", os.path.join("data", "glossaries.sqlite3"))
+    # Entries per page on /<cc>/glosario; glossaries up to this size render on one page
+    GLOSSARY_PAGE_SIZE = int(os.environ.get("GLOSSARY_PAGE_SIZE", "200"))
+    # Memory budget for cached glossary card HTML (app/fragment_cache.py)
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get("FRAGMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # JSON data responses (app/http_cache.py): ETags from content digests ("strong")
+    # or from mtime+size ("weak"). Mutable files are revalidated on every use
+    # (HTTP_CACHE_MAX_AGE > 0 allows that many seconds without asking); pinned
+    # versions (NNN.json, <id>_v<N>.json) get HTTP_CACHE_PINNED_MAX_AGE unless
+    # HTTP_CACHE_REVALIDATE_ALWAYS is on (handy while editing exercises).
+    HTTP_ETAG_MODE = os.environ.get("HTTP_ETAG_MODE", "strong")
+    HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "0"))
+    HTTP_CACHE_PINNED_MAX_AGE = int(os.environ.get("HTTP_CACHE_PINNED_MAX_AGE", str(365 * 24 * 3600)))
+    HTTP_CACHE_REVALIDATE_ALWAYS = os.environ.get("HTTP_CACHE_REVALIDATE_ALWAYS", "0") == "1"
+    # Exercise versions as JSON-patch deltas with a full snapshot every N
+    # versions (0 = every version is a full copy); see app/storage.py
+    EXERCISE_DELTA_EVERY = int(os.environ.get("EXERCISE_DELTA_EVERY", "0"))
+    # Seconds an unknown /data/exercises/<id>_v<N>.json name is remembered as
+    # missing before the folders are probed for it again (app/exercise_index.py)
+    EXERCISE_FILE_MISS_TTL = float(os.environ.get("EXERCISE_FILE_MISS_TTL", "30"))
+    # Background jobs (app/jobs.py): the job table, runner threads per process
+    # (0 = jobs only run under `python -m app.jobs worker`) and the seconds
+    # without a heartbeat after which a dead worker's job is retried
+    JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(PROJECT_ROOT, "data", "jobs.sqlite3"))
+    JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "1"))
+    JOBS_STALE_SECONDS = float(os.environ.get("JOBS_STALE_SECONDS", "60"))
+    # Request latency/size histograms, JSON load and cache counters at /metrics
+    # (Prometheus text format, per process; see app/metrics.py)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    # Per-request sampling profiler (app/profiler.py): off unless a token is set;
+    # then ?__profile=<token> or an X-Profile-Token header profiles that request.
+    # Stack sample period in seconds, and how many profiles data/profiles/ keeps
+    PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN", "")
+    PROFILER_INTERVAL = float(os.environ.get("PROFILER_INTERVAL", "0.002"))
+    PROFILER_KEEP = int(os.environ.get("PROFILER_KEEP", "50"))
 
 class DevConfig(Config):
     DEBUG = True
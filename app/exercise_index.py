@@ -0,0 +1,606 @@
+# app/exercise_index.py
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .glossary_store import file_signature
+from .storage import atomic_write_json, file_lock, load_exercise_json
+
+# --- Paths --------------------------------------------------------------
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+EXERCISES_DIR = os.path.join(PROJECT_ROOT, "data", "exercises")
+INDEX_FILENAME = "exercises.index.json"
+
+
+# --- Full filesystem scan (reindex only) --------------------------------
+
+def _safe_load_json(p):
+    return load_exercise_json(p, None)
+
+
+def _is_version_file(fn: str) -> bool:
+    return fn.lower().endswith(".json") and fn[:-5].isdigit()
+
+
+def scan(root: str = EXERCISES_DIR) -> Dict[str, list]:
+    """
+    Build an index by walking data/exercises/ in every layout.
+
+    NEW (2025-10):
+      data/exercises/<type>/<slug>/
+        meta.json
+        current.json
+        NNN.json        (e.g., 001.json, 002.json)
+
+    Legacy (foldered by id):
+      data/exercises/<id>/
+        meta.json
+        current.json
+        versions/
+          vNNN.json
+
+    Legacy (flat files):
+      data/exercises/<id>@vN.json
+
+    The resulting index has records:
+      {
+        id,                # stable exercise id from payload/meta
+        type,              # e.g., "tf", "mcq", "cloze"
+        title,             # exercise title
+        pinned_version,    # defaults to latest if not set
+        versions: [ { version, path } ]  # repo-relative "data/..." path to the version JSON
+      }
+    """
+    ex_map: Dict[str, dict] = {}
+    rel_root = os.path.relpath(root, PROJECT_ROOT).replace("\\", "/")
+
+    def _listdir(p):
+        try:
+            return [n for n in os.listdir(p) if not n.startswith(".")]
+        except OSError:
+            return []
+
+    # (a) NEW layout: data/exercises/<type>/<slug>/{meta.json,current.json,NNN.json}
+    type_dirs = set()
+    for type_name in _listdir(root):
+        type_dir = os.path.join(root, type_name)
+        if not os.path.isdir(type_dir):
+            continue
+
+        # Detect whether this is a "type" directory by looking for nested folders
+        # that contain either current.json or NNN.json files.
+        for slug_name in _listdir(type_dir):
+            folder = os.path.join(type_dir, slug_name)
+            if not os.path.isdir(folder):
+                continue
+            files = set(_listdir(folder))
+            numeric = sorted(fn for fn in files if _is_version_file(fn))
+            if "current.json" not in files and not numeric:
+                continue  # not a new-layout exercise folder
+            type_dirs.add(type_name)
+
+            meta = _safe_load_json(os.path.join(folder, "meta.json"))
+            current = _safe_load_json(os.path.join(folder, "current.json"))
+
+            # Determine id (prefer meta, then current, then last numeric file)
+            ex_id = (meta or {}).get("id") or (current or {}).get("id")
+            if not ex_id:
+                payload = _safe_load_json(os.path.join(folder, numeric[-1])) if numeric else None
+                ex_id = (payload or {}).get("id") or f"{type_name}__{slug_name}"
+
+            rec = ex_map.get(ex_id) or {"id": ex_id, "type": None, "title": None, "pinned_version": None, "versions": []}
+            rec["type"] = (meta or {}).get("type") or (current or {}).get("type") or rec["type"]
+            rec["title"] = (meta or {}).get("title") or (current or {}).get("title") or rec["title"]
+
+            # An exercise renamed mid-history has versions in two slug folders
+            for fn in numeric:
+                ver = int(fn[:-5])
+                if not any(v.get("version") == ver for v in rec["versions"]):
+                    rec["versions"].append({"version": ver, "path": f"{rel_root}/{type_name}/{slug_name}/{fn}"})
+            rec["versions"].sort(key=lambda v: v.get("version", 0))
+            ex_map[ex_id] = rec
+
+    # (b) Legacy folder-by-id layout: data/exercises/<id>/versions/vNNN.json
+    for name in _listdir(root):
+        d = os.path.join(root, name)
+        if name in type_dirs or not os.path.isdir(d):
+            continue
+
+        meta_p = os.path.join(d, "meta.json")
+        current_p = os.path.join(d, "current.json")
+        versions_d = os.path.join(d, "versions")
+
+        # require at least one of these to consider legacy folder
+        if not (os.path.exists(meta_p) or os.path.exists(current_p) or os.path.isdir(versions_d)):
+            continue
+
+        meta = _safe_load_json(meta_p)
+        current = _safe_load_json(current_p)
+
+        # prefer ids found inside files, but folder name is fallback
+        ex_id = (meta or {}).get("id") or (current or {}).get("id") or name
+
+        rec = ex_map.get(ex_id) or {"id": ex_id, "type": None, "title": None, "pinned_version": None, "versions": []}
+        rec["type"] = (meta or {}).get("type") or (current or {}).get("type") or rec["type"]
+        rec["title"] = (meta or {}).get("title") or (current or {}).get("title") or rec["title"]
+
+        for fn in _listdir(versions_d):
+            m = re.match(r"^v(\d+)\.json$", fn, re.I)
+            if not m:
+                continue
+            ver = int(m.group(1))
+            if not any(v.get("version") == ver for v in rec["versions"]):
+                rec["versions"].append({"version": ver, "path": f"{rel_root}/{name}/versions/{fn}"})
+        rec["versions"].sort(key=lambda v: v.get("version", 0))
+        ex_map[ex_id] = rec
+
+    # (c) Legacy flat files: data/exercises/<id>@vN.json
+    for fn in _listdir(root):
+        m = re.match(r"^(.+?)@v(\d+)\.json$", fn)
+        if not m or not os.path.isfile(os.path.join(root, fn)):
+            continue
+        ex_id, ver = m.group(1), int(m.group(2))
+        rec = ex_map.get(ex_id) or {"id": ex_id, "type": None, "title": None, "pinned_version": None, "versions": []}
+        if not any(v.get("version") == ver for v in rec["versions"]):
+            rec["versions"].append({"version": ver, "path": f"{rel_root}/{fn}"})
+            rec["versions"].sort(key=lambda v: v.get("version", 0))
+        ex_map[ex_id] = rec
+
+    # Pinned version defaults to the latest one
+    exercises = list(ex_map.values())
+    for r in exercises:
+        if not r.get("pinned_version") and r.get("versions"):
+            r["pinned_version"] = max(v.get("version", 0) for v in r["versions"])
+    exercises.sort(key=lambda r: ((r.get("title") or "").lower(), r.get("id") or ""))
+    return {"exercises": exercises}
+
+
+# --- Lookups ------------------------------------------------------------
+
+def _folder_key(rel_path: str) -> Optional[Tuple[str, str]]:
+    """(type, slug) of a new-layout version path "data/exercises/<type>/<slug>/NNN.json"."""
+    parts = (rel_path or "").replace("\\", "/").split("/")
+    if len(parts) == 5 and parts[:2] == ["data", "exercises"] and _is_version_file(parts[4]):
+        return parts[2], parts[3]
+    return None
+
+
+class ExerciseIndex:
+    """
+    Dict lookups over one loaded index: records by id and by (type, slug)
+    folder, version rows by number, and the resolved pinned version.
+    Built once per version of the file; `put`/`remove` keep a copy of it
+    current inside `ExerciseIndexStore.edit()`.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.by_id: Dict[str, dict] = {}
+        self.by_slug: Dict[Tuple[str, str], dict] = {}
+        self._versions: Dict[str, Dict[int, dict]] = {}
+        self._pinned: Dict[str, Tuple[Optional[dict], Optional[str]]] = {}
+        for rec in self.records:
+            if isinstance(rec, dict) and rec.get("id"):
+                self._add(rec)
+
+    @property
+    def records(self) -> List[dict]:
+        return self.data.setdefault("exercises", [])
+
+    def copy(self) -> "ExerciseIndex":
+        """
+        An independent index over the same records (records are replaced,
+        never mutated, so only the containers are copied).
+        """
+        new = ExerciseIndex.__new__(ExerciseIndex)
+        new.data = dict(self.data, exercises=list(self.records))
+        new.by_id = dict(self.by_id)
+        new.by_slug = dict(self.by_slug)
+        new._versions = dict(self._versions)
+        new._pinned = dict(self._pinned)
+        return new
+
+    def _add(self, rec: dict) -> None:
+        ex_id = rec["id"]
+        self.by_id[ex_id] = rec
+        rows = [v for v in rec.get("versions") or [] if isinstance(v, dict)]
+        self._versions[ex_id] = {v.get("version"): v for v in rows}
+        for v in rows:
+            key = _folder_key(v.get("path"))
+            if key:
+                self.by_slug[key] = rec
+
+        # pinned_version if set, else the latest; its row, else the last row
+        ver = rec.get("pinned_version") or max((v.get("version", 0) for v in rows), default=None)
+        row = self._versions[ex_id].get(ver) or (rows[-1] if rows else None)
+        path = os.path.join(PROJECT_ROOT, row["path"]) if row and row.get("path") else None
+        self._pinned[ex_id] = (row, path)
+
+    def _drop(self, ex_id: str) -> Optional[dict]:
+        rec = self.by_id.pop(ex_id, None)
+        if rec is None:
+            return None
+        for v in self._versions.pop(ex_id, {}).values():
+            key = _folder_key(v.get("path"))
+            if key and self.by_slug.get(key) is rec:
+                del self.by_slug[key]
+        self._pinned.pop(ex_id, None)
+        return rec
+
+    # --- reads -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, ex_id: str) -> Optional[dict]:
+        return self.by_id.get(ex_id)
+
+    def find_slug(self, ex_type: str, slug: str) -> Optional[dict]:
+        return self.by_slug.get((ex_type, slug))
+
+    def version(self, ex_id: str, version: int) -> Optional[dict]:
+        """The {version, path} row for `version` of an exercise."""
+        return self._versions.get(ex_id, {}).get(version)
+
+    def latest_version(self, ex_id: str) -> int:
+        return max(self._versions.get(ex_id) or [0])
+
+    def pinned(self, ex_id: str) -> Optional[dict]:
+        """Row of the pinned (or latest) version."""
+        return self._pinned.get(ex_id, (None, None))[0]
+
+    def pinned_path(self, ex_id: str) -> Optional[str]:
+        """Absolute path of the pinned (or latest) version file."""
+        return self._pinned.get(ex_id, (None, None))[1]
+
+    # --- writes (inside ExerciseIndexStore.edit) --------------------------
+
+    def put(self, rec: dict) -> dict:
+        """Insert or replace the record with rec["id"] (in place in the list)."""
+        old = self._drop(rec["id"])
+        records = self.records
+        if old is not None:
+            for i, e in enumerate(records):
+                if e is old:
+                    records[i] = rec
+                    break
+        else:
+            records.append(rec)
+        self._add(rec)
+        return rec
+
+    def remove(self, ex_id: str) -> Optional[dict]:
+        old = self._drop(ex_id)
+        if old is not None:
+            self.data["exercises"] = [e for e in self.records if e is not old]
+        return old
+
+
+# --- Store --------------------------------------------------------------
+
+class ExerciseIndexStore:
+    """
+    exercises.index.json as the authoritative exercise registry.
+
+    Reads are served from an in-memory `ExerciseIndex` that is revalidated
+    with one os.stat() (another worker may have saved). Writers go through
+    `edit()`, which holds the file lock, starts from the file's current
+    contents and writes the result atomically, so saves and deletes update
+    the index incrementally. The filesystem is only walked by `reindex()`, which is
+    explicit (CLI, admin button, background job) except for bootstrapping
+    an index that does not exist yet.
+    """
+
+    def __init__(self, root: str = EXERCISES_DIR):
+        self.root = root
+        self.path = os.path.join(root, INDEX_FILENAME)
+        self._index: Optional[ExerciseIndex] = None
+        self._signature = None
+        self._lock = threading.RLock()
+        self._reindex_job: Optional[str] = None
+        self.hits = 0
+        self.reloads = 0
+        self.reindexes = 0
+        # bumped whenever the cached index changes (reload, reindex, edit)
+        self.generation = 0
+
+    def _stat_signature(self):
+        try:
+            return file_signature(os.stat(self.path))
+        except OSError:
+            return None
+
+    def _read(self) -> Tuple[Optional[dict], object]:
+        """(index, signature) from disk; index is None if missing or invalid."""
+        try:
+            with open(self.path, "rb") as f:
+                sig = file_signature(os.fstat(f.fileno()))
+                data = json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError):
+            return None, self._stat_signature()
+        if not isinstance(data, dict) or not isinstance(data.get("exercises"), list):
+            return None, sig
+        return data, sig
+
+    def _install(self, data: dict, sig) -> ExerciseIndex:
+        self._index, self._signature = ExerciseIndex(data), sig
+        self.generation += 1
+        return self._index
+
+    # --- reads -----------------------------------------------------------
+
+    def index(self) -> ExerciseIndex:
+        """The current index with its lookups; treat it as read-only."""
+        sig = self._stat_signature()
+        if self._index is not None and sig == self._signature:
+            self.hits += 1
+            return self._index
+        with self._lock:
+            if self._index is not None and sig == self._signature:
+                self.hits += 1
+                return self._index
+            data, sig = self._read()
+            if data is not None:
+                self.reloads += 1
+                return self._install(data, sig)
+            if sig is None or self._index is None:
+                # no index yet (or unreadable and nothing cached): build it now
+                return self.reindex()
+            # unreadable file: keep serving the last good copy while it is rebuilt
+            self.reindex_in_background()
+            return self._index
+
+    def get(self) -> dict:
+        """The index document ({"exercises": [...]}); treat it as read-only."""
+        return self.index().data
+
+    def find(self, ex_id: str) -> Optional[dict]:
+        return self.index().get(ex_id)
+
+    # --- writes ----------------------------------------------------------
+
+    @contextmanager
+    def edit(self) -> Iterator[ExerciseIndex]:
+        """
+        Lock the index and yield the current `ExerciseIndex` to modify with
+        `put`/`remove`; it is written back (atomically) when the block exits
+        without an error.
+
+            with exercise_index.edit() as idx:
+                idx.put(record)
+
+        The block edits a copy of the cached index when that is still current
+        (no re-read); readers keep the old one until the write succeeds and
+        the copy replaces it. Replace records rather than mutating them,
+        since readers may hold them. If the block or the write fails, the
+        cache is left as it was.
+        """
+        with file_lock(self.path):
+            with self._lock:
+                sig = self._stat_signature()
+                if self._index is not None and sig is not None and sig == self._signature:
+                    idx = self._index.copy()
+                else:
+                    data, _sig = self._read()
+                    idx = ExerciseIndex(data if data is not None else scan(self.root))
+                yield idx
+                atomic_write_json(self.path, idx.data)
+                self._index, self._signature = idx, self._stat_signature()
+                self.generation += 1
+
+    def reindex(self) -> dict:
+        """
+        Rebuild the index from the files on disk and write it. Pinned
+        versions and overrides chosen in the admin survive when still valid.
+        """
+        with file_lock(self.path):
+            with self._lock:
+                data = scan(self.root)
+                old, _sig = self._read()
+                if old is None:
+                    old = self._index.data if self._index is not None else {}
+                previous = {e.get("id"): e for e in old.get("exercises", []) if isinstance(e, dict)}
+                for rec in data["exercises"]:
+                    prev = previous.get(rec["id"])
+                    if not prev:
+                        continue
+                    pinned = prev.get("pinned_version")
+                    if pinned and any(v.get("version") == pinned for v in rec["versions"]):
+                        rec["pinned_version"] = pinned
+                    if "overrides" in prev:
+                        versions = rec.pop("versions")
+                        rec["overrides"] = prev["overrides"]
+                        rec["versions"] = versions
+                atomic_write_json(self.path, data)
+                self.reindexes += 1
+                return self._install(data, self._stat_signature())
+
+    def reindex_in_background(self) -> str:
+        """
+        Queue `reindex()` as an "exercise_reindex" background job (app/jobs.py)
+        unless one this store queued is still pending; returns the job id.
+        """
+        from . import jobs
+
+        with self._lock:
+            if self.reindexing:
+                return self._reindex_job
+            args = {} if os.path.abspath(self.root) == os.path.abspath(EXERCISES_DIR) else {"root": self.root}
+            self._reindex_job = jobs.enqueue("exercise_reindex", args, dedupe=True)
+            return self._reindex_job
+
+    @property
+    def reindexing(self) -> bool:
+        from . import jobs
+
+        job = jobs.get(self._reindex_job) if self._reindex_job else None
+        return job is not None and job["status"] in (jobs.QUEUED, jobs.RUNNING)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "reindexes": self.reindexes,
+            "exercises": len(self._index) if self._index is not None else 0,
+        }
+
+
+# Shared instance used by the admin routes
+exercise_index = ExerciseIndexStore()
+
+
+# --- Versioned file lookup (/data/exercises/<id>_v<N>.json) --------------
+
+FLAT_VERSION_RE = re.compile(r"^([A-Za-z0-9_-]+)_v([0-9]+)\.json$")
+DEFAULT_MISS_TTL = 30.0
+
+
+def _flat_version_files(root: str) -> Dict[Tuple[str, int], str]:
+    """Legacy <id>_v<N>.json files at `root` and one folder below (root wins)."""
+    found: Dict[Tuple[str, int], str] = {}
+    try:
+        names = sorted(n for n in os.listdir(root) if not n.startswith("."))
+    except OSError:
+        return found
+    folders = [root] + [os.path.join(root, n) for n in names if os.path.isdir(os.path.join(root, n))]
+    for folder in folders:
+        try:
+            files = os.listdir(folder)
+        except OSError:
+            continue
+        for fn in files:
+            m = FLAT_VERSION_RE.match(fn)
+            if m:
+                found.setdefault((m.group(1), int(m.group(2))), os.path.join(folder, fn))
+    return found
+
+
+class ExerciseFileMap:
+    """
+    (id, version) -> absolute path of that version's JSON, for the public
+    /data/exercises/<id>_v<N>.json URL that every exercise card fetches.
+
+    Built from the index's version rows plus the legacy <id>_v<N>.json files
+    (those win, as before), and rebuilt when the index changes; checking
+    that is the one os.stat() every index read already does. Names found
+    nowhere are probed on disk once (a file may have been dropped in by
+    hand) and then remembered as misses for `miss_ttl` seconds.
+    """
+
+    def __init__(self, index_store: ExerciseIndexStore, miss_ttl: float = DEFAULT_MISS_TTL):
+        self.index_store = index_store
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        self._generation = None
+        self._paths: Dict[Tuple[str, int], str] = {}
+        self._misses: Dict[Tuple[str, int], float] = {}     # key -> expiry (monotonic)
+        self.hits = 0
+        self.misses = 0
+        self.probes = 0
+        self.rebuilds = 0
+
+    def _rebuild(self, idx: ExerciseIndex) -> None:
+        paths: Dict[Tuple[str, int], str] = {}
+        for rec in idx.records:
+            if not isinstance(rec, dict) or not rec.get("id"):
+                continue
+            for v in rec.get("versions") or []:
+                if isinstance(v, dict) and v.get("path") and isinstance(v.get("version"), int):
+                    paths[(rec["id"], v["version"])] = os.path.join(PROJECT_ROOT, v["path"])
+        paths.update(_flat_version_files(self.index_store.root))
+        self._paths, self._misses = paths, {}
+        self.rebuilds += 1
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """Absolute path for "<id>_v<N>.json", or None."""
+        m = FLAT_VERSION_RE.match(filename or "")
+        if not m:
+            return None
+        key = (m.group(1), int(m.group(2)))
+        idx = self.index_store.index()
+        generation = self.index_store.generation
+        if self._generation != generation:
+            with self._lock:
+                if self._generation != generation:
+                    self._rebuild(idx)
+                    self._generation = generation
+        path = self._paths.get(key)
+        if path is not None:
+            self.hits += 1
+            return path
+        self.misses += 1
+        if self._misses.get(key, 0.0) > time.monotonic():
+            return None
+        with self._lock:
+            self.probes += 1
+            path = _flat_version_files(self.index_store.root).get(key)
+            if path is not None:
+                self._paths[key] = path
+            else:
+                self._misses[key] = time.monotonic() + self.miss_ttl
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "probes": self.probes,
+            "rebuilds": self.rebuilds,
+            "items": len(self._paths),
+        }
+
+
+# Shared instance used by the public exercise routes
+exercise_files = ExerciseFileMap(exercise_index)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    python -m app.exercise_index reindex   # rebuild exercises.index.json from the files
+    python -m app.exercise_index pack      # move full payload files into .objects/
+    python -m app.exercise_index compact   # store version chains as deltas (+ gc)
+    python -m app.exercise_index gc        # remove objects nothing points to
+    """
+    import argparse
+    from .storage import (DEFAULT_SNAPSHOT_EVERY, compact_exercise_history,
+                          gc_exercise_objects, pack_exercise_files)
+
+    ap = argparse.ArgumentParser(description="Maintain data/exercises/ (index and object store).")
+    ap.add_argument("command", choices=["reindex", "pack", "compact", "gc"])
+    ap.add_argument("--root", default=EXERCISES_DIR, help="exercises folder")
+    ap.add_argument("--every", type=int, default=DEFAULT_SNAPSHOT_EVERY,
+                    help="compact: full snapshot every N versions (default %(default)s)")
+    args = ap.parse_args(argv)
+
+    store = ExerciseIndexStore(args.root)
+    if args.command == "reindex":
+        idx = store.reindex()
+        print(f"reindex: {len(idx)} exercises")
+        return 0
+
+    # saves run under the index lock; hold it so none is half-way done
+    with file_lock(store.path):
+        if args.command == "pack":
+            st = pack_exercise_files(args.root)
+            print(f"pack: {st['files']} files ({st['bytes_before'] / 1024:.0f} KB) → {st['objects']} objects")
+        elif args.command == "compact":
+            st = compact_exercise_history(args.root, max(1, args.every))
+            print(f"compact: {st['versions']} versions → {st['deltas']} deltas, {st['snapshots']} snapshots; "
+                  f"{gc_exercise_objects(args.root)} objects removed")
+        else:
+            print(f"gc: {gc_exercise_objects(args.root)} objects removed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
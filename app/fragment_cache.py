@@ -0,0 +1,150 @@
+# app/fragment_cache.py
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from markupsafe import Markup
+
+from .glossary_store import GlossarySnapshot, entry_hash
+
+# Default budget for cached card HTML (override with FRAGMENT_CACHE_MAX_BYTES)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Rough per-item bookkeeping cost (key tuple, OrderedDict node) added to the size
+ITEM_OVERHEAD = 200
+
+
+class FragmentCache:
+    """
+    Bounded LRU of rendered HTML fragments, accounted in bytes. Fragments
+    are kept UTF-8 encoded (a str holding one emoji costs 4 bytes a char).
+
+    Keys are (entry content hash, lang, template token), so an edited entry
+    simply misses and its old fragment ages out; nothing is invalidated.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            html = self._items.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key: Tuple, html: bytes) -> None:
+        size = len(html) + ITEM_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old) + ITEM_OVERHEAD
+            self._items[key] = html
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, dropped = self._items.popitem(last=False)
+                self.bytes -= len(dropped) + ITEM_OVERHEAD
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "items": len(self._items),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Shared instance used by `render_entry_cards`
+cache = FragmentCache()
+
+# template name → (Template object, token); the token changes when Jinja
+# reloads the template, so fragments from an edited template are not reused
+_templates: Dict[str, Tuple[object, int]] = {}
+
+# Misses are rendered in one template pass and split on this marker
+_SEP = "\x00<!--fragment-->\x00"
+
+
+def entry_hashes(snapshot: GlossarySnapshot) -> Dict[int, Tuple[dict, str]]:
+    """
+    id(entry) → (entry, content hash) for every entry of `snapshot`, built
+    once per snapshot and freed with it. Entry dicts carried over from the
+    replaced snapshot keep their hash; only new or edited ones are hashed.
+    """
+    def build(snap: GlossarySnapshot, previous) -> Dict[int, Tuple[dict, str]]:
+        previous = previous or {}
+        hashes = {}
+        for e in snap.entries:
+            memo = previous.get(id(e))
+            hashes[id(e)] = memo if memo is not None and memo[0] is e else (e, entry_hash(e))
+        return hashes
+    return snapshot.derive("entry_hashes", build)
+
+
+def _hash_of(e: dict, hashes: Optional[Mapping[int, Tuple[dict, str]]]) -> str:
+    memo = hashes.get(id(e)) if hashes is not None else None
+    if memo is not None and memo[0] is e:
+        return memo[1]
+    return entry_hash(e)
+
+
+def _template_token(name: str, template) -> int:
+    seen = _templates.get(name)
+    if seen is not None and seen[0] is template:
+        return seen[1]
+    token = (seen[1] + 1) if seen is not None else 0
+    _templates[name] = (template, token)
+    return token
+
+
+def render_entry_cards(env, template_name: str, entries: Iterable[dict], lang: str = "es",
+                       snapshot: Optional[GlossarySnapshot] = None) -> Markup:
+    """
+    Concatenated HTML of `template_name` rendered once per entry (with
+    `entry` and `lang` in its context), reusing cached fragments for
+    entries whose content is unchanged. Pass the glossary `snapshot` the
+    entries come from so their content hashes are reused (`entry_hashes`);
+    entries it does not hold are hashed on the spot.
+    """
+    template = env.get_template(template_name)
+    token = (template_name, _template_token(template_name, template))
+    hashes = entry_hashes(snapshot) if snapshot is not None else None
+    parts = []
+    missing = []   # (index in parts, key, entry)
+    for e in entries:
+        key = (_hash_of(e, hashes), lang, token)
+        html = cache.get(key)
+        if html is None:
+            missing.append((len(parts), key, e))
+        parts.append(html)
+
+    if missing:
+        loop = env.from_string(
+            "{% for entry in entries %}{% include name %}" + _SEP + "{% endfor %}"
+        )
+        rendered = loop.render(entries=[e for _, _, e in missing], lang=lang, name=template).split(_SEP)
+        for (i, key, _), html in zip(missing, rendered):
+            parts[i] = html.encode("utf-8")
+            cache.put(key, parts[i])
+
+    return Markup(b"\n".join(parts).decode("utf-8"))
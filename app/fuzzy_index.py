@@ -0,0 +1,174 @@
+# app/fuzzy_index.py
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from .glossary_store import GlossarySnapshot
+from .search_index import VARIANT_KEYS, tokenize
+
+# Headword hits rank before variant hits at equal distance
+KIND_WORD = 0
+KIND_VARIANT = 1
+
+
+def normalize_key(s: str) -> str:
+    """Folded, single-spaced form used for fuzzy keys and queries."""
+    return " ".join(tokenize(s))
+
+
+def trigrams(s: str) -> List[str]:
+    """Distinct character trigrams of `s`, padded so short words still have some."""
+    padded = f"  {s} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def max_distance(n: int) -> int:
+    """Edit budget for a query of length `n` (short words tolerate one typo)."""
+    if n <= 2:
+        return 0
+    if n <= 5:
+        return 1
+    return 2
+
+
+def bounded_damerau_levenshtein(a: str, b: str, k: int) -> Optional[int]:
+    """
+    Optimal-string-alignment distance between `a` and `b`, or None as soon as
+    it is known to exceed `k`. Only a diagonal band of width 2k+1 is filled.
+    """
+    la, lb = len(a), len(b)
+    if abs(la - lb) > k:
+        return None
+    if a == b:
+        return 0
+    big = k + 1
+    prev2: List[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [big] * (lb + 1)
+        cur[0] = i
+        lo = max(1, i - k)
+        hi = min(lb, i + k)
+        row_min = cur[0] if lo == 1 else big
+        ca = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            v = prev[j - 1] + cost
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < v:
+                v = prev2[j - 2] + 1
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > k:
+            return None
+        prev2, prev = prev, cur
+    d = prev[lb]
+    return d if d <= k else None
+
+
+def swapped_variants(s: str, k: int, start: int = 0):
+    """(variant, swaps) for `s` with up to `k` non-overlapping adjacent pairs swapped."""
+    yield s, 0
+    if k <= 0:
+        return
+    for i in range(start, len(s) - 1):
+        if s[i] != s[i + 1]:
+            t = s[:i] + s[i + 1] + s[i] + s[i + 2:]
+            for v, n in swapped_variants(t, k - 1, i + 2):
+                yield v, n + 1
+
+
+class TrigramIndex:
+    """
+    Character-trigram postings over every headword and variant of one
+    glossary snapshot. A query only looks at keys sharing enough trigrams
+    with it, then confirms them with a bounded edit-distance check.
+    """
+
+    def __init__(self, snapshot: GlossarySnapshot, previous: Optional["TrigramIndex"] = None):
+        self.entries = snapshot.entries
+        # keys[i] = (normalized text, entry position, kind)
+        self.keys: List[Tuple[str, int, int]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.by_length: Dict[int, List[int]] = {}
+        seen = set()
+        for pos, e in enumerate(self.entries):
+            self._add(normalize_key(e.get("word", "")), pos, KIND_WORD, seen)
+            v = e.get("variants") or {}
+            if isinstance(v, dict):
+                for k in VARIANT_KEYS:
+                    arr = v.get(k) or []
+                    if isinstance(arr, list):
+                        for x in arr:
+                            if isinstance(x, str):
+                                self._add(normalize_key(x), pos, KIND_VARIANT, seen)
+
+    def _add(self, text: str, pos: int, kind: int, seen: set) -> None:
+        if not text or (text, pos) in seen:
+            return
+        seen.add((text, pos))
+        key_id = len(self.keys)
+        self.keys.append((text, pos, kind))
+        self.by_length.setdefault(len(text), []).append(key_id)
+        for g in trigrams(text):
+            self.postings.setdefault(g, []).append(key_id)
+
+    def _shared(self, grams: List[str]) -> Dict[int, int]:
+        """key id → how many of `grams` the key has."""
+        counts: Dict[int, int] = {}
+        for g in grams:
+            for key_id in self.postings.get(g, ()):
+                counts[key_id] = counts.get(key_id, 0) + 1
+        return counts
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float, int, dict]]:
+        """
+        Entries whose headword or a variant is within the edit budget of
+        `query`. Returns [(distance, similarity, position, entry)], best first.
+        """
+        q = normalize_key(query)
+        if not q:
+            return []
+        k = max_distance(len(q))
+        grams = trigrams(q)
+        counts = self._shared(grams)
+
+        # A transposition can destroy 4 trigrams and leave none ("hce" →
+        # "che"), any other edit at most 3. So filter once per way of undoing
+        # up to k transpositions, allowing 3 trigrams for each remaining edit.
+        candidates = set()
+        for variant, swaps in swapped_variants(q, k):
+            vgrams = grams if swaps == 0 else trigrams(variant)
+            need = len(vgrams) - 3 * (k - swaps)
+            if need <= 0:
+                # too few distinct trigrams to rule anything out: check every key
+                candidates = [key_id for n in range(len(q) - k, len(q) + k + 1)
+                              for key_id in self.by_length.get(n, ())]
+                break
+            shared = counts if swaps == 0 else self._shared(vgrams)
+            candidates.update(key_id for key_id, c in shared.items() if c >= need)
+
+        best: Dict[int, Tuple[int, int, float]] = {}
+        for key_id in candidates:
+            shared = counts.get(key_id, 0)
+            text, pos, kind = self.keys[key_id]
+            d = bounded_damerau_levenshtein(q, text, k)
+            if d is None:
+                continue
+            sim = shared / (len(grams) + len(trigrams(text)) - shared)
+            rank = (d, kind, -sim)
+            if pos not in best or rank < best[pos]:
+                best[pos] = rank
+
+        ranked = heapq.nsmallest(limit, ((r, pos) for pos, r in best.items()))
+        return [(d, -neg_sim, pos, self.entries[pos]) for (d, _kind, neg_sim), pos in ranked]
+
+
+def get_trigram_index(snapshot: GlossarySnapshot) -> TrigramIndex:
+    """Trigram index for `snapshot`, built on first use and reused after."""
+    return snapshot.derive("trigram_index", TrigramIndex)
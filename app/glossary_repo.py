@@ -0,0 +1,403 @@
+# app/glossary_repo.py
+from __future__ import annotations
+
+import os
+import json
+import atexit
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from .glossary_store import GlossaryStore, entry_hash, file_signature, sort_key, store as glossary_store
+from . import precompress
+from .metrics import glossary_conflicts, glossary_merges
+from .storage import atomic_write_json, file_lock
+
+# Seconds to wait after an edit before rewriting the file; edits arriving in
+# the meantime are written together.
+DEFAULT_FLUSH_DELAY = 0.5
+# A failed background flush is retried after this many seconds, doubling up
+# to the maximum; the edits stay journaled until a write succeeds.
+FLUSH_RETRY_DELAY = 1.0
+FLUSH_RETRY_MAX_DELAY = 60.0
+
+log = logging.getLogger(__name__)
+
+
+class GlossaryConflict(Exception):
+    """The entry being changed is no longer the version the caller saw."""
+
+
+class GlossaryDuplicate(Exception):
+    """An entry with the same word already exists."""
+
+
+class GlossaryRepository:
+    """
+    In-memory, always-sorted view of one glossary file for the admin routes.
+
+      - insert: bisect on cached sort keys (no full re-sort)
+      - lookup/delete: dict indexes by slug and by case-folded word
+      - update: in place when the sort key is unchanged, else move
+
+    Writes are batched: each edit marks the repository dirty and schedules a
+    single flush `flush_delay` seconds later. Every edit is also published to
+    the shared GlossaryStore right away, so public pages served by this
+    process see it before the file is rewritten. A flush that fails in the
+    background is logged and retried; the edits stay journaled meanwhile.
+
+    Other processes: writes happen under an advisory file lock
+    (storage.file_lock). Edits are journaled until flushed; if another
+    process rewrote the file meanwhile, the fresh file is loaded and the
+    journal replayed on top of it (entry-level merge) before writing, so
+    neither side's edits are lost. Where both sides touched the same entry
+    the merge is "last writer wins" (this process, writing now):
+
+      - an entry we added that was also added elsewhere: ours replaces it
+      - an entry we edited that was also edited elsewhere: ours replaces it
+      - an entry we edited that was deleted elsewhere: ours is put back
+      - an entry we deleted: gone, whatever happened to it elsewhere
+
+    Each override or resurrection is logged as a warning and counted in
+    `conflicts`; `merges` counts writes that needed a replay. Both are
+    exported at /metrics (pp_glossary_conflicts_total{kind=add|edit|resurrect},
+    pp_glossary_merges_total).
+
+    Entry dicts are never mutated in place (snapshots share them).
+    """
+
+    def __init__(self, name: str, flush_delay: float = DEFAULT_FLUSH_DELAY,
+                 store: Optional[GlossaryStore] = None):
+        self.name = name
+        self.store = store if store is not None else glossary_store
+        self.path = self.store.path_for(name)
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self.entries: List[dict] = []
+        self.keys: List[str] = []
+        self.by_slug: Dict[str, dict] = {}
+        self.by_word: Dict[str, List[dict]] = {}
+        self.signature = None    # signature of the file we last read/wrote
+        self.loaded = False
+        # unflushed edits, replayed on top of the file if someone else wrote it
+        self._journal: List[Tuple] = []
+        self.flushes = 0
+        self.flush_errors = 0
+        self._retries = 0        # consecutive failed background flushes
+        self.merges = 0
+        self.conflicts = 0       # replays that overrode or resurrected another process's edit
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._journal)
+
+    # --- loading ---------------------------------------------------------
+
+    def _disk_signature(self):
+        try:
+            return file_signature(os.stat(self.path))
+        except OSError:
+            return None
+
+    def _ensure_fresh(self) -> None:
+        """
+        Work on top of the file's current contents: reload it if it changed
+        on disk, or merge our pending edits into it right away if we have any.
+        """
+        if self.loaded and self._disk_signature() == self.signature:
+            return
+        if self.dirty:
+            self._write()
+        else:
+            self._reload()
+
+    def _reload(self) -> None:
+        entries: List[dict] = []
+        sig = None
+        try:
+            with open(self.path, "rb") as f:
+                sig = file_signature(os.fstat(f.fileno()))
+                entries = json.loads(f.read().decode("utf-8")) or []
+        except FileNotFoundError:
+            pass
+        self._set_entries(entries)
+        self.signature = sig
+        self.loaded = True
+
+    def _set_entries(self, entries: List[dict]) -> None:
+        keyed = sorted(((sort_key(e.get("word", "")), i) for i, e in enumerate(entries)))
+        self.entries = [entries[i] for _, i in keyed]
+        self.keys = [k for k, _ in keyed]
+        self.by_slug = {}
+        self.by_word = {}
+        for e in self.entries:
+            self._index(e)
+
+    def _index(self, e: dict) -> None:
+        if e.get("slug"):
+            self.by_slug[e["slug"]] = e
+        self.by_word.setdefault((e.get("word", "") or "").lower(), []).append(e)
+
+    def _unindex(self, e: dict) -> None:
+        if e.get("slug") and self.by_slug.get(e["slug"]) is e:
+            del self.by_slug[e["slug"]]
+        w = (e.get("word", "") or "").lower()
+        bucket = [x for x in self.by_word.get(w, []) if x is not e]
+        if bucket:
+            self.by_word[w] = bucket
+        else:
+            self.by_word.pop(w, None)
+
+    def _position(self, e: dict) -> int:
+        """List position of entry `e` (bisect to its key, then identity)."""
+        k = sort_key(e.get("word", ""))
+        i = bisect_left(self.keys, k)
+        while i < len(self.keys) and self.keys[i] == k:
+            if self.entries[i] is e:
+                return i
+            i += 1
+        raise GlossaryConflict(f'Entry "{e.get("word", "")}" was changed concurrently')
+
+    def _find(self, word: str) -> Optional[dict]:
+        bucket = self.by_word.get((word or "").lower())
+        return bucket[0] if bucket else None
+
+    # --- reads -----------------------------------------------------------
+
+    def exists(self) -> bool:
+        with self._lock:
+            return self.dirty or os.path.exists(self.path)
+
+    def all(self) -> List[dict]:
+        """Sorted entries (do not mutate)."""
+        with self._lock:
+            self._ensure_fresh()
+            return self.entries
+
+    def find(self, word: str) -> Optional[dict]:
+        """First entry whose word matches `word` case-insensitively."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._find(word)
+
+    def get_by_slug(self, slug: str) -> Optional[dict]:
+        with self._lock:
+            self._ensure_fresh()
+            return self.by_slug.get(slug)
+
+    # --- writes ----------------------------------------------------------
+
+    def add(self, entry: dict) -> None:
+        """
+        Insert `entry` at its sorted position. Raises GlossaryDuplicate if an
+        entry with the same word exists (checked under the file lock, against
+        the file as other processes last wrote it).
+        """
+        with self._lock, file_lock(self.path):
+            self._ensure_fresh()
+            if self._find(entry.get("word", "")) is not None:
+                raise GlossaryDuplicate(f'Entry "{entry.get("word", "")}" already exists')
+            self._insert(entry)
+            self._journal.append(("add", entry))
+            self._changed()
+
+    def replace(self, old: dict, new: dict) -> None:
+        """
+        Swap entry `old` for `new`, moving it only if its sort key changed.
+        Raises GlossaryConflict if `old` was replaced or deleted meanwhile.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            if not any(x is old for x in self.by_word.get((old.get("word", "") or "").lower(), [])):
+                # reloaded since the caller looked: fine if the entry is unchanged
+                current = self._find(old.get("word", ""))
+                if current is None or entry_hash(current) != entry_hash(old):
+                    raise GlossaryConflict(f'Entry "{old.get("word", "")}" was changed concurrently')
+                old = current
+            self._swap(old, new)
+            self._journal.append(("replace", old.get("word", ""), entry_hash(old), new))
+            self._changed()
+
+    def delete_word(self, word: str) -> int:
+        """Remove every entry whose word equals `word` exactly; returns the count."""
+        with self._lock:
+            self._ensure_fresh()
+            n = self._remove_word(word)
+            if n:
+                self._journal.append(("delete", word))
+                self._changed()
+            return n
+
+    def _insert(self, entry: dict) -> None:
+        k = sort_key(entry.get("word", ""))
+        i = bisect_right(self.keys, k)
+        self.keys.insert(i, k)
+        self.entries.insert(i, entry)
+        self._index(entry)
+
+    def _swap(self, old: dict, new: dict) -> None:
+        i = self._position(old)
+        k = sort_key(new.get("word", ""))
+        self._unindex(old)
+        if k == self.keys[i]:
+            self.entries[i] = new
+        else:
+            del self.keys[i]
+            del self.entries[i]
+            j = bisect_right(self.keys, k)
+            self.keys.insert(j, k)
+            self.entries.insert(j, new)
+        self._index(new)
+
+    def _remove_word(self, word: str) -> int:
+        victims = [e for e in self.by_word.get((word or "").lower(), []) if e.get("word") == word]
+        for e in victims:
+            i = self._position(e)
+            del self.keys[i]
+            del self.entries[i]
+            self._unindex(e)
+        return len(victims)
+
+    def _replay(self, op: Tuple) -> None:
+        """Re-apply one journaled edit on top of freshly loaded entries."""
+        kind = op[0]
+        if kind == "add":
+            entry = op[1]
+            current = self._find(entry.get("word", ""))
+            if current is not None:
+                if entry_hash(current) != entry_hash(entry):
+                    self._conflict("add", entry)     # added elsewhere too: ours wins
+                self._swap(current, entry)
+            else:
+                self._insert(entry)
+        elif kind == "replace":
+            _, old_word, old_hash, new = op
+            current = self._find(old_word) or self._find(new.get("word", ""))
+            if current is not None:
+                if entry_hash(current) not in (old_hash, entry_hash(new)):
+                    self._conflict("edit", new)      # edited elsewhere too: ours wins
+                self._swap(current, new)
+            else:
+                self._conflict("resurrect", new)     # deleted elsewhere: keep our edit
+                self._insert(new)
+        elif kind == "delete":
+            self._remove_word(op[1])
+
+    def _conflict(self, kind: str, entry: dict) -> None:
+        self.conflicts += 1
+        glossary_conflicts.inc(self.name, kind)
+        if kind == "resurrect":
+            log.warning('Glossary %s: "%s" was deleted by another process; restoring our edit',
+                        self.name, entry.get("word", ""))
+        else:
+            log.warning('Glossary %s: "%s" was also %s by another process; keeping ours',
+                        self.name, entry.get("word", ""), "added" if kind == "add" else "edited")
+
+    def _changed(self) -> None:
+        self._publish(self.signature)
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        self._schedule(self.flush_delay)
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self._background_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_flush(self) -> None:
+        # Timer thread: nobody would see the exception, so log it and retry
+        try:
+            self.flush()
+        except Exception:
+            with self._lock:
+                self._retries += 1
+                delay = min(FLUSH_RETRY_MAX_DELAY, FLUSH_RETRY_DELAY * 2 ** (self._retries - 1))
+                log.exception("Writing glossary %s failed (%d pending edits); retrying in %.0fs",
+                              self.name, len(self._journal), delay)
+                self._schedule(delay)
+
+    def _publish(self, signature) -> None:
+        # Readers in this process get the edited list immediately. The snapshot
+        # keeps the given file signature, so it stays valid until the file changes.
+        if signature is not None:
+            self.store.put(self.name, list(self.entries), signature, list(self.keys))
+        else:
+            self.store.invalidate(self.name)
+
+    # --- persistence -----------------------------------------------------
+
+    def _write(self) -> None:
+        """Merge with the file if it changed under us, then write it."""
+        with file_lock(self.path):
+            try:
+                if self._disk_signature() != self.signature:
+                    journal = self._journal
+                    self._reload()
+                    for op in journal:
+                        self._replay(op)
+                    self.merges += 1
+                    glossary_merges.inc(self.name)
+                atomic_write_json(self.path, self.entries, indent=4)
+            except Exception:
+                # the journal is kept; the entries may hold a half-done
+                # replay, so the next attempt reloads the file and replays it all
+                self.signature = None
+                self.flush_errors += 1
+                raise
+            self.signature = self._disk_signature()
+            precompress.refresh(self.path)
+        self._journal = []
+        self._retries = 0
+        self.flushes += 1
+        self._publish(self.signature)
+
+    def flush(self) -> bool:
+        """Write pending edits (if any) in one go. Returns True if a write happened."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.dirty:
+                return False
+            self._write()
+            return True
+
+
+# --- Registry -----------------------------------------------------------
+
+_repos: Dict[str, GlossaryRepository] = {}
+_repos_lock = threading.Lock()
+
+
+def get_repository(name: str, flush_delay: Optional[float] = None) -> GlossaryRepository:
+    """Process-wide repository for glossary `name` (file base name)."""
+    with _repos_lock:
+        repo = _repos.get(name)
+        if repo is None:
+            repo = _repos[name] = GlossaryRepository(
+                name, DEFAULT_FLUSH_DELAY if flush_delay is None else flush_delay
+            )
+        elif flush_delay is not None:
+            repo.flush_delay = flush_delay
+        return repo
+
+
+def flush_pending(name: str) -> bool:
+    """Flush glossary `name` if this process holds unwritten edits for it."""
+    with _repos_lock:
+        repo = _repos.get(name)
+    return repo.flush() if repo is not None else False
+
+
+def flush_all() -> int:
+    """Flush every repository with pending edits; returns how many wrote."""
+    with _repos_lock:
+        repos = list(_repos.values())
+    return sum(1 for r in repos if r.flush())
+
+
+atexit.register(flush_all)
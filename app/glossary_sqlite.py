@@ -0,0 +1,498 @@
+# app/glossary_sqlite.py
+"""
+Optional SQLite backend for the regional glossaries (GLOSSARY_BACKEND = "sqlite").
+
+Tables (one database for every country):
+  glossaries  (name = JSON file base name, version bumped on every write)
+  entries     (word, slug, sort key, headword key, verbatim JSON document)
+  senses      (definition, equivalents) ─┐
+  examples    (es, en)                   ├─ normalized from the document
+  sources     (kind, name, season, ...) ─┘  for indexed queries
+  entries_fts (FTS5, unicode61 remove_diacritics 2: accent-folding)
+
+The verbatim document is what readers and the exporter return, so JSON
+stays the interchange format and round-trips byte-for-byte in content.
+
+CLI:
+  python -m app.glossary_sqlite import               # country_map glossaries → DB
+  python -m app.glossary_sqlite import --name glosario-regional-argentina
+  python -m app.glossary_sqlite export [--out-dir data/glossaries]
+"""
+from __future__ import annotations
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .glossary_store import GLOSSARY_DIR, PROJECT_ROOT, country_map, entry_hash, sort_key
+from .search_index import entry_fields, tokenize
+from .source_index import SourceRef, norm
+
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "glossaries.sqlite3")
+
+# bm25() column weights, same order of importance as the JSON inverted index
+FTS_WEIGHTS = (100, 60, 30, 15, 5)
+HEADWORD_BONUS = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS glossaries (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL UNIQUE,
+    version  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id          INTEGER PRIMARY KEY,
+    glossary_id INTEGER NOT NULL REFERENCES glossaries(id) ON DELETE CASCADE,
+    word        TEXT NOT NULL,
+    word_lower  TEXT NOT NULL,
+    slug        TEXT,
+    sort_key    TEXT NOT NULL,
+    headkey     TEXT NOT NULL,
+    audio       TEXT,
+    hash        TEXT NOT NULL,
+    doc         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_sort ON entries(glossary_id, sort_key, id);
+CREATE INDEX IF NOT EXISTS entries_word ON entries(glossary_id, word_lower);
+CREATE INDEX IF NOT EXISTS entries_slug ON entries(glossary_id, slug);
+CREATE TABLE IF NOT EXISTS senses (
+    id          INTEGER PRIMARY KEY,
+    entry_id    INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    ord         INTEGER NOT NULL,
+    definition  TEXT,
+    equivalents TEXT
+);
+CREATE INDEX IF NOT EXISTS senses_entry ON senses(entry_id);
+CREATE TABLE IF NOT EXISTS examples (
+    id       INTEGER PRIMARY KEY,
+    sense_id INTEGER NOT NULL REFERENCES senses(id) ON DELETE CASCADE,
+    ord      INTEGER NOT NULL,
+    es       TEXT,
+    en       TEXT
+);
+CREATE INDEX IF NOT EXISTS examples_sense ON examples(sense_id);
+CREATE TABLE IF NOT EXISTS sources (
+    id          INTEGER PRIMARY KEY,
+    example_id  INTEGER NOT NULL REFERENCES examples(id) ON DELETE CASCADE,
+    entry_id    INTEGER NOT NULL,
+    glossary_id INTEGER NOT NULL,
+    kind        TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    season      INTEGER,
+    episode     INTEGER,
+    year        INTEGER,
+    artist      TEXT,
+    slug_kind   TEXT,
+    slug        TEXT,
+    label       TEXT
+);
+CREATE INDEX IF NOT EXISTS sources_name ON sources(glossary_id, kind, name);
+CREATE INDEX IF NOT EXISTS sources_slug ON sources(glossary_id, slug_kind, slug);
+CREATE INDEX IF NOT EXISTS sources_entry ON sources(entry_id);
+CREATE INDEX IF NOT EXISTS sources_example ON sources(example_id);   -- ON DELETE CASCADE lookups
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    word, variants, equivalents, definition, examples,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+
+def _headkey(word: str) -> str:
+    return " ".join(tokenize(word or ""))
+
+
+class SqliteGlossaryBackend:
+    """
+    Glossary storage in one SQLite database. Connections are per thread;
+    WAL mode lets readers in every worker run while one admin write commits.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+    # --- connections -----------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        return _WriteTx(self.conn)
+
+    # --- glossaries ------------------------------------------------------
+
+    def _glossary_id(self, name: str, create: bool = False) -> Optional[int]:
+        row = self.conn.execute("SELECT id FROM glossaries WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self.conn.execute("INSERT INTO glossaries(name) VALUES (?)", (name,)).lastrowid
+
+    def names(self) -> List[str]:
+        return [r[0] for r in self.conn.execute("SELECT name FROM glossaries ORDER BY name")]
+
+    def exists(self, name: str) -> bool:
+        return self._glossary_id(name) is not None
+
+    def signature(self, name: str) -> Optional[Tuple[int, int, int]]:
+        """Change detector for GlossaryStore: (glossary id, version, 0)."""
+        row = self.conn.execute("SELECT id, version FROM glossaries WHERE name = ?", (name,)).fetchone()
+        return (row[0], row[1], 0) if row is not None else None
+
+    # --- reads -----------------------------------------------------------
+
+    def entries(self, name: str) -> List[dict]:
+        """Every entry document, in glossary order (accent/case-insensitive)."""
+        rows = self.conn.execute(
+            "SELECT e.doc FROM entries e JOIN glossaries g ON g.id = e.glossary_id "
+            "WHERE g.name = ? ORDER BY e.sort_key, e.id", (name,))
+        return [json.loads(doc) for (doc,) in rows]
+
+    def find(self, name: str, word: str) -> Optional[dict]:
+        """First entry (glossary order) whose word matches case-insensitively."""
+        # "+": sort the few matches instead of walking the whole glossary in
+        # entries_sort order (which the planner otherwise prefers)
+        row = self.conn.execute(
+            "SELECT e.doc FROM entries e JOIN glossaries g ON g.id = e.glossary_id "
+            "WHERE g.name = ? AND e.word_lower = ? ORDER BY +e.sort_key, e.id LIMIT 1",
+            (name, (word or "").lower())).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def search(self, names: Sequence[str], query: str, limit: int = 100) -> List[Tuple[str, dict]]:
+        """
+        Full-text search over the given glossaries (AND of token prefixes),
+        best first; ties go to the earlier glossary in `names`, then word
+        order. Returns [(glossary name, entry)].
+        """
+        toks = list(dict.fromkeys(tokenize(query)))
+        if not toks or not names:
+            return []
+        match = " AND ".join(f'"{t}"*' for t in toks)
+        order_rows = ", ".join("(?, ?)" for _ in names)
+        params: List = []
+        for i, n in enumerate(names):
+            params += [n, i]
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        sql = (
+            f"WITH ord(name, o) AS (VALUES {order_rows}) "
+            f"SELECT g.name, e.doc, "
+            f"       bm25(entries_fts, {weights}) - CASE WHEN e.headkey = ? THEN {HEADWORD_BONUS} ELSE 0 END AS score "
+            f"FROM entries_fts "
+            f"JOIN entries e ON e.id = entries_fts.rowid "
+            f"JOIN glossaries g ON g.id = e.glossary_id "
+            f"JOIN ord ON ord.name = g.name "
+            f"WHERE entries_fts MATCH ? "
+            f"ORDER BY score, ord.o, e.sort_key, e.id LIMIT ?"
+        )
+        rows = self.conn.execute(sql, params + [" ".join(toks), match, limit])
+        return [(n, json.loads(doc)) for n, doc, _score in rows]
+
+    def match_sources(self, name: str, kind: str = "", title: str = "", year: Optional[int] = None,
+                      season: Optional[int] = None, episode: Optional[int] = None,
+                      handle: str = "", song: str = "", artist: str = "",
+                      text: str = "") -> List[Tuple[dict, int]]:
+        """
+        Entries with examples from the requested source, as
+        [(entry, matching example count)] in glossary order. Same rules as
+        SourceIndex.match() (the JSON backend).
+        """
+        gid = self._glossary_id(name)
+        if gid is None:
+            return []
+        if kind:
+            kinds = [norm(kind)]
+        else:
+            kinds = [r[0] for r in self.conn.execute(
+                "SELECT DISTINCT kind FROM sources WHERE glossary_id = ?", (gid,))]
+        title_n, artist_n = norm(title), norm(artist)
+        clauses, params = [], []
+        for k in kinds:
+            if k == "redes":
+                want = norm(handle or title)
+            elif k == "cancion":
+                want = norm(song or title)
+            elif k == "otro":
+                want = norm(text or title)
+            else:
+                want = title_n
+            cond, p = ["s.kind = ?"], [k]
+            if want:
+                cond.append("s.name = ?")
+                p.append(want)
+            if k == "serie":
+                if season is not None:
+                    cond.append("s.season = ?")
+                    p.append(season)
+                if episode is not None:
+                    cond.append("s.episode = ?")
+                    p.append(episode)
+            elif k == "pelicula" and year is not None:
+                cond.append("s.year = ?")
+                p.append(year)
+            elif k == "cancion" and artist_n:
+                cond.append("s.artist = ?")
+                p.append(artist_n)
+            clauses.append("(" + " AND ".join(cond) + ")")
+            params += p
+        if not clauses:
+            return []
+        sql = (
+            "SELECT e.doc, COUNT(*) FROM sources s JOIN entries e ON e.id = s.entry_id "
+            f"WHERE s.glossary_id = ? AND ({' OR '.join(clauses)}) "
+            "GROUP BY e.id ORDER BY e.sort_key, e.id"
+        )
+        return [(json.loads(doc), n) for doc, n in self.conn.execute(sql, [gid] + params)]
+
+    # --- writes ----------------------------------------------------------
+
+    def _insert_entry(self, cur: sqlite3.Cursor, gid: int, e: dict, entry_id: Optional[int] = None) -> int:
+        word = e.get("word", "") or ""
+        cur.execute(
+            "INSERT INTO entries(id, glossary_id, word, word_lower, slug, sort_key, headkey, audio, hash, doc) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry_id, gid, word, word.lower(), e.get("slug"), sort_key(word), _headkey(word),
+             e.get("audio"), entry_hash(e), json.dumps(e, ensure_ascii=False)))
+        eid = cur.lastrowid
+        senses = e.get("senses") or []
+        for si, s in enumerate(senses if isinstance(senses, list) else []):
+            if not isinstance(s, dict):
+                continue
+            eq = s.get("equivalents") if isinstance(s.get("equivalents"), list) else []
+            cur.execute(
+                "INSERT INTO senses(entry_id, ord, definition, equivalents) VALUES (?, ?, ?, ?)",
+                (eid, si, s.get("definition") if isinstance(s.get("definition"), str) else None,
+                 json.dumps(eq, ensure_ascii=False)))
+            sid = cur.lastrowid
+            for xi, ex in enumerate(s.get("examples") or []):
+                if not isinstance(ex, dict):
+                    continue
+                cur.execute("INSERT INTO examples(sense_id, ord, es, en) VALUES (?, ?, ?, ?)",
+                            (sid, xi, ex.get("es"), ex.get("en")))
+                xid = cur.lastrowid
+                src = ex.get("source")
+                if isinstance(src, dict):
+                    r = SourceRef(src)
+                    cur.execute(
+                        "INSERT INTO sources(example_id, entry_id, glossary_id, kind, name, season, episode, "
+                        "year, artist, slug_kind, slug, label) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (xid, eid, gid, r.kind, r.name, r.season, r.episode, r.year, r.artist,
+                         r.slug_kind, r.slug, r.label))
+        f = entry_fields(e)
+        cur.execute(
+            "INSERT INTO entries_fts(rowid, word, variants, equivalents, definition, examples) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (eid, " ".join(f["word"]), " ".join(f["variants"]), " ".join(f["equivalents"]),
+             " ".join(f["definition"]), " ".join(f["examples"])))
+        return eid
+
+    def _delete_entry(self, cur: sqlite3.Cursor, eid: int) -> None:
+        cur.execute("DELETE FROM sources WHERE entry_id = ?", (eid,))
+        cur.execute("DELETE FROM entries WHERE id = ?", (eid,))   # cascades senses/examples
+        cur.execute("DELETE FROM entries_fts WHERE rowid = ?", (eid,))
+
+    def _bump(self, cur: sqlite3.Cursor, gid: int) -> None:
+        cur.execute("UPDATE glossaries SET version = version + 1 WHERE id = ?", (gid,))
+
+    def add(self, name: str, entry: dict) -> None:
+        """Insert `entry`. Raises GlossaryDuplicate if its word (any case) exists."""
+        from .glossary_repo import GlossaryDuplicate
+
+        with self._write() as cur:
+            gid = self._glossary_id(name, create=True)
+            word = entry.get("word", "") or ""
+            if cur.execute("SELECT 1 FROM entries WHERE glossary_id = ? AND word_lower = ? LIMIT 1",
+                           (gid, word.lower())).fetchone() is not None:
+                raise GlossaryDuplicate(f'Entry "{word}" already exists')
+            self._insert_entry(cur, gid, entry)
+            self._bump(cur, gid)
+
+    def replace(self, name: str, old: dict, new: dict) -> None:
+        """
+        Replace entry `old` with `new`. Raises GlossaryConflict if no entry
+        with old's word and exact content exists any more.
+        """
+        from .glossary_repo import GlossaryConflict
+
+        with self._write() as cur:
+            gid = self._glossary_id(name)
+            row = None
+            if gid is not None:
+                row = cur.execute(
+                    "SELECT id FROM entries WHERE glossary_id = ? AND word_lower = ? AND hash = ? "
+                    "ORDER BY +sort_key, id LIMIT 1",   # "+": see find()
+                    (gid, (old.get("word", "") or "").lower(), entry_hash(old))).fetchone()
+            if row is None:
+                raise GlossaryConflict(f'Entry "{old.get("word", "")}" was changed concurrently')
+            self._delete_entry(cur, row[0])
+            self._insert_entry(cur, gid, new, entry_id=row[0])
+            self._bump(cur, gid)
+
+    def delete_word(self, name: str, word: str) -> int:
+        """Remove every entry whose word equals `word` exactly; returns the count."""
+        with self._write() as cur:
+            gid = self._glossary_id(name)
+            if gid is None:
+                return 0
+            ids = [r[0] for r in cur.execute(
+                "SELECT id FROM entries WHERE glossary_id = ? AND word = ?", (gid, word))]
+            for eid in ids:
+                self._delete_entry(cur, eid)
+            if ids:
+                self._bump(cur, gid)
+            return len(ids)
+
+    def import_entries(self, name: str, entries: Iterable[dict]) -> int:
+        """Replace the whole glossary `name` with `entries` (one transaction)."""
+        with self._write() as cur:
+            gid = self._glossary_id(name, create=True)
+            for (eid,) in cur.execute("SELECT id FROM entries WHERE glossary_id = ?", (gid,)).fetchall():
+                self._delete_entry(cur, eid)
+            n = 0
+            for e in entries:
+                if isinstance(e, dict):
+                    self._insert_entry(cur, gid, e)
+                    n += 1
+            self._bump(cur, gid)
+            return n
+
+
+class _WriteTx:
+    """BEGIN IMMEDIATE … COMMIT/ROLLBACK around a block; yields a cursor."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class SqliteGlossaryRepository:
+    """
+    Admin CRUD for one glossary in the SQLite backend, with the same
+    interface as glossary_repo.GlossaryRepository. Every edit commits right
+    away (a row update, not a file rewrite), so there is nothing to batch.
+    """
+
+    def __init__(self, backend: SqliteGlossaryBackend, name: str):
+        self.backend = backend
+        self.name = name
+
+    def exists(self) -> bool:
+        return self.backend.exists(self.name)
+
+    def all(self) -> List[dict]:
+        from .glossary_store import store
+        return store.entries(self.name)
+
+    def find(self, word: str) -> Optional[dict]:
+        return self.backend.find(self.name, word)
+
+    def add(self, entry: dict) -> None:
+        self.backend.add(self.name, entry)
+
+    def replace(self, old: dict, new: dict) -> None:
+        self.backend.replace(self.name, old, new)
+
+    def delete_word(self, word: str) -> int:
+        return self.backend.delete_word(self.name, word)
+
+    def flush(self) -> bool:
+        return False
+
+
+# --- Configured instance ------------------------------------------------
+
+_backend: Optional[SqliteGlossaryBackend] = None
+_backend_lock = threading.Lock()
+
+
+def configure(path: str = DEFAULT_DB_PATH) -> SqliteGlossaryBackend:
+    """Open (creating if needed) the database and make it the active backend."""
+    global _backend
+    with _backend_lock:
+        _backend = SqliteGlossaryBackend(path)
+        return _backend
+
+
+def get_backend() -> Optional[SqliteGlossaryBackend]:
+    """The active SQLite backend, or None when glossaries are served from JSON."""
+    return _backend
+
+
+# --- Import / export ----------------------------------------------------
+
+def json_glossary_names(directory: str = GLOSSARY_DIR) -> List[str]:
+    """
+    Base names of the country_map glossaries that have a file in `directory`
+    (backups and migration leftovers next to them are not glossaries).
+    """
+    return sorted(name for name in set(country_map.values())
+                  if os.path.isfile(os.path.join(directory, f"{name}.json")))
+
+
+def import_json(backend: SqliteGlossaryBackend, names: Optional[List[str]] = None,
+                directory: str = GLOSSARY_DIR) -> Dict[str, int]:
+    counts = {}
+    for name in names or json_glossary_names(directory):
+        with open(os.path.join(directory, f"{name}.json"), "r", encoding="utf-8") as f:
+            entries = json.load(f) or []
+        counts[name] = backend.import_entries(name, entries)
+    return counts
+
+
+def export_json(backend: SqliteGlossaryBackend, names: Optional[List[str]] = None,
+                directory: str = GLOSSARY_DIR) -> Dict[str, int]:
+    from .storage import atomic_write_json
+    from .precompress import refresh
+
+    counts = {}
+    for name in names or backend.names():
+        entries = backend.entries(name)
+        path = os.path.join(directory, f"{name}.json")
+        atomic_write_json(path, entries, indent=4)
+        refresh(path)
+        counts[name] = len(entries)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Import/export glossaries between JSON files and SQLite.")
+    ap.add_argument("command", choices=["import", "export"])
+    ap.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    ap.add_argument("--dir", dest="directory", default=GLOSSARY_DIR, help="glossary JSON directory")
+    ap.add_argument("--name", action="append", help="glossary base name (repeatable; default: all)")
+    args = ap.parse_args(argv)
+
+    backend = SqliteGlossaryBackend(args.db)
+    if args.command == "import":
+        counts = import_json(backend, args.name, args.directory)
+    else:
+        counts = export_json(backend, args.name, args.directory)
+    for name, n in counts.items():
+        print(f"{args.command}: {name} ({n} entries)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
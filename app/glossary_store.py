@@ -0,0 +1,277 @@
+# app/glossary_store.py
+from __future__ import annotations
+
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import count_json
+
+# --- Paths --------------------------------------------------------------
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+GLOSSARY_DIR = os.path.join(PROJECT_ROOT, "data", "glossaries")
+
+# ISO 2-letter country code → glossary file base name (data/glossaries/<name>.json)
+country_map = {
+    "ar": "glosario-regional-argentina",
+    "bo": "glosario-regional-bolivia",
+    "cl": "glosario-regional-chile",
+    "co": "glosario-regional-colombia",
+    "cr": "glosario-regional-costa_rica",
+    "cu": "glosario-regional-cuba",
+    "do": "glosario-regional-republica_dominicana",
+    "ec": "glosario-regional-ecuador",
+    "sv": "glosario-regional-el_salvador",
+    "gq": "glosario-regional-guinea_ecuatorial",
+    "gt": "glosario-regional-guatemala",
+    "hn": "glosario-regional-honduras",
+    "mx": "glosario-regional-mexico",
+    "ni": "glosario-regional-nicaragua",
+    "pa": "glosario-regional-panama",
+    "py": "glosario-regional-paraguay",
+    "pe": "glosario-regional-peru",
+    "pr": "glosario-regional-puerto_rico",
+    "es": "glosario-regional-espana",
+    "uy": "glosario-regional-uruguay",
+    "ve": "glosario-regional-venezuela"
+}
+
+
+# --- Normalization helpers (shared by every glossary reader) -------------
+
+def sort_key(s: str) -> str:
+    """
+    Accent/case-insensitive key used to alphabetize entries by 'word'.
+    Same rule the routes have always used (NFKD → ASCII → lower).
+    """
+    return unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii").lower()
+
+
+def fold(s: str) -> str:
+    """Accent-fold + lowercase (NFD → ASCII), as used by /search."""
+    return unicodedata.normalize("NFD", s or "").encode("ascii", "ignore").decode("ascii").lower()
+
+
+def slugify(text: str) -> str:
+    """URL slug as built by the public routes (accent-folded, dash-separated)."""
+    t = fold(text).replace("ñ", "n")
+    t = re.sub(r"[^a-z0-9]+", "-", t)
+    return re.sub(r"(^-|-$)+", "", t)
+
+
+def entry_slug(e: dict) -> str:
+    """An entry's stored slug, or one derived from its word."""
+    return e.get("slug") or slugify(e.get("word", ""))
+
+
+def entry_hash(e: dict) -> str:
+    """Stable content hash of one entry (key order independent)."""
+    raw = json.dumps(e, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def file_signature(st: os.stat_result) -> Tuple[int, int, int]:
+    """Cheap change detector for a data file: (mtime_ns, size, inode)."""
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# --- Snapshot -----------------------------------------------------------
+
+class GlossarySnapshot:
+    """
+    One parsed, pre-sorted version of a glossary file.
+
+    Treat `entries` as read-only: the same list is shared by every request
+    until the file changes on disk. Derived structures (search indexes etc.)
+    hang off the snapshot via `derive()` so they are dropped automatically
+    when the glossary is reloaded.
+    """
+
+    __slots__ = ("name", "path", "signature", "entries", "sort_keys", "_derived", "_previous", "_lock")
+
+    def __init__(self, name: str, path: str, signature: Tuple[int, int, int],
+                 entries: List[dict], sort_keys: Optional[List[str]] = None,
+                 previous: Optional["GlossarySnapshot"] = None):
+        self.name = name
+        self.path = path
+        self.signature = signature
+        self.entries = entries
+        self.sort_keys = sort_keys if sort_keys is not None else [sort_key(e.get("word", "")) for e in entries]
+        self._derived: Dict[str, Any] = {}
+        # structures derived from the snapshot we replaced (for incremental rebuilds)
+        self._previous: Dict[str, Any] = dict(previous._derived) if previous is not None else {}
+        self._lock = threading.Lock()
+
+    def derive(self, key: str, factory: Callable[["GlossarySnapshot", Any], Any]) -> Any:
+        """
+        Return a structure computed from this snapshot, building it once.
+
+        `factory(snapshot, previous)` is only called on the first request for
+        `key`; `previous` is the value the replaced snapshot had derived for
+        the same key (or None), so builders can reuse unchanged parts.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self, self._previous.pop(key, None))
+            return self._derived[key]
+
+
+def json_export(snapshot: GlossarySnapshot) -> Tuple[bytes, str]:
+    """(JSON body, content digest) of a snapshot, serialized once per snapshot."""
+    def build(snap: GlossarySnapshot, previous) -> Tuple[bytes, str]:
+        body = json.dumps(snap.entries, ensure_ascii=False, indent=4).encode("utf-8")
+        return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+    return snapshot.derive("json_export", build)
+
+
+def json_export_gzip(snapshot: GlossarySnapshot) -> bytes:
+    """Gzipped `json_export` body, compressed once per snapshot."""
+    import gzip
+    return snapshot.derive(
+        "json_export_gzip",
+        lambda snap, previous: gzip.compress(json_export(snap)[0], compresslevel=9, mtime=0),
+    )
+
+
+# --- Store --------------------------------------------------------------
+
+class GlossaryStore:
+    """
+    Process-wide cache of glossary files (data/glossaries/<name>.json).
+
+    Each file is parsed and sorted once; later reads only `os.stat()` the
+    file and compare (st_mtime_ns, st_size, st_ino) to decide whether the
+    cached snapshot is still valid.
+
+    With a backend installed (see `use_backend`, e.g. the SQLite one), the
+    same caching applies but entries and signatures come from the backend.
+    """
+
+    def __init__(self, root: str = GLOSSARY_DIR):
+        self.root = root
+        self.backend = None
+        self._snapshots: Dict[str, GlossarySnapshot] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.json")
+
+    def exists(self, name: str) -> bool:
+        if self.backend is not None:
+            return self.backend.exists(name)
+        return os.path.exists(self.path_for(name))
+
+    def use_backend(self, backend) -> None:
+        """
+        Read glossaries from `backend` instead of JSON files. It must provide
+        signature(name) (None if missing), entries(name) and exists(name).
+        """
+        with self._lock:
+            self.backend = backend
+            self._snapshots.clear()
+
+    def _signature(self, name: str):
+        if self.backend is not None:
+            return self.backend.signature(name)
+        try:
+            return file_signature(os.stat(self.path_for(name)))
+        except OSError:
+            return None
+
+    def get(self, name: str) -> Optional[GlossarySnapshot]:
+        """
+        Return the current snapshot for glossary `name` (file base name, e.g.
+        "glosario-regional-argentina"), or None if the file does not exist.
+        Raises ValueError if the file exists but is not a JSON list.
+        """
+        path = self.path_for(name)
+        sig = self._signature(name)
+        if sig is None:
+            self._snapshots.pop(name, None)
+            return None
+
+        snap = self._snapshots.get(name)
+        if snap is not None and snap.signature == sig:
+            self.hits += 1
+            return snap
+
+        with self._lock:
+            # another thread may have reloaded while we waited
+            snap = self._snapshots.get(name)
+            if snap is not None and snap.signature == sig:
+                self.hits += 1
+                return snap
+            if snap is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            snap = self._load(name, path, previous=snap)
+            self._snapshots[name] = snap
+            return snap
+
+    def entries(self, name: str) -> List[dict]:
+        """Sorted entries for `name` ([] if the glossary file is missing)."""
+        snap = self.get(name)
+        return snap.entries if snap is not None else []
+
+    def put(self, name: str, entries: List[dict], signature: Tuple[int, int, int],
+            sort_keys: Optional[List[str]] = None) -> GlossarySnapshot:
+        """
+        Install already-sorted `entries` as the snapshot for `name` without
+        reading the file (used by the admin repository after an edit). The
+        snapshot stays valid while the file still matches `signature`.
+        """
+        with self._lock:
+            snap = GlossarySnapshot(name, self.path_for(name), signature, entries,
+                                    sort_keys, previous=self._snapshots.get(name))
+            self._snapshots[name] = snap
+            return snap
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop the cached snapshot for `name` (or every snapshot)."""
+        with self._lock:
+            if name is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(name, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "cached": len(self._snapshots),
+        }
+
+    def _load(self, name: str, path: str, previous: Optional[GlossarySnapshot] = None) -> GlossarySnapshot:
+        if self.backend is not None:
+            # signature first: a write landing in between only causes a reload
+            sig = self.backend.signature(name)
+            entries = self.backend.entries(name)
+            return GlossarySnapshot(name, path, sig, entries, None, previous)
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            entries = json.loads(f.read().decode("utf-8"))
+        count_json("glossary", st.st_size)
+        if not isinstance(entries, list):
+            raise ValueError(f"{path}: expected a JSON list of entries")
+        keyed = sorted(((sort_key(e.get("word", "")), i) for i, e in enumerate(entries)))
+        entries = [entries[i] for _, i in keyed]
+        # signature taken from the handle we actually parsed
+        return GlossarySnapshot(name, path, file_signature(st), entries, [k for k, _ in keyed], previous)
+
+
+# Shared instance used by the public and admin blueprints
+store = GlossaryStore()
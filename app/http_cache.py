@@ -0,0 +1,153 @@
+# app/http_cache.py
+from __future__ import annotations
+
+import os
+import hashlib
+import mimetypes
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+from .glossary_store import file_signature
+
+# Cache policies
+#   "revalidate": browsers keep the body but ask every time (→ 304 if unchanged)
+#   "pinned":     immutable content (e.g. NNN.json, <id>_v<N>.json), long max-age
+REVALIDATE = "revalidate"
+PINNED = "pinned"
+
+# path → (stat signature, hex digest); a file is hashed again only when it changes
+_digests: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str, st: Optional[os.stat_result] = None) -> str:
+    """blake2b content digest of `path`, cached by its stat signature."""
+    sig = file_signature(st if st is not None else os.stat(path))
+    cached = _digests.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digests_lock:
+        _digests[path] = (sig, digest)
+    return digest
+
+
+def file_etag(path: str, st: Optional[os.stat_result] = None) -> Tuple[str, bool]:
+    """
+    (etag, weak) for a data file: a content digest (strong) by default, or
+    mtime+size (weak, no read at all) with HTTP_ETAG_MODE = "weak".
+    """
+    st = st if st is not None else os.stat(path)
+    if current_app.config.get("HTTP_ETAG_MODE", "strong") == "weak":
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}", True
+    return file_digest(path, st), False
+
+
+def apply_policy(rv, policy: str = REVALIDATE):
+    """Set Cache-Control on `rv` for `policy` (see HTTP_CACHE_* in config)."""
+    cfg = current_app.config
+    if policy == PINNED and not cfg.get("HTTP_CACHE_REVALIDATE_ALWAYS", False):
+        rv.cache_control.no_cache = None
+        rv.cache_control.public = True
+        rv.cache_control.max_age = cfg.get("HTTP_CACHE_PINNED_MAX_AGE", 31536000)
+        rv.cache_control.immutable = True
+    else:
+        rv.cache_control.no_cache = True
+        max_age = cfg.get("HTTP_CACHE_MAX_AGE", 0)
+        if max_age:
+            rv.cache_control.no_cache = None
+            rv.cache_control.max_age = max_age
+    return rv
+
+
+def _negotiate(path: str, st: os.stat_result) -> Tuple[Optional[str], Optional[str], bool]:
+    """
+    (sibling path, Content-Encoding, has variants) for the best fresh
+    precompressed sibling of `path` the client accepts.
+    """
+    from .precompress import available_encodings, fresh_sibling
+
+    has_variants = False
+    for enc in available_encodings():
+        alt = fresh_sibling(path, enc, st)
+        if alt is None:
+            continue
+        has_variants = True
+        if request.accept_encodings[enc] > 0:
+            return alt, enc, True
+    return None, None, has_variants
+
+
+def send_data_file(directory: str, filename: str, policy: str = REVALIDATE):
+    """
+    send_from_directory with our ETag and cache policy. If-None-Match and
+    If-Modified-Since are answered with 304 (and Range requests honored)
+    by Flask's conditional sending. A fresh .br/.gz sibling written by
+    app/precompress.py is sent instead when Accept-Encoding allows it.
+    """
+    path = safe_join(directory, filename)
+    try:
+        st = os.stat(path) if path is not None else None
+    except OSError:
+        st = None
+    if st is None:
+        abort(404)
+    etag, weak = file_etag(path, st)
+    alt, encoding, has_variants = _negotiate(path, st)
+    if alt is None:
+        rv = send_from_directory(directory, filename, conditional=False, etag=False)
+        length = st.st_size
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        rv = send_from_directory(directory, filename + alt[len(path):], mimetype=mimetype,
+                                 conditional=False, etag=False)
+        rv.content_encoding = encoding
+        etag = f"{etag}-{encoding}"   # one ETag per representation
+        length = os.path.getsize(alt)
+    if has_variants:
+        rv.vary.add("Accept-Encoding")
+    rv.set_etag(etag, weak=weak)
+    rv.last_modified = st.st_mtime
+    rv = rv.make_conditional(request, accept_ranges=True, complete_length=length)
+    return apply_policy(rv, policy)
+
+
+def send_static(filename: str):
+    """Replacement for Flask's static view: same files, plus precompressed variants."""
+    return send_data_file(current_app.static_folder, filename)
+
+
+def conditional(rv, policy: str = REVALIDATE):
+    """Add a body-digest ETag to an in-memory response and answer 304 if it matches."""
+    if not rv.get_etag()[0]:
+        rv.add_etag()
+    rv = rv.make_conditional(request)
+    return apply_policy(rv, policy)
+
+
+def conditional_body(body, mimetype: str = "application/json", etag: Optional[str] = None,
+                     policy: str = REVALIDATE, gzipped: Optional[bytes] = None):
+    """
+    Response for an in-memory body (str/bytes) with an ETag (digest of the
+    body unless given) and 304 handling. `gzipped` is a precompressed copy
+    of the body, sent to clients that accept gzip.
+    """
+    if gzipped is not None and request.accept_encodings["gzip"] > 0:
+        rv = current_app.response_class(gzipped, mimetype=mimetype)
+        rv.content_encoding = "gzip"
+        if etag is not None:
+            etag = f"{etag}-gzip"
+    else:
+        rv = current_app.response_class(body, mimetype=mimetype)
+    if gzipped is not None:
+        rv.vary.add("Accept-Encoding")
+    if etag is not None:
+        rv.set_etag(etag)
+    return conditional(rv, policy)
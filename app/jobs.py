@@ -0,0 +1,482 @@
+# app/jobs.py
+"""
+Background jobs for slow admin work (exercise reindex, media purges,
+source normalization, legacy glossary migrations), so requests only
+queue them and return a job id.
+
+Jobs are rows of a SQLite table (JOBS_DB_PATH, data/jobs.sqlite3), so they
+outlive the process that queued them. Every process running a `JobRunner`
+claims queued jobs (one transaction per claim, so each job runs once); a
+job left "running" by a worker that died or was recycled (no heartbeat for
+JOBS_STALE_SECONDS) is queued again, up to MAX_ATTEMPTS runs.
+
+Handlers are registered by kind and receive the job plus its arguments:
+
+    @handler("exercise_reindex")
+    def _exercise_reindex(job):
+        ...
+        job.progress(10, 100, "scanning")
+        return {"exercises": 42}       # stored as the job's result (JSON)
+
+CLI:
+  python -m app.jobs worker            # run jobs in this process until Ctrl-C
+  python -m app.jobs enqueue exercise_reindex [--args '{"...": ...}']
+  python -m app.jobs list [--status failed]
+  python -m app.jobs show <job id>
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .glossary_store import PROJECT_ROOT
+
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "jobs.sqlite3")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Runs of one job before it is marked failed (a crash mid-run counts as one)
+MAX_ATTEMPTS = 3
+# Seconds without a heartbeat after which a running job is considered orphaned
+DEFAULT_STALE_SECONDS = 60
+# Seconds an idle runner sleeps between looks at the table
+POLL_SECONDS = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id        TEXT PRIMARY KEY,
+    kind      TEXT NOT NULL,
+    args      TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    progress  TEXT,
+    result    TEXT,
+    error     TEXT,
+    owner     TEXT,
+    created   REAL NOT NULL,
+    started   REAL,
+    heartbeat REAL,
+    finished  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs(status, created);
+"""
+
+# --- Handlers -----------------------------------------------------------
+
+HANDLERS: Dict[str, Callable[..., Any]] = {}
+
+
+def handler(kind: str):
+    """Register `fn(job, **args)` as the handler for jobs of `kind`."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(ts).isoformat(timespec="seconds") + "Z" if ts else None
+
+
+def _loads(text: Optional[str]):
+    return json.loads(text) if text else None
+
+
+# --- Queue (the table) --------------------------------------------------
+
+class JobQueue:
+    """The persistent job table; safe to share between threads and processes."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, stale_seconds: float = DEFAULT_STALE_SECONDS):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self._local = threading.local()
+        self._schema_ready = False
+        # set when this process queues a job, so local runners wake up at once
+        self.wakeup = threading.Event()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "args": _loads(row["args"]) or {},
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "progress": _loads(row["progress"]),
+            "result": _loads(row["result"]),
+            "error": row["error"],
+            "created": _iso(row["created"]),
+            "started": _iso(row["started"]),
+            "finished": _iso(row["finished"]),
+        }
+
+    # --- producers -------------------------------------------------------
+
+    def enqueue(self, kind: str, args: Optional[Dict[str, Any]] = None, *, dedupe: bool = False) -> str:
+        """
+        Queue a job and return its id. With `dedupe`, an identical job
+        (same kind and args) that is still queued is reused instead.
+        """
+        if kind not in HANDLERS:
+            raise ValueError(f"unknown job kind: {kind}")
+        args_json = json.dumps(args or {}, sort_keys=True, ensure_ascii=False)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dedupe:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND args = ? AND status = ? ORDER BY created LIMIT 1",
+                    (kind, args_json, QUEUED),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("COMMIT")
+                    return row["id"]
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, args, status, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, args_json, QUEUED, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        if status:
+            rows = self._conn().execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._conn().execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        return [self._row(r) for r in rows]
+
+    # --- consumers -------------------------------------------------------
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Mark the oldest runnable queued job as running by `owner` and return it."""
+        kinds = list(HANDLERS)
+        if not kinds:
+            return None
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._requeue_stale(conn, now)
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND kind IN ({','.join('?' * len(kinds))}) "
+                "ORDER BY created LIMIT 1",
+                (QUEUED, *kinds),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1, started = ?, heartbeat = ?, "
+                "error = NULL WHERE id = ?",
+                (RUNNING, owner, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def _requeue_stale(self, conn: sqlite3.Connection, now: float) -> None:
+        cutoff = now - self.stale_seconds
+        conn.execute(
+            "UPDATE jobs SET status = ?, finished = ?, error = 'worker stopped responding (gave up after retries)' "
+            "WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+            (FAILED, now, RUNNING, cutoff, MAX_ATTEMPTS),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = ?, owner = NULL, error = 'worker stopped responding; retrying' "
+            "WHERE status = ? AND heartbeat < ?",
+            (QUEUED, RUNNING, cutoff),
+        )
+
+    def heartbeat(self, job_ids: List[str], owner: str) -> None:
+        if job_ids:
+            self._conn().execute(
+                f"UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ? AND id IN ({','.join('?' * len(job_ids))})",
+                (time.time(), owner, RUNNING, *job_ids),
+            )
+
+    def progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET progress = ?, heartbeat = ? WHERE id = ?",
+            (json.dumps(progress, ensure_ascii=False), time.time(), job_id),
+        )
+
+    def finish(self, job_id: str, owner: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ? AND owner = ?",
+            (FAILED if error else DONE, json.dumps(result, ensure_ascii=False, default=str),
+             error, time.time(), job_id, owner),
+        )
+
+
+class Job:
+    """What a handler receives: the job's id, kind and args, plus progress reporting."""
+
+    def __init__(self, queue: JobQueue, row: Dict[str, Any]):
+        self.queue = queue
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.args = row["args"]
+        self.attempt = row["attempts"]
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        self.queue.progress(self.id, {"done": done, "total": total, "message": message})
+
+
+# --- Runner (worker threads) --------------------------------------------
+
+class JobRunner:
+    """
+    `workers` threads claiming and running jobs from `queue`, plus one
+    thread keeping the heartbeat of the jobs they are running.
+    """
+
+    def __init__(self, queue: JobQueue, workers: int = 1):
+        self.queue = queue
+        self.workers = max(1, int(workers))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "JobRunner":
+        if self._threads:
+            return self
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self.queue.wakeup.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def run_one(self) -> bool:
+        """Claim and run one job in this thread. Returns False if none was queued."""
+        row = self.queue.claim(self.owner)
+        if row is None:
+            return False
+        job = Job(self.queue, row)
+        with self._lock:
+            self._running[job.id] = time.time()
+        try:
+            result = HANDLERS[job.kind](job, **job.args)
+        except Exception as e:
+            self.queue.finish(job.id, self.owner, error=f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}")
+        else:
+            self.queue.finish(job.id, self.owner, result=result)
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+        return True
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_one():
+                    continue
+            except sqlite3.Error:
+                pass  # e.g. database locked for longer than the timeout: try again
+            self.queue.wakeup.wait(POLL_SECONDS)
+            self.queue.wakeup.clear()
+
+    def _beat(self) -> None:
+        interval = max(1.0, self.queue.stale_seconds / 4)
+        while not self._stop.wait(interval):
+            with self._lock:
+                ids = list(self._running)
+            try:
+                self.queue.heartbeat(ids, self.owner)
+            except sqlite3.Error:
+                pass
+
+
+# --- Shared instance ----------------------------------------------------
+
+queue = JobQueue()
+runner: Optional[JobRunner] = None
+
+
+def db_path(path: Optional[str] = None) -> str:
+    """JOBS_DB_PATH as an absolute path; relative ones are taken from the project root."""
+    path = path or DEFAULT_DB_PATH
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def init_app(app) -> None:
+    """Point the queue at JOBS_DB_PATH and start JOBS_WORKERS runner threads (0 = none)."""
+    global runner
+    queue.path = db_path(app.config.get("JOBS_DB_PATH"))
+    queue.stale_seconds = app.config.get("JOBS_STALE_SECONDS", DEFAULT_STALE_SECONDS)
+    workers = app.config.get("JOBS_WORKERS", 1)
+    if workers and runner is None:
+        runner = JobRunner(queue, workers).start()
+
+
+def enqueue(kind: str, args: Optional[Dict[str, Any]] = None, *, dedupe: bool = False) -> str:
+    return queue.enqueue(kind, args, dedupe=dedupe)
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    return queue.get(job_id)
+
+
+# --- Built-in handlers --------------------------------------------------
+
+@handler("exercise_reindex")
+def _exercise_reindex(job: Job, root: Optional[str] = None):
+    """Rebuild data/exercises/exercises.index.json (or the one under `root`) from the files."""
+    from .exercise_index import ExerciseIndexStore, exercise_index
+    store = exercise_index if root is None else ExerciseIndexStore(root)
+    return {"exercises": len(store.reindex())}
+
+
+@handler("purge_media")
+def _purge_media(job: Job, exercise_id: str):
+    """Remove static/exercises/media/<exercise_id>/ (after the exercise was deleted)."""
+    import shutil
+
+    static_root = os.path.join(PROJECT_ROOT, "static")
+    media_dir = os.path.abspath(os.path.join(static_root, "exercises", "media", exercise_id))
+    if os.path.commonpath([media_dir, static_root]) != static_root or media_dir == static_root:
+        raise ValueError(f"refusing to delete {media_dir}")
+    if not os.path.isdir(media_dir):
+        return {"deleted": False}
+    files = sum(len(fs) for _, _, fs in os.walk(media_dir))
+    shutil.rmtree(media_dir)
+    return {"deleted": True, "files": files}
+
+
+@handler("normalize_sources")
+def _normalize_sources(job: Job, codes: Optional[List[str]] = None, workers: Optional[int] = None,
+                       dry_run: bool = False):
+    """Normalize example sources in the given glossaries (default: all); see app/source_normalize.py."""
+    from .source_normalize import normalize_glossaries
+    return normalize_glossaries(codes, workers=workers, dry_run=dry_run, progress=job.progress)
+
+
+@handler("migrate_glossary")
+def _migrate_glossary(job: Job, code: str = "ar", input: str = "old_glosario.json", sort: bool = False,
+                      workers: int = 1):
+    """
+    Merge an old-format glossary dump (`input`, relative to the project root)
+    into glossary `code`, written next to it as <name>.MIGRATED.json for
+    review; see migrate_glosario_argentina.py (streaming mode).
+    """
+    import argparse
+    from pathlib import Path
+    from .glossary_store import GLOSSARY_DIR, country_map
+
+    if code not in country_map:
+        raise ValueError(f"unknown country code: {code}")
+    src = os.path.abspath(os.path.join(PROJECT_ROOT, input))
+    if os.path.commonpath([src, PROJECT_ROOT]) != PROJECT_ROOT or not os.path.isfile(src):
+        raise ValueError(f"no such input file in the project: {input}")
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from migrate_glosario_argentina import migrate_streaming
+
+    name = country_map[code]
+    args = argparse.Namespace(
+        input=Path(src),
+        existing=Path(GLOSSARY_DIR, f"{name}.json"),
+        output=Path(GLOSSARY_DIR, f"{name}.MIGRATED.json"),
+        sort=bool(sort),
+        workers=max(1, int(workers)),
+    )
+    job.progress(0, None, f"migrating {input} into {name}")
+    return migrate_streaming(args)
+
+
+# --- CLI ----------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Background job queue (data/jobs.sqlite3).")
+    ap.add_argument("--db", default=os.environ.get("JOBS_DB_PATH", DEFAULT_DB_PATH))
+    sub = ap.add_subparsers(dest="command", required=True)
+    w = sub.add_parser("worker", help="run queued jobs until interrupted")
+    w.add_argument("--workers", type=int, default=1)
+    e = sub.add_parser("enqueue", help="queue a job")
+    e.add_argument("kind", choices=sorted(HANDLERS))
+    e.add_argument("--args", default="{}", help="JSON object of handler arguments")
+    ls = sub.add_parser("list", help="recent jobs")
+    ls.add_argument("--status", choices=[QUEUED, RUNNING, DONE, FAILED])
+    ls.add_argument("--limit", type=int, default=20)
+    sh = sub.add_parser("show", help="one job as JSON")
+    sh.add_argument("job_id")
+    args = ap.parse_args(argv)
+
+    q = JobQueue(db_path(args.db))
+    if args.command == "worker":
+        r = JobRunner(q, args.workers)
+        print(f"worker {r.owner}: {', '.join(sorted(HANDLERS))}")
+        r.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            r.stop(timeout=5)
+    elif args.command == "enqueue":
+        print(q.enqueue(args.kind, json.loads(args.args)))
+    elif args.command == "list":
+        for j in q.list(args.status, args.limit):
+            p = j["progress"] or {}
+            done = f" {p.get('done')}/{p.get('total')}" if p else ""
+            print(f"{j['id']}  {j['status']:<7} {j['kind']:<20} {j['created']}{done}")
+    else:
+        job = q.get(args.job_id)
+        if job is None:
+            print("no such job", file=sys.stderr)
+            return 1
+        print(json.dumps(job, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# app/json_stream.py
+"""
+Read and write big top-level JSON arrays one element at a time, so memory
+is bounded by the largest element instead of the whole document.
+
+    for entry in iter_array("old_glosario.json"):
+        ...
+
+    with ArrayWriter("data/glossaries/out.json", indent=2) as out:
+        for entry in entries:
+            out.write(entry)
+
+ArrayWriter writes exactly what json.dump(list, ensure_ascii=False,
+indent=indent) would, to a temp file that replaces the target on close.
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import tempfile
+from typing import Any, Iterator, Optional
+
+from .storage import _fsync_dir
+
+CHUNK_SIZE = 1 << 20
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+def iter_array(path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of the JSON array in `path`. Raises ValueError if the
+    document is not an array or is malformed (like json.load would).
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            more = f.read(chunk_size)
+            buf, pos = buf[pos:] + more, 0
+            eof = not more
+            return bool(more)
+
+        def skip_ws() -> str:
+            """Next non-blank character ("" at end of file), not consumed."""
+            nonlocal pos
+            while True:
+                pos = _WS.match(buf, pos).end()
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ""
+
+        fill()
+        if skip_ws() != "[":
+            raise ValueError(f"{path}: not a JSON array")
+        pos += 1
+        if skip_ws() == "]":
+            return
+        while True:
+            skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if fill():
+                        continue
+                    raise
+                # a number cut by the buffer edge ("2." of "2.5") decodes too:
+                # only accept a value once the delimiter after it is in view
+                nxt = _WS.match(buf, end).end()
+                if not eof and (nxt == len(buf) or buf[nxt] not in ",]") and fill():
+                    continue
+                break
+            pos = end
+            yield value
+            c = skip_ws()
+            if c == ",":
+                pos += 1
+            elif c == "]":
+                return
+            else:
+                raise ValueError(f"{path}: expected ',' or ']' at element boundary")
+
+
+class ArrayWriter:
+    """Incremental, atomic writer of a JSON array (see module docstring)."""
+
+    def __init__(self, path, indent: Optional[int] = 2, fsync: bool = True):
+        self.path = os.fspath(path)
+        self.indent = indent
+        self.fsync = fsync
+        self.count = 0
+        dirpath = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(dirpath, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=dirpath, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp")
+        self._f = os.fdopen(fd, "w", encoding="utf-8", newline="")
+
+    def write(self, obj: Any) -> None:
+        self.write_raw(json.dumps(obj, ensure_ascii=False, indent=self.indent))
+
+    def write_raw(self, text: str) -> None:
+        """Write one element already serialized with json.dumps(indent=self.indent)."""
+        if self.indent is None:
+            self._f.write(("[" if self.count == 0 else ", ") + text)
+        else:
+            pad = " " * self.indent
+            self._f.write(("[\n" if self.count == 0 else ",\n") + pad + text.replace("\n", "\n" + pad))
+        self.count += 1
+
+    def close(self) -> None:
+        """Finish the array and move it into place."""
+        if self._f.closed:
+            return
+        self._f.write("[]" if self.count == 0 else ("]" if self.indent is None else "\n]"))
+        self._f.flush()
+        if self.fsync:
+            os.fsync(self._f.fileno())
+        self._f.close()
+        try:
+            mode = os.stat(self.path).st_mode & 0o777
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(self._tmp, mode)
+        os.replace(self._tmp, self.path)
+        if self.fsync:
+            _fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+
+    def abort(self) -> None:
+        """Drop the partial output; the target is left untouched."""
+        if not self._f.closed:
+            self._f.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "ArrayWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
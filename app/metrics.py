@@ -0,0 +1,282 @@
+# app/metrics.py
+"""
+Request timing, response sizes, JSON load counts and cache hit rates,
+exposed at /metrics in the Prometheus text format (no client library).
+
+  pp_http_requests_total{endpoint,method,status}
+  pp_http_request_duration_seconds{endpoint}     histogram
+  pp_http_response_size_bytes{endpoint}          histogram (Content-Length)
+  pp_json_loads_total{source}, pp_json_parsed_bytes_total{source}
+  pp_cache_hits_total{cache}, pp_cache_misses_total{cache}, ...
+  pp_glossary_merges_total{glossary}, pp_glossary_conflicts_total{glossary,kind}
+
+`endpoint` is the Flask endpoint ("public.global_search", "public.glosario",
+"<unmatched>" for 404s), never the raw path, so label sets stay bounded.
+Durations are measured around the WSGI app call; a streamed body is not
+included.
+
+Cache numbers come from each cache's own stats() (GlossaryStore,
+FragmentCache, ...) and are read only when /metrics is scraped, so the
+request path pays nothing for them. Counting a request is three locked
+updates (a few microseconds).
+
+Numbers are per process: under a multi-worker server scrape each worker,
+or sum them on the Prometheus side. p99 of /search over 5 minutes:
+
+  histogram_quantile(0.99, sum by (le) (
+      rate(pp_http_request_duration_seconds_bucket{endpoint="public.global_search"}[5m])))
+"""
+from __future__ import annotations
+
+import os
+import time
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; fine enough around the 10–250 ms where page latency lives
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        out += [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+        return out
+
+
+class Histogram:
+    """Fixed buckets; per label set one count per bucket plus sum and count."""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, s in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), s[:-1]):
+                running += n
+                le = 'le="%s"' % _num(bound)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(s[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return out
+
+
+# --- Registry -----------------------------------------------------------
+
+# cache name -> zero-argument callable returning that cache's stats() dict
+_caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+# stats() key -> (metric name, type, help)
+_CACHE_FIELDS = {
+    "hits": ("pp_cache_hits_total", "counter", "Lookups answered from the cache"),
+    "misses": ("pp_cache_misses_total", "counter", "Lookups that had to load or build"),
+    "reloads": ("pp_cache_reloads_total", "counter", "Reloads after the source changed"),
+    "evictions": ("pp_cache_evictions_total", "counter", "Items dropped to stay within budget"),
+    "items": ("pp_cache_items", "gauge", "Items held"),
+    "bytes": ("pp_cache_bytes", "gauge", "Bytes held"),
+    "max_bytes": ("pp_cache_max_bytes", "gauge", "Byte budget"),
+}
+
+requests_total = Counter("pp_http_requests_total", "HTTP requests", ("endpoint", "method", "status"))
+request_duration = Histogram("pp_http_request_duration_seconds", "Time to produce the response",
+                             ("endpoint",), LATENCY_BUCKETS)
+response_size = Histogram("pp_http_response_size_bytes", "Response body size (Content-Length)",
+                          ("endpoint",), SIZE_BUCKETS)
+json_loads = Counter("pp_json_loads_total", "JSON documents parsed from disk", ("source",))
+json_bytes = Counter("pp_json_parsed_bytes_total", "Bytes of JSON parsed from disk", ("source",))
+# app/glossary_repo.py: admin writes merged onto a file another process had
+# rewritten, and merged edits that overrode or resurrected that process's change
+glossary_merges = Counter("pp_glossary_merges_total",
+                          "Glossary writes merged onto a file changed by another process", ("glossary",))
+glossary_conflicts = Counter("pp_glossary_conflicts_total",
+                             "Merged glossary edits that overrode another process's change", ("glossary", "kind"))
+
+_metrics = (requests_total, request_duration, response_size, json_loads, json_bytes,
+            glossary_merges, glossary_conflicts)
+_started = time.time()
+
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """Export `stats()` (hits, misses, items, ...) as pp_cache_*{cache=name}."""
+    _caches[name] = stats
+
+
+def count_json(source: str, nbytes: int) -> None:
+    json_loads.inc(source)
+    json_bytes.inc(source, amount=nbytes)
+
+
+def json_load(f, source: str):
+    """json.load(f), counted under `source`."""
+    import json
+
+    text = f.read()
+    try:
+        nbytes = os.fstat(f.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        nbytes = len(text)
+    count_json(source, nbytes)
+    return json.loads(text)
+
+
+def _cache_lines() -> List[str]:
+    families: Dict[str, List[str]] = {}
+    for cache, stats in sorted(_caches.items()):
+        try:
+            values = stats() or {}
+        except Exception:
+            continue
+        for key, (name, _type, _help) in _CACHE_FIELDS.items():
+            if key in values:
+                families.setdefault(name, []).append(f'{name}{{cache="{_escape(cache)}"}} {_num(values[key])}')
+    out = []
+    for name, type_, help_ in _CACHE_FIELDS.values():
+        if name in families:
+            out += [f"# HELP {name} {help_}", f"# TYPE {name} {type_}"] + families[name]
+    return out
+
+
+def render() -> str:
+    lines = [
+        "# HELP pp_process_start_time_seconds Start time of this process (unix seconds)",
+        "# TYPE pp_process_start_time_seconds gauge",
+        f"pp_process_start_time_seconds {_num(round(_started, 3))}",
+    ]
+    for m in _metrics:
+        lines += m.expose()
+    lines += _cache_lines()
+    return "\n".join(lines) + "\n"
+
+
+# --- Request timing -----------------------------------------------------
+
+ENDPOINT_KEY = "pp.endpoint"
+
+
+class MetricsMiddleware:
+    """
+    WSGI wrapper timing every request. The endpoint label is left in the
+    environ by a before_request hook (see init_app); the body iterable is
+    passed through untouched so file responses keep their sendfile path.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        t0 = time.perf_counter()
+        seen: Dict[str, Any] = {}
+
+        def _start_response(status, headers, exc_info=None):
+            seen["status"] = status
+            seen["headers"] = headers
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, _start_response)
+        finally:
+            self._record(environ, seen, time.perf_counter() - t0)
+
+    @staticmethod
+    def _record(environ, seen: Dict[str, Any], elapsed: float) -> None:
+        endpoint = environ.get(ENDPOINT_KEY) or "<unmatched>"
+        status = (seen.get("status") or "500").split(" ", 1)[0]
+        requests_total.inc(endpoint, environ.get("REQUEST_METHOD", ""), status)
+        request_duration.observe(elapsed, endpoint)
+        for k, v in seen.get("headers") or ():
+            if k.lower() == "content-length":
+                try:
+                    response_size.observe(int(v), endpoint)
+                except ValueError:
+                    pass
+                break
+
+
+def _register_builtin_caches() -> None:
+    from .glossary_store import store
+    from . import fragment_cache, routes_public, storage
+    from .exercise_index import exercise_files, exercise_index
+
+    register_cache("glossary", lambda: {**store.stats(), "items": store.stats()["cached"]})
+    register_cache("fragments", fragment_cache.cache.stats)
+    register_cache("exercise_versions", storage._rebuilt.stats)
+
+    def exercise_index_stats():
+        # the index reloads from disk when stale: a reload is its miss
+        st = exercise_index.stats()
+        return {"hits": st["hits"], "misses": st["reloads"], "items": st["exercises"]}
+
+    register_cache("exercise_index", exercise_index_stats)
+    register_cache("exercise_files", exercise_files.stats)
+    register_cache("home_tiles", routes_public.tiles_cache_stats)
+
+
+def init_app(app) -> None:
+    """Time requests and serve /metrics (unless METRICS_ENABLED is off)."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    from flask import Response, request
+
+    @app.before_request
+    def _pp_metrics_endpoint():
+        request.environ[ENDPOINT_KEY] = request.endpoint
+
+    def metrics():
+        return Response(render(), content_type=CONTENT_TYPE, headers={"Cache-Control": "no-store"})
+
+    app.add_url_rule("/metrics", endpoint="metrics", view_func=metrics)
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+    _register_builtin_caches()
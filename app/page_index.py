@@ -0,0 +1,76 @@
+# app/page_index.py
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from .glossary_store import GlossarySnapshot, entry_slug
+
+# Bucket for entries whose sort key does not start with a-z (digits, "¡", ...)
+OTHER = "#"
+
+
+def letter_of(key: str) -> str:
+    """Letter bucket for a sort key ("ñ" folds to "N", like the sort order)."""
+    c = key[:1]
+    return c.upper() if "a" <= c <= "z" else OTHER
+
+
+class PageIndex:
+    """
+    Letter buckets over one glossary snapshot, for paged rendering.
+
+    Each bucket is the sorted list of entry positions starting with that
+    letter, so a page is a slice and never needs the whole list rendered.
+    The empty letter ("") means the whole glossary.
+    """
+
+    def __init__(self, snapshot: GlossarySnapshot, previous: Optional["PageIndex"] = None):
+        self.entries = snapshot.entries
+        self.buckets: Dict[str, List[int]] = {}
+        self.positions: Dict[str, int] = {}
+        for pos, (e, key) in enumerate(zip(snapshot.entries, snapshot.sort_keys)):
+            self.buckets.setdefault(letter_of(key), []).append(pos)
+            self.positions.setdefault(entry_slug(e), pos)
+        self.keys = snapshot.sort_keys
+        # "#" first, then A-Z
+        self.letters: List[Tuple[str, int]] = sorted(
+            ((k, len(v)) for k, v in self.buckets.items()), key=lambda kv: (kv[0] != OTHER, kv[0])
+        )
+
+    def count(self, letter: str = "") -> int:
+        return len(self.buckets.get(letter, ())) if letter else len(self.entries)
+
+    def pages(self, letter: str, size: int) -> int:
+        return max(1, -(-self.count(letter) // size))
+
+    def page(self, letter: str, page: int, size: int) -> Tuple[List[dict], int, int]:
+        """
+        Entries on `page` (1-based) of bucket `letter` ("" = all).
+        Returns (entries, total in bucket, number of pages).
+        """
+        total = self.count(letter)
+        pages = self.pages(letter, size)
+        start = (page - 1) * size
+        if start < 0 or start >= total:
+            return [], total, pages
+        if not letter:
+            return self.entries[start:start + size], total, pages
+        return [self.entries[p] for p in self.buckets[letter][start:start + size]], total, pages
+
+    def locate(self, slug: str, size: int) -> Optional[Tuple[str, int]]:
+        """(letter, page) that shows the entry with `slug`, or None."""
+        pos = self.positions.get(slug)
+        if pos is None:
+            return None
+        letter = letter_of(self.keys[pos])
+        return letter, bisect_left(self.buckets[letter], pos) // size + 1
+
+    def by_slugs(self, slugs: List[str]) -> List[dict]:
+        """Entries for the given slugs (unknown ones skipped), in the order asked."""
+        return [self.entries[self.positions[s]] for s in slugs if s in self.positions]
+
+
+def get_page_index(snapshot: GlossarySnapshot) -> PageIndex:
+    """Page index for `snapshot`, built on first use and reused after."""
+    return snapshot.derive("page_index", PageIndex)
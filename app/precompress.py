@@ -0,0 +1,158 @@
+# app/precompress.py
+# ------------------------------------------------------------
+# Writes .gz (and .br, when the `brotli` package is installed) siblings
+# next to data JSON and static assets, so responses can be sent
+# compressed without compressing per request (see http_cache.send_data_file).
+#
+# A sibling is only used while its mtime equals the source file's mtime;
+# anything rewritten without refreshing its siblings is simply served
+# uncompressed until the next run.
+#
+#   python -m app.precompress                  # data/ + static/
+#   python -m app.precompress data/glossaries  # just these
+#   python -m app.precompress --clean          # remove every sibling
+# ------------------------------------------------------------
+from __future__ import annotations
+
+import os
+import sys
+import gzip
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .storage import atomic_write_bytes
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_ROOTS = ("data", "static")
+
+# Extensions worth compressing (images, audio and fonts already are)
+EXTENSIONS = (".json", ".js", ".mjs", ".css", ".html", ".svg", ".map", ".txt")
+# Below this size the headers cost more than the savings
+MIN_SIZE = 1024
+
+# Content-Encoding → sibling suffix, in order of preference
+ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+
+def available_encodings() -> List[str]:
+    return [enc for enc, _ in ENCODINGS if enc != "br" or brotli is not None]
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0: same input → same bytes (stable ETags, no spurious rewrites)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def sibling(path: str, encoding: str) -> str:
+    return path + dict(ENCODINGS)[encoding]
+
+
+def fresh_sibling(path: str, encoding: str, st: Optional[os.stat_result] = None) -> Optional[str]:
+    """Path of the `encoding` sibling of `path` if it matches the current file."""
+    alt = sibling(path, encoding)
+    try:
+        alt_st = os.stat(alt)
+        src_st = st if st is not None else os.stat(path)
+    except OSError:
+        return None
+    return alt if alt_st.st_mtime_ns == src_st.st_mtime_ns else None
+
+
+def wants(path: str, size: int, min_size: int = MIN_SIZE) -> bool:
+    return size >= min_size and path.lower().endswith(EXTENSIONS)
+
+
+def refresh(path: str, min_size: int = MIN_SIZE) -> Dict[str, int]:
+    """
+    (Re)write the compressed siblings of `path`; stale ones are removed when
+    the file is too small or no longer compresses. Returns {encoding: size}.
+    """
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+    except FileNotFoundError:
+        remove(path)
+        return {}
+    written: Dict[str, int] = {}
+    for enc in available_encodings():
+        alt = sibling(path, enc)
+        if not wants(path, len(data), min_size):
+            _unlink(alt)
+            continue
+        if fresh_sibling(path, enc, st):
+            written[enc] = os.path.getsize(alt)
+            continue
+        packed = _compress(data, enc)
+        if len(packed) >= len(data):
+            _unlink(alt)
+            continue
+        atomic_write_bytes(alt, packed, fsync_dir=False)
+        # same mtime as the source = "made from this version"
+        os.utime(alt, ns=(st.st_atime_ns, st.st_mtime_ns))
+        written[enc] = len(packed)
+    return written
+
+
+def remove(path: str) -> None:
+    for enc, _ in ENCODINGS:
+        _unlink(sibling(path, enc))
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def iter_files(roots: Iterable[str]) -> Iterable[str]:
+    suffixes = tuple(s for _, s in ENCODINGS)
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for fn in filenames:
+                if not fn.endswith(suffixes):
+                    yield os.path.join(dirpath, fn)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Write .gz/.br siblings for data JSON and static assets.")
+    ap.add_argument("paths", nargs="*", help="files or folders (default: data/ and static/)")
+    ap.add_argument("--min-size", type=int, default=MIN_SIZE, help="skip files smaller than this (bytes)")
+    ap.add_argument("--clean", action="store_true", help="remove compressed siblings instead")
+    args = ap.parse_args(argv)
+
+    roots = args.paths or [os.path.join(PROJECT_ROOT, r) for r in DEFAULT_ROOTS]
+    files = raw = packed = 0
+    for path in iter_files(roots):
+        if args.clean:
+            remove(path)
+            continue
+        sizes = refresh(path, args.min_size)
+        if sizes:
+            files += 1
+            raw += os.path.getsize(path)
+            packed += min(sizes.values())
+    if args.clean:
+        print("Removed compressed siblings.")
+    else:
+        print(f"{files} files compressed ({', '.join(available_encodings())}): "
+              f"{raw / 1024:.0f} KB → {packed / 1024:.0f} KB")
+        if brotli is None:
+            print("(install `brotli` to also write .br files)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# app/profiler.py
+"""
+Opt-in sampling profiler for single requests, for "why is this page slow
+in production" without a redeploy.
+
+Only installed when PROFILER_TOKEN is set; then a request carrying the
+token, as `?__profile=<token>` or an `X-Profile-Token: <token>` header, is
+profiled. Every other request costs one dict lookup; with no token
+configured nothing is hooked at all.
+
+While the request runs, a background thread samples the request thread's
+stack every PROFILER_INTERVAL seconds. The stacks cover everything the
+view does, Jinja rendering included (compiled templates show up as
+frames like "templates/glosario.html:root"). They are written in the
+collapsed format flamegraph.pl and speedscope read:
+
+    app/routes_public.py:glosario;flask/templating.py:render_template;... 37
+
+Profiles go to data/profiles/<id>.collapsed with a <id>.json summary
+next to it (path, endpoint, status, duration, samples). Only the newest
+PROFILER_KEEP are kept. Browse them at /admin/profiles; the response
+carries the id in an X-Profile-Id header.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .glossary_store import PROJECT_ROOT
+from .storage import atomic_write_bytes, atomic_write_json
+
+PROFILES_DIR = os.path.join(PROJECT_ROOT, "data", "profiles")
+DEFAULT_INTERVAL = 0.002
+DEFAULT_KEEP = 50
+HEADER = "X-Profile-Token"
+QUERY_ARG = "__profile"
+
+_STDLIB = os.path.dirname(os.__file__)
+_labels: Dict[str, str] = {}
+
+
+def _short(filename: str) -> str:
+    """Readable, stable frame file: project-relative, package-relative or stdlib name."""
+    label = _labels.get(filename)
+    if label is None:
+        path = os.path.abspath(filename) if not filename.startswith("<") else filename
+        if "site-packages" + os.sep in path:
+            label = path.rsplit("site-packages" + os.sep, 1)[1]
+        elif path.startswith(PROJECT_ROOT + os.sep):
+            label = os.path.relpath(path, PROJECT_ROOT)
+        elif path.startswith(_STDLIB + os.sep):
+            label = os.path.relpath(path, _STDLIB)
+        else:
+            label = path
+        label = label.replace(os.sep, "/").replace(";", ",")
+        _labels[filename] = label
+    return label
+
+
+def _collapse(frame) -> str:
+    parts: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        parts.append(f"{_short(code.co_filename)}:{name}")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts).replace(" ", "_")
+
+
+class Sampler:
+    """Samples one thread's stack every `interval` seconds until stop()."""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pp-profiler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+            del frame
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+# --- Stored profiles ----------------------------------------------------
+
+_prune_lock = threading.Lock()
+
+
+def save(stacks: Counter, meta: dict, directory: str = PROFILES_DIR, keep: int = DEFAULT_KEEP) -> str:
+    """Write one profile (collapsed stacks + summary) and drop the oldest beyond `keep`."""
+    # sortable by time (microseconds), unique across threads and workers
+    pid = datetime.now().strftime("%Y%m%dT%H%M%S%f") + "-" + uuid.uuid4().hex[:6]
+    body = "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+    atomic_write_bytes(os.path.join(directory, f"{pid}.collapsed"), body.encode("utf-8"), fsync_dir=False)
+    atomic_write_json(os.path.join(directory, f"{pid}.json"), {"id": pid, **meta}, fsync_dir=False)
+    with _prune_lock:
+        for old in list_ids(directory)[keep:]:
+            for ext in (".collapsed", ".json"):
+                try:
+                    os.unlink(os.path.join(directory, old + ext))
+                except OSError:
+                    pass
+    return pid
+
+
+def list_ids(directory: str = PROFILES_DIR) -> List[str]:
+    """Stored profile ids, newest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted((n[:-5] for n in names if n.endswith(".json") and not n.startswith(".")), reverse=True)
+
+
+def _valid_id(pid: str) -> bool:
+    return bool(pid) and all(c.isalnum() or c == "-" for c in pid)
+
+
+def load_meta(pid: str, directory: str = PROFILES_DIR) -> Optional[dict]:
+    if not _valid_id(pid):
+        return None
+    try:
+        with open(os.path.join(directory, f"{pid}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def collapsed_path(pid: str, directory: str = PROFILES_DIR) -> Optional[str]:
+    path = os.path.join(directory, f"{pid}.collapsed")
+    return path if _valid_id(pid) and os.path.exists(path) else None
+
+
+def top_frames(pid: str, limit: int = 40, directory: str = PROFILES_DIR) -> List[dict]:
+    """Per-frame self and total sample counts of a stored profile, by total."""
+    path = collapsed_path(pid, directory)
+    if path is None:
+        return []
+    own: Counter = Counter()
+    total: Counter = Counter()
+    samples = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stack, _, n = line.rstrip("\n").rpartition(" ")
+            if not stack:
+                continue
+            n = int(n)
+            samples += n
+            frames = stack.split(";")
+            own[frames[-1]] += n
+            for fr in set(frames):
+                total[fr] += n
+    return [
+        {"frame": fr, "total": t, "self": own.get(fr, 0),
+         "total_pct": 100.0 * t / samples, "self_pct": 100.0 * own.get(fr, 0) / samples}
+        for fr, t in total.most_common(limit)
+    ]
+
+
+# --- Flask hooks --------------------------------------------------------
+
+def init_app(app) -> None:
+    """Profile requests that carry PROFILER_TOKEN (nothing is hooked if it is unset)."""
+    token = app.config.get("PROFILER_TOKEN") or ""
+    if not token:
+        return
+    from urllib.parse import urlencode
+    from flask import g, request
+
+    interval = float(app.config.get("PROFILER_INTERVAL") or DEFAULT_INTERVAL)
+    keep = int(app.config.get("PROFILER_KEEP") or DEFAULT_KEEP)
+
+    def _wanted() -> bool:
+        sent = request.headers.get(HEADER) or request.args.get(QUERY_ARG)
+        return bool(sent) and hmac.compare_digest(sent.encode("utf-8"), token.encode("utf-8"))
+
+    @app.before_request
+    def _pp_profile_start():
+        if (HEADER in request.headers or QUERY_ARG in request.args) and _wanted():
+            g._pp_profile = (Sampler(threading.get_ident(), interval).start(), time.perf_counter())
+
+    @app.after_request
+    def _pp_profile_finish(response):
+        started = g.pop("_pp_profile", None)
+        if started is None:
+            return response
+        sampler, t0 = started
+        stacks = sampler.stop()
+        query = urlencode([(k, v) for k, v in request.args.items(multi=True) if k != QUERY_ARG])
+        pid = save(stacks, {
+            "method": request.method,
+            "path": request.path + ("?" + query if query else ""),   # without the token
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - t0) * 1000, 2),
+            "samples": sum(stacks.values()),
+            "interval_ms": interval * 1000,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, keep=keep)
+        response.headers["X-Profile-Id"] = pid
+        return response
+
+    @app.teardown_request
+    def _pp_profile_abort(exc):
+        # the view raised: after_request never ran, just stop sampling
+        started = g.pop("_pp_profile", None)
+        if started is not None:
+            started[0].stop()
@@ -5,32 +5,73 @@ import uuid
 import glob
 import shutil
 
+from .storage import atomic_write_json, read_exercise_bytes
+from .http_cache import conditional
+from .metrics import json_load
+from .glossary_store import country_map
+
 bp = Blueprint("admin", __name__, url_prefix="/admin")
 
-# Map ISO 2-letter codes to full JSON file names
-country_map = {
-    "ar": "glosario-regional-argentina",
-    "bo": "glosario-regional-bolivia",
-    "cl": "glosario-regional-chile",
-    "co": "glosario-regional-colombia",
-    "cr": "glosario-regional-costa_rica",
-    "cu": "glosario-regional-cuba",
-    "do": "glosario-regional-republica_dominicana",
-    "ec": "glosario-regional-ecuador",
-    "sv": "glosario-regional-el_salvador",
-    "gq": "glosario-regional-guinea_ecuatorial",
-    "gt": "glosario-regional-guatemala",
-    "hn": "glosario-regional-honduras",
-    "mx": "glosario-regional-mexico",
-    "ni": "glosario-regional-nicaragua",
-    "pa": "glosario-regional-panama",
-    "py": "glosario-regional-paraguay",
-    "pe": "glosario-regional-peru",
-    "pr": "glosario-regional-puerto_rico",
-    "es": "glosario-regional-espana",
-    "uy": "glosario-regional-uruguay",
-    "ve": "glosario-regional-venezuela"
-}
+# === Shared glossary cache: keep derived indexes in step with admin writes ===
+def _glossary_repo(country_code):
+    """
+    Admin-side repository for a country's glossary: sorted in memory, edited
+    in place, written back in batches (GLOSSARY_FLUSH_DELAY seconds after the
+    first pending edit). With GLOSSARY_BACKEND = "sqlite", the same interface
+    over the database (each edit commits immediately).
+    """
+    from flask import current_app
+    from .glossary_repo import get_repository
+    from .glossary_sqlite import SqliteGlossaryRepository, get_backend
+    backend = get_backend()
+    if backend is not None:
+        return SqliteGlossaryRepository(backend, country_map[country_code])
+    return get_repository(
+        country_map[country_code],
+        flush_delay=current_app.config.get("GLOSSARY_FLUSH_DELAY"),
+    )
+
+def _entry_etag(entry):
+    from .glossary_store import entry_hash
+    return f'"{entry_hash(entry)}"'
+
+def _if_match_failed(entry):
+    """
+    Optimistic concurrency for entry edits: the client may send the entry's
+    etag (If-Match header, or an "etag" form/JSON field). A mismatch means
+    someone else changed the entry since it was loaded. No etag = no check.
+    """
+    sent = (request.headers.get("If-Match")
+            or request.form.get("etag")
+            or (request.get_json(silent=True) or {}).get("etag")
+            or "").strip()
+    if not sent or sent == "*":
+        return False
+    if sent.startswith("W/"):
+        sent = sent[2:]
+    return f'"{sent.strip(chr(34))}"' != _entry_etag(entry)
+
+def _conflict(entry, message="Entry was modified by someone else; reload and retry"):
+    return jsonify({
+        "success": False,
+        "error": message,
+        "etag": _entry_etag(entry) if entry is not None else None,
+    }), 409
+
+def _refresh_glossary_indexes(country_code):
+    """
+    Rebuild the source catalog of the shared snapshot right after an admin
+    write, so /api/<cc>/by-source, /api/<cc>/sources and /<cc>/source/...
+    never pay for the rebuild on a public request.
+    """
+    from .glossary_store import store
+    from .source_index import get_source_index
+    try:
+        snap = store.get(country_map[country_code])
+        if snap is not None:
+            get_source_index(snap)
+    except Exception:
+        store.invalidate(country_map.get(country_code))
 
 # === Accent colors per country (picked for good contrast on white) ===
 ACCENT_COLOR_MAP = {
@@ -113,22 +154,11 @@ def glosario(country_code):
         return f"❌ Código de país no válido: {country_code}", 404
 
     country_name = country_code.upper()  # or replace with a prettier mapping later
-    filename = f"{country_map[country_code]}.json"
-
-    # Load glossary JSON
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "glossaries", filename)
-    if not os.path.exists(data_path):
-        entries = []
-    else:
-        with open(data_path, "r", encoding="utf-8") as f:
-            entries = json.load(f)
-
-    # Sort entries alphabetically by 'word', ignoring accents and case
-    import unicodedata
-    def normalize_for_sort(s):
-        return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").lower()
-
-    entries.sort(key=lambda e: normalize_for_sort(e.get("word", "")))
+    # Sorted entries (accent/case-insensitive), including edits not yet flushed
+    repo = _glossary_repo(country_code)
+    entries = repo.all()
+    # published edits share entry dicts with the store snapshot (cached card hashes)
+    snapshot = repo.store.get(repo.name)
 
     # If ?partial=1 (or any ?partial query), return a template that contains only the
     # inner cards/modals + scripts, without the base chrome. This will be injected
@@ -138,7 +168,8 @@ def glosario(country_code):
             "admin_glosario_partial.html",
             country_code=country_code,
             country_name=country_name,
-            entries=entries
+            entries=entries,
+            snapshot=snapshot
         )
 
     # --- TEMP PROBE: shows a yellow badge if this route is hit ---
@@ -154,7 +185,8 @@ def glosario(country_code):
         "admin_glosario.html",
         country_code=country_code,
         country_name=country_name,
-        entries=entries
+        entries=entries,
+        snapshot=snapshot
     )
     return probe_html + page
 
@@ -165,22 +197,16 @@ def delete_glosario(country_code):
     if not word_to_delete:
         return jsonify({"success": False, "error": "No word provided"}), 400
 
-    filename = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'glossaries', filename)
-
-    if not os.path.exists(data_path):
+    repo = _glossary_repo(country_code)
+    if not repo.exists():
         return jsonify({"success": False, "error": f"No glossary found for {country_code}"}), 404
 
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f)
-
-    new_entries = [e for e in entries if e["word"] != word_to_delete]
-
-    if len(new_entries) == len(entries):
+    current = repo.find(word_to_delete)
+    if current is not None and _if_match_failed(current):
+        return _conflict(current)
+    if not repo.delete_word(word_to_delete):
         return jsonify({"success": False, "error": "Word not found"}), 404
-
-    with open(data_path, "w", encoding="utf-8") as f:
-        json.dump(new_entries, f, ensure_ascii=False, indent=4)
+    _refresh_glossary_indexes(country_code)
 
     return jsonify({"success": True})
 
@@ -195,15 +221,12 @@ def update_glosario(country_code):
     from werkzeug.utils import secure_filename
     import json
     import os
-    import unicodedata
 
     if country_code not in country_map:
         return jsonify({"success": False, "error": f"Invalid country code: {country_code}"}), 400
 
-    # Paths
-    filename  = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'glossaries', filename)
-    if not os.path.exists(data_path):
+    repo = _glossary_repo(country_code)
+    if not repo.exists():
         return jsonify({"success": False, "error": f"No glossary found for {country_code}"}), 404
 
     # ---- Read inputs ----
@@ -234,17 +257,12 @@ def update_glosario(country_code):
     except Exception as e:
         return jsonify({"success": False, "error": f"Invalid senses JSON: {e}"}), 400
 
-    # ---- Load existing entries ----
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f) or []
-
-    # Find existing entry index (case-insensitive match)
-    idx = next((i for i, e in enumerate(entries)
-                if (e.get("word", "") or "").lower() == original_word.lower()), -1)
-    if idx == -1:
+    # Find existing entry (case-insensitive match)
+    existing = repo.find(original_word)
+    if existing is None:
         return jsonify({"success": False, "error": f'Word "{original_word}" not found'}), 404
-
-    existing = entries[idx]
+    if _if_match_failed(existing):
+        return _conflict(existing)
 
     # ---- Compute slug (like /add) ----
     slug = word.lower().replace("ñ", "n")
@@ -283,21 +301,19 @@ def update_glosario(country_code):
         "senses":   senses,
     }
 
-    # Replace, then sort by normalized word
-    entries[idx] = updated_entry
-
-    def normalize_for_sort(s):
-        return unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii").lower()
-    entries.sort(key=lambda e: normalize_for_sort(e.get("word", "")))
-
-    # Save back
-    with open(data_path, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=4)
+    # Replace (moves only if the word's sort position changed); written back in batch
+    from .glossary_repo import GlossaryConflict
+    try:
+        repo.replace(existing, updated_entry)
+    except GlossaryConflict:
+        return _conflict(repo.find(original_word))
+    _refresh_glossary_indexes(country_code)
 
     # Return some quick debug counts so you can confirm in DevTools
     return jsonify({
         "success": True,
         "updated_word": word,
+        "etag": _entry_etag(updated_entry),
         "counts": {
             "variants_keys": len(updated_entry.get("variants", {})),
             "senses": len(updated_entry.get("senses", [])),
@@ -316,30 +332,45 @@ def edit_glosario(country_code):
     if not word or not definition:
         return jsonify({"success": False, "error": "Word and definition are required"}), 400
 
-    filename = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'glossaries', filename)
-
-    if not os.path.exists(data_path):
+    repo = _glossary_repo(country_code)
+    if not repo.exists():
         return jsonify({"success": False, "error": f"No glossary found for {country_code}"}), 404
 
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f)
+    entry = repo.find(word)
+    if entry is None:
+        return jsonify({"success": False, "error": "Word not found"}), 404
+    if _if_match_failed(entry):
+        return _conflict(entry)
 
-    updated = False
-    for entry in entries:
-        if entry["word"].lower() == word.lower():
-            entry["definition"] = definition
-            entry["example"] = example or ""
-            updated = True
-            break
+    # Copy rather than mutate: published snapshots share the entry dicts
+    from .glossary_repo import GlossaryConflict
+    updated = dict(entry, definition=definition, example=example or "")
+    try:
+        repo.replace(entry, updated)
+    except GlossaryConflict:
+        return _conflict(repo.find(word))
+    _refresh_glossary_indexes(country_code)
 
-    if not updated:
-        return jsonify({"success": False, "error": "Word not found"}), 404
+    return jsonify({"success": True, "etag": _entry_etag(updated)})
 
-    with open(data_path, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=4)
+@bp.route("/glosario/<country_code>/migrate", methods=["POST"])
+def migrate_glosario(country_code):
+    """
+    Queue a merge of an old-format glossary dump into this glossary, as a
+    background job. The result goes to <name>.MIGRATED.json for review; the
+    live file is not touched.
 
-    return jsonify({"success": True})
+    Body JSON (optional):
+      { "input": "old_glosario.json", "sort": false }   # input: relative to the project root
+    """
+    if country_code not in country_map:
+        return jsonify({"success": False, "error": f"Invalid country code: {country_code}"}), 400
+    data = request.get_json(silent=True) or {}
+    src = (data.get("input") or "old_glosario.json").strip()
+    from . import jobs
+    job_id = jobs.enqueue("migrate_glossary", {"code": country_code, "input": src, "sort": bool(data.get("sort"))},
+                          dedupe=True)
+    return _job_accepted(job_id)
 
 @bp.route("/glosario/<country_code>/add", methods=["POST"])
 def add_glosario(country_code):
@@ -353,15 +384,8 @@ def add_glosario(country_code):
     if country_code not in country_map:
         return jsonify({"success": False, "error": f"Invalid country code: {country_code}"}), 400
 
-    # Paths
-    filename = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'glossaries', filename)
-    os.makedirs(os.path.dirname(data_path), exist_ok=True)
-
-    # Ensure glossary file exists
-    if not os.path.exists(data_path):
-        with open(data_path, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=4)
+    # A missing glossary file is created on the first flush
+    repo = _glossary_repo(country_code)
 
     # ---- Parse form fields ----
     word = (request.form.get("word") or "").strip()
@@ -405,14 +429,6 @@ def add_glosario(country_code):
             save_as = secure_filename(fs.filename)
             fs.save(os.path.join(examples_dir, save_as))
 
-    # ---- Load existing entries ----
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f)
-
-    # Prevent duplicate words
-    if any(e.get("word", "").lower() == word.lower() for e in entries):
-        return jsonify({"success": False, "error": "Word already exists"}), 400
-
     # ---- Build new entry object ----
     new_entry = {
         "word": word,
@@ -422,22 +438,15 @@ def add_glosario(country_code):
         "senses": senses
     }
 
-    # Append and alphabetize before saving
-    import unicodedata
-
-    entries.append(new_entry)
-
-    # Sort entries alphabetically by 'word', ignoring accents and case
-    def normalize_for_sort(s):
-        return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").lower()
-
-    entries.sort(key=lambda e: normalize_for_sort(e.get("word", "")))
+    # Insert at its alphabetical position (refused if the word exists); written back in batch
+    from .glossary_repo import GlossaryDuplicate
+    try:
+        repo.add(new_entry)
+    except GlossaryDuplicate:
+        return jsonify({"success": False, "error": "Word already exists"}), 400
+    _refresh_glossary_indexes(country_code)
 
-    # Save back
-    with open(data_path, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=4)
-
-    return jsonify({"success": True})
+    return jsonify({"success": True, "etag": _entry_etag(new_entry)})
 
 # === BEGIN: Home tiles (homepage cards) – admin list view ===
 def _home_tiles_path():
@@ -449,7 +458,7 @@ def _load_home_tiles():
         return []
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f) or []
+            data = json_load(f, "admin") or []
         tiles = [t for t in data if isinstance(t, dict)]
         # keep only enabled by default for display; we can add a toggle later
         tiles = sorted(tiles, key=lambda t: t.get("order", 9999))
@@ -553,7 +562,7 @@ def load_glossary_settings():
         return _default_settings()
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f) or {}
+            data = json_load(f, "admin") or {}
         # make sure all known codes exist (fill with defaults where missing)
         merged = _default_settings()
         merged.update({k: bool(v) for k, v in data.items() if k in country_map})
@@ -566,8 +575,7 @@ def save_glossary_settings(settings: dict):
     _ensure_settings_dir()
     # only persist known codes as booleans
     clean = {code: bool(settings.get(code, False)) for code in country_map.keys()}
-    with open(_settings_path(), "w", encoding="utf-8") as f:
-        json.dump(clean, f, ensure_ascii=False, indent=2)
+    atomic_write_json(_settings_path(), clean)
     return clean
 # === END: Glossary enable/disable settings helpers ===
 
@@ -585,7 +593,7 @@ def _load_pages():
         return []
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f) or []
+            data = json_load(f, "admin") or []
         # Ensure minimal shape
         return [p for p in data if isinstance(p, dict)]
     except Exception:
@@ -593,8 +601,7 @@ def _load_pages():
 
 def _save_pages(pages: list):
     _ensure_pages_dir()
-    with open(_pages_path(), "w", encoding="utf-8") as f:
-        json.dump(pages, f, ensure_ascii=False, indent=2)
+    atomic_write_json(_pages_path(), pages)
     return pages
 
 # === BEGIN: Home tiles storage helpers (data/pages/home_tiles.json) ===
@@ -614,7 +621,7 @@ def load_home_tiles():
         return []
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f) or []
+            data = json_load(f, "admin") or []
         # Ensure it's a list of dicts
         return [t for t in data if isinstance(t, dict)]
     except Exception:
@@ -626,8 +633,7 @@ def save_home_tiles(tiles: list):
     Persist the provided tiles list back to data/pages/home_tiles.json.
     """
     _ensure_home_tiles_dir()
-    with open(_home_tiles_path(), "w", encoding="utf-8") as f:
-        json.dump(tiles or [], f, ensure_ascii=False, indent=2)
+    atomic_write_json(_home_tiles_path(), tiles or [])
     return tiles
 # === END: Home tiles storage helpers ===
 
@@ -871,7 +877,7 @@ def admin_pages_edit(slug):
         if os.path.exists(page_json_path):
             try:
                 with open(page_json_path, "r", encoding="utf-8") as f:
-                    page = json.load(f) or {}
+                    page = json_load(f, "admin") or {}
             except Exception:
                 page = None
 
@@ -897,14 +903,14 @@ def admin_pages_get(slug):
 
         if os.path.exists(page_json_path):
             with open(page_json_path, "r", encoding="utf-8") as f:
-                obj = json.load(f)
-            return jsonify({"success": True, "page": obj})
+                obj = json_load(f, "admin")
+            return conditional(jsonify({"success": True, "page": obj}))
 
         # 2) Fallback: search the flat list
         pages = _load_pages()  # existing helper that reads data/pages/pages.json
         for p in pages:
             if (p.get("slug") or "").strip().lower() == slug.strip().lower():
-                return jsonify({"success": True, "page": p})
+                return conditional(jsonify({"success": True, "page": p}))
 
         return jsonify({"success": False, "error": "Page not found."}), 404
 
@@ -971,7 +977,7 @@ def admin_pages_update(slug):
         if os.path.exists(page_json_path):
             with open(page_json_path, "r", encoding="utf-8") as f:
                 try:
-                    current = json.load(f)
+                    current = json_load(f, "admin")
                 except Exception:
                     current = {}
         else:
@@ -1051,8 +1057,7 @@ def admin_pages_update(slug):
 
         # --- Persist: foldered JSON ---
         os.makedirs(folder, exist_ok=True)
-        with open(page_json_path, "w", encoding="utf-8") as f:
-            json.dump(updated, f, ensure_ascii=False, indent=2)
+        atomic_write_json(page_json_path, updated)
 
         # --- Persist: flat index (create if missing) ---
         pages = _load_pages()
@@ -1087,7 +1092,7 @@ def admin_pages_toggle_status(slug):
         current = None
         if os.path.exists(page_json_path):
             with open(page_json_path, "r", encoding="utf-8") as f:
-                current = json.load(f)
+                current = json_load(f, "admin")
         else:
             # Fallback: flat list
             pages_flat = _load_pages()
@@ -1105,8 +1110,7 @@ def admin_pages_toggle_status(slug):
 
         # Ensure folder exists & write foldered JSON
         os.makedirs(folder, exist_ok=True)
-        with open(page_json_path, "w", encoding="utf-8") as f:
-            json.dump(current, f, ensure_ascii=False, indent=2)
+        atomic_write_json(page_json_path, current)
 
         # Update the flat index too
         pages = _load_pages()
@@ -1137,7 +1141,7 @@ def admin_pages_get_json(slug):
         page = None
         if os.path.exists(page_json_path):
             with open(page_json_path, "r", encoding="utf-8") as f:
-                page = json.load(f)
+                page = json_load(f, "admin")
         else:
             pages_flat = _load_pages()
             for p in pages_flat:
@@ -1148,7 +1152,7 @@ def admin_pages_get_json(slug):
         if not page:
             return jsonify({"success": False, "error": "Page not found."}), 404
 
-        return jsonify({"success": True, "page": page})
+        return conditional(jsonify({"success": True, "page": page}))
     except Exception as e:
         return jsonify({"success": False, "error": f"Failed to load page: {e}"}), 500
 
@@ -1221,7 +1225,7 @@ def admin_pages_create():
         if os.path.exists(flat_path):
             try:
                 with open(flat_path, "r", encoding="utf-8") as f:
-                    existing = json.load(f) or []
+                    existing = json_load(f, "admin") or []
             except Exception:
                 existing = []
 
@@ -1268,14 +1272,12 @@ def admin_pages_create():
         # Persist: foldered json
         folder = os.path.join(project_root, "data", "pages", slug)
         os.makedirs(folder, exist_ok=True)
-        with open(os.path.join(folder, "page.json"), "w", encoding="utf-8") as f:
-            json.dump(page, f, ensure_ascii=False, indent=2)
+        atomic_write_json(os.path.join(folder, "page.json"), page)
 
         # Persist: flat index
         pages = existing
         pages.append(page)
-        with open(flat_path, "w", encoding="utf-8") as f:
-            json.dump(pages, f, ensure_ascii=False, indent=2)
+        atomic_write_json(flat_path, pages)
 
         return jsonify({"success": True, "page": page})
 
@@ -1381,255 +1383,28 @@ def admin_home_tile_create():
 #   - exercises.index.json                  (global registry of all exercises)
 #   - <exercise_id>@v<version>.json        (versioned payloads)
 
-def _exercises_root_path():
-    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'exercises'))
-
-def _ensure_exercises_dir():
-    path = _exercises_root_path()
-    os.makedirs(path, exist_ok=True)
-    return path
-
-def _exercise_index_path():
-    return os.path.join(_ensure_exercises_dir(), 'exercises.index.json')
-
-def _load_exercise_index():
+def _exercise_lookup():
     """
-    Load exercises.index.json if present and valid; otherwise rebuild by scanning
-    the filesystem.
-
-    Supports all layouts:
-
-    NEW (2025-10):
-      data/exercises/<type>/<slug>/
-        meta.json
-        current.json
-        NNN.json        (e.g., 001.json, 002.json)
-
-    Legacy (foldered by id):
-      data/exercises/<id>/
-        meta.json
-        current.json
-        versions/
-          vNNN.json
-
-    Legacy (flat files):
-      data/exercises/<id>@vN.json
-
-    The resulting index has records:
-      {
-        id,                # stable exercise id from payload/meta
-        type,              # e.g., "tf", "mcq", "cloze"
-        title,             # exercise title
-        pinned_version,    # defaults to latest if not set
-        versions: [ { version, path } ]  # repo-relative "data/..." path to the version JSON
-      }
+    The exercise registry (data/exercises/exercises.index.json) as an
+    ExerciseIndex (dict lookups by id, by (type, slug) and by version),
+    served from memory and re-read only when the file changes. See
+    app/exercise_index.py for the layouts and record format; a full
+    filesystem scan only happens on an explicit reindex.
     """
-    path = _exercise_index_path()
-
-    # 1) Try existing valid index
-    try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-            if isinstance(data.get("exercises"), list) and data["exercises"]:
-                return data
-    except Exception:
-        pass  # fall through to rebuild
-
-    # 2) Rebuild by scanning the filesystem
-    root = _exercises_root_path()
-    ex_map = {}
+    from .exercise_index import exercise_index
+    return exercise_index.index()
 
-    def _safe_load_json(p):
-        try:
-            with open(p, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return None
-
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-
-    # (a) NEW layout: data/exercises/<type>/<slug>/{meta.json,current.json,NNN.json}
-    try:
-        for type_name in os.listdir(root):
-            type_dir = os.path.join(root, type_name)
-            if not os.path.isdir(type_dir):
-                continue
-
-            # Detect whether this is a "type" directory by looking for nested folders
-            # that contain either current.json or NNN.json files.
-            for slug_name in os.listdir(type_dir):
-                folder = os.path.join(type_dir, slug_name)
-                if not os.path.isdir(folder):
-                    continue
-
-                try:
-                    files = set(os.listdir(folder))
-                except Exception:
-                    continue
-
-                has_current = "current.json" in files
-                has_numeric_versions = any(
-                    fn.lower().endswith(".json") and fn[:-5].isdigit() for fn in files
-                )
-                if not (has_current or has_numeric_versions):
-                    continue  # not a new-layout exercise folder
-
-                meta = _safe_load_json(os.path.join(folder, "meta.json"))
-                current = _safe_load_json(os.path.join(folder, "current.json"))
-
-                # Determine id (prefer meta, then current, then last numeric file)
-                ex_id = (meta or {}).get("id") or (current or {}).get("id")
-                if not ex_id:
-                    # peek a numeric file if present
-                    numeric = sorted([fn for fn in files if fn.lower().endswith(".json") and fn[:-5].isdigit()])
-                    payload = _safe_load_json(os.path.join(folder, numeric[-1])) if numeric else None
-                    ex_id = (payload or {}).get("id") or f"{type_name}__{slug_name}"
-
-                rec = ex_map.get(ex_id) or {
-                    "id": ex_id,
-                    "type": None,
-                    "title": None,
-                    "pinned_version": None,
-                    "versions": [],
-                }
-
-                # Fill type/title from meta/current if present
-                rec["type"] = (meta or {}).get("type") or (current or {}).get("type") or rec["type"]
-                rec["title"] = (meta or {}).get("title") or (current or {}).get("title") or rec["title"]
-
-                # Collect numeric version files as versions
-                versions = []
-                for fn in files:
-                    if not fn.lower().endswith(".json"):
-                        continue
-                    stem = fn[:-5]
-                    if stem.isdigit():
-                        try:
-                            ver = int(stem)
-                        except ValueError:
-                            continue
-                        rel = os.path.join("data", "exercises", type_name, slug_name, fn).replace("\\", "/")
-                        versions.append({"version": ver, "path": rel})
-
-                versions.sort(key=lambda v: v.get("version", 0))
-                if versions:
-                    rec["versions"] = versions
-                    if rec.get("pinned_version") is None:
-                        rec["pinned_version"] = versions[-1]["version"]
-                else:
-                    # No numeric versions but include record so UI can still preview via current.json
-                    rec.setdefault("versions", [])
-
-                ex_map[ex_id] = rec
-    except Exception:
-        # Don't fail the whole indexer; continue with legacy scans.
-        pass
-
-    # (b) Legacy folder-by-id layout: data/exercises/<id>/versions/vNNN.json
-    try:
-        for name in os.listdir(root):
-            d = os.path.join(root, name)
-            if not os.path.isdir(d):
-                continue
-
-            # Skip directories already consumed as NEW layout "type" dirs above
-            # Heuristic: if any child is a folder having current.json/NNN.json, we've handled it.
-            try:
-                child_dirs = [os.path.join(d, c) for c in os.listdir(d) if os.path.isdir(os.path.join(d, c))]
-                if any(os.path.exists(os.path.join(c, "current.json")) or
-                       any((fn.lower().endswith(".json") and fn[:-5].isdigit()) for fn in os.listdir(c))
-                       for c in child_dirs):
-                    continue
-            except Exception:
-                pass
-
-            meta_p = os.path.join(d, "meta.json")
-            current_p = os.path.join(d, "current.json")
-            versions_d = os.path.join(d, "versions")
-
-            # require at least one of these to consider legacy folder
-            if not (os.path.exists(meta_p) or os.path.exists(current_p) or os.path.isdir(versions_d)):
-                continue
-
-            meta = _safe_load_json(meta_p)
-            current = _safe_load_json(current_p)
-
-            ex_id = name
-            # prefer ids found inside files, but folder name is fallback
-            ex_id = (meta or {}).get("id") or (current or {}).get("id") or ex_id
-
-            rec = ex_map.get(ex_id) or {"id": ex_id, "type": None, "title": None, "pinned_version": None, "versions": []}
-            rec["type"] = (meta or {}).get("type") or (current or {}).get("type") or rec["type"]
-            rec["title"] = (meta or {}).get("title") or (current or {}).get("title") or rec["title"]
-
-            versions = rec.get("versions", [])
-            try:
-                if os.path.isdir(versions_d):
-                    for fn in os.listdir(versions_d):
-                        if not fn.lower().endswith(".json"):
-                            continue
-                        # vNNN.json
-                        import re as _re
-                        m = _re.match(r"^v(\d+)\.json$", fn, _re.I)
-                        if not m:
-                            continue
-                        ver = int(m.group(1))
-                        rel = os.path.join("data", "exercises", name, "versions", fn).replace("\\", "/")
-                        if not any(v.get("version") == ver for v in versions):
-                            versions.append({"version": ver, "path": rel})
-            except Exception:
-                pass
-
-            versions.sort(key=lambda v: v.get("version", 0))
-            rec["versions"] = versions
-            if versions and rec.get("pinned_version") is None:
-                rec["pinned_version"] = versions[-1]["version"]
-            ex_map[ex_id] = rec
-    except Exception:
-        pass
-
-    # (c) Legacy flat files: data/exercises/<id>@vN.json
-    try:
-        import re
-        for fn in os.listdir(root):
-            p = os.path.join(root, fn)
-            if not (os.path.isfile(p) and fn.lower().endswith(".json")):
-                continue
-            m = re.match(r"^(.+?)@v(\d+)\.json$", fn)
-            if not m:
-                continue
-            ex_id, ver = m.group(1), int(m.group(2))
-            rec = ex_map.get(ex_id) or {"id": ex_id, "type": None, "title": None, "pinned_version": None, "versions": []}
-            rel = os.path.join("data", "exercises", fn).replace("\\", "/")
-            if not any(v.get("version") == ver for v in rec["versions"]):
-                rec["versions"].append({"version": ver, "path": rel})
-            if rec.get("pinned_version") is None or ver > rec["pinned_version"]:
-                rec["pinned_version"] = ver
-            ex_map[ex_id] = rec
-    except Exception:
-        pass
-
-    # 3) Finalize & persist
-    exercises = list(ex_map.values())
-    # Fill missing pinned_version with latest if versions exist
-    for r in exercises:
-        if not r.get("pinned_version") and r.get("versions"):
-            r["pinned_version"] = max(v.get("version", 0) for v in r["versions"])
-    exercises.sort(key=lambda r: ((r.get("title") or "").lower(), r.get("id") or ""))
+def _load_exercise_index():
+    """The index document ({"exercises": [...]}) for templates."""
+    return _exercise_lookup().data
 
-    index_data = {"exercises": exercises}
-    try:
-        _save_exercise_index(index_data)
-    except Exception:
-        pass
-    return index_data
+def _find_exercise(exercise_id: str):
+    return _exercise_lookup().get(exercise_id)
 
-def _save_exercise_index(index_data: dict):
-    os.makedirs(os.path.dirname(_exercise_index_path()), exist_ok=True)
-    with open(_exercise_index_path(), "w", encoding="utf-8") as f:
-        json.dump(index_data or {"exercises": []}, f, ensure_ascii=False, indent=2)
-    return index_data
+def _edit_exercise_index():
+    """Locked read-modify-write of the index: `with _edit_exercise_index() as idx: idx.put(...)`"""
+    from .exercise_index import exercise_index
+    return exercise_index.edit()
 
 def _write_versioned_exercise(exercise_id: str, version: int, payload: dict):
     """
@@ -1645,6 +1420,7 @@ def _write_versioned_exercise(exercise_id: str, version: int, payload: dict):
       ("data/exercises/<id>/versions/v003.json", "<ABSOLUTE_PATH>").
     """
     # Local import so this edit only touches one spot in this file.
+    from flask import current_app
     from . import storage
 
     rel_path, abs_path = storage.write_exercise_version(
@@ -1654,6 +1430,7 @@ def _write_versioned_exercise(exercise_id: str, version: int, payload: dict):
         title=(payload or {}).get("title"),
         ex_type=(payload or {}).get("type"),
         pin=True,  # keep latest pinned for preview by default
+        delta_every=current_app.config.get("EXERCISE_DELTA_EVERY", 0),
     )
     return rel_path, abs_path
 
@@ -1665,6 +1442,17 @@ def admin_exercises_library():
     index_data = _load_exercise_index()
     return render_template("admin_exercises.html", index=index_data)
 
+@bp.route("/exercises/reindex", methods=["POST"])
+def admin_exercises_reindex():
+    """
+    Queue a rebuild of exercises.index.json from the files under
+    data/exercises/ (same as `python -m app.exercise_index reindex`).
+    Only needed after files were added or removed by hand.
+    """
+    from . import jobs
+    job_id = jobs.enqueue("exercise_reindex", dedupe=True)
+    return _job_accepted(job_id)
+
 @bp.route("/exercises/new", methods=["GET"])
 def admin_exercises_new():
     """
@@ -1678,28 +1466,15 @@ def admin_exercises_new():
     ex_type = (request.args.get("type") or "tf").lower().strip()
     ex_id = (request.args.get("id") or "").strip()
 
+    lookup = _exercise_lookup()
     edit_payload = None
     if ex_id:
         try:
-            index = _load_exercise_index()
-            rec = next((e for e in index.get("exercises", []) if e.get("id") == ex_id), None)
-            if rec:
-                # choose pinned_version if present, else the highest version number
-                ver = rec.get("pinned_version")
-                if not ver:
-                    if rec.get("versions"):
-                        ver = max(v.get("version", 0) for v in rec["versions"])
-                # resolve the JSON path for that version
-                vrow = None
-                if rec.get("versions"):
-                    vrow = next((v for v in rec["versions"] if v.get("version") == ver), None)
-                    if not vrow:  # fallback to last row if not found
-                        vrow = rec["versions"][-1]
-                if vrow and vrow.get("path"):
-                    abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", vrow["path"]))
-                    if os.path.exists(abs_path):
-                        with open(abs_path, "r", encoding="utf-8") as f:
-                            edit_payload = json.load(f)
+            if lookup.get(ex_id):
+                # pinned_version if present, else the highest version number
+                abs_path = lookup.pinned_path(ex_id)
+                if abs_path and os.path.exists(abs_path):
+                    edit_payload = json.loads(read_exercise_bytes(abs_path))
                 # If the stored type exists, prefer it for the builder
                 if edit_payload and edit_payload.get("type"):
                     ex_type = str(edit_payload.get("type")).lower().strip()
@@ -1709,14 +1484,7 @@ def admin_exercises_new():
     return render_template(
         "admin_exercises.html",
         create_type=ex_type,
-        index=_load_exercise_index(),
-        edit_ex=edit_payload
-    )
-
-    return render_template(
-        "admin_exercises.html",
-        create_type=ex_type,
-        index=_load_exercise_index(),
+        index=lookup.data,
         edit_ex=edit_payload
     )
 
@@ -1727,30 +1495,16 @@ def admin_exercises_preview(exercise_id):
     Used by the Biblioteca 'Vista previa' button in the admin UI.
     """
     try:
-        index = _load_exercise_index()
-        rec = next((e for e in index.get("exercises", []) if e.get("id") == exercise_id), None)
-        if not rec:
+        lookup = _exercise_lookup()
+        if not lookup.get(exercise_id):
             return jsonify({"success": False, "error": "Exercise not found"}), 404
 
-        # choose pinned_version if present, else the highest version number
-        ver = rec.get("pinned_version")
-        if not ver:
-            if rec.get("versions"):
-                ver = max(v.get("version", 0) for v in rec["versions"])
-
-        vrow = None
-        if rec.get("versions"):
-            vrow = next((v for v in rec["versions"] if v.get("version") == ver), None)
-            if not vrow:  # fallback to last row if not found
-                vrow = rec["versions"][-1]
-
         # Try the pinned/latest version path first; if missing, fall back to current.json
         abs_path = None
 
-        if vrow and vrow.get("path"):
-            cand = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", vrow["path"]))
-            if os.path.exists(cand):
-                abs_path = cand
+        cand = lookup.pinned_path(exercise_id)
+        if cand and os.path.exists(cand):
+            abs_path = cand
 
         if not abs_path:
             # Fallback to new storage layout's current.json
@@ -1768,8 +1522,7 @@ def admin_exercises_preview(exercise_id):
         if not abs_path:
             return jsonify({"success": False, "error": "No version file found (and no current.json)"}), 404
 
-        with open(abs_path, "r", encoding="utf-8") as f:
-            payload = json.load(f)
+        payload = json.loads(read_exercise_bytes(abs_path))
 
         # ---------- normalize DnD structure ----------
         if payload.get("type") == "dnd_text":
@@ -1884,10 +1637,9 @@ def admin_exercises_save():
     if not isinstance(items, list):
         items = []
 
-    # Load index and compute next version if not given
-    index_data = _load_exercise_index()
-    ex_list = index_data.get("exercises", [])
-    existing = next((e for e in ex_list if e.get("id") == exercise_id), None)
+    # Look up the record and compute next version if not given
+    lookup = _exercise_lookup()
+    existing = lookup.get(exercise_id)
 
     # Determine version
     req_version = pick("version")
@@ -1897,32 +1649,21 @@ def admin_exercises_save():
         except (TypeError, ValueError):
             return jsonify({"success": False, "error": "version must be an integer"}), 400
     else:
-        if existing and isinstance(existing.get("versions"), list) and existing["versions"]:
-            version = max(v.get("version", 0) for v in existing["versions"]) + 1
-        else:
-            version = 1
+        version = lookup.latest_version(exercise_id) + 1
 
     # Track files explicitly removed by the user so we can unlink them after saving
     deleted_media_paths = []
 
     # ---------- Backfill prior media when not re-uploaded ----------
     prev_items = []
-    if existing and isinstance(existing.get("versions"), list) and existing["versions"]:
-        _ver = existing.get("pinned_version")
-        if not _ver:
-            _ver = max(v.get("version", 0) for v in existing["versions"])
-        _vrow = next((v for v in existing["versions"] if v.get("version") == _ver), None) or existing["versions"][-1]
-        _path = (_vrow or {}).get("path")
-        if _path:
-            _abs = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", _path))
-            if os.path.exists(_abs):
-                try:
-                    with open(_abs, "r", encoding="utf-8") as _f:
-                        _payload_prev = json.load(_f)
-                        if isinstance(_payload_prev.get("items"), list):
-                            prev_items = _payload_prev["items"]
-                except Exception:
-                    prev_items = []
+    _abs = lookup.pinned_path(exercise_id)
+    if _abs and os.path.exists(_abs):
+        try:
+            _payload_prev = json.loads(read_exercise_bytes(_abs))
+            if isinstance(_payload_prev.get("items"), list):
+                prev_items = _payload_prev["items"]
+        except Exception:
+            prev_items = []
 
     # ---------- Handle media uploads (form-data only) ----------
     if request.files:
@@ -2274,37 +2015,42 @@ def admin_exercises_save():
         "meta": meta,
     }
 
-    # Write versioned file
-    rel_path, _abs = _write_versioned_exercise(exercise_id, version, payload)
-
-    # Update index record
-    record = existing or {
-        "id": exercise_id,
-        "type": ex_type,
-        "title": title,
-        "pinned_version": version,
-        "overrides": overrides,
-        "versions": []
-    }
-    record["title"] = title
-    record["type"] = ex_type
-    record.setdefault("versions", [])
-    v_entry = {"version": version, "path": rel_path}
-    found_idx = next((i for i, v in enumerate(record["versions"]) if v.get("version") == version), -1)
-    if found_idx >= 0:
-        record["versions"][found_idx] = v_entry
-    else:
-        record["versions"].append(v_entry)
-        record["versions"].sort(key=lambda v: v.get("version", 0))
-    record["pinned_version"] = version
-
-    if existing:
-        ex_list = [record if e.get("id") == exercise_id else e for e in ex_list]
-    else:
-        ex_list.append(record)
-
-    index_data["exercises"] = ex_list
-    _save_exercise_index(index_data)
+    # Write the version + update the index under the index lock, against a
+    # fresh copy: a concurrent save (or reindex) in another worker may have
+    # landed since we read it above. Only this record changes.
+    with _edit_exercise_index() as idx:
+        existing = idx.get(exercise_id)
+        if req_version is None and existing:
+            latest = idx.latest_version(exercise_id)
+            if latest >= version:
+                # someone else took this version number: save as the next one
+                version = latest + 1
+                payload["version"] = version
+
+        # Write versioned file
+        rel_path, _abs = _write_versioned_exercise(exercise_id, version, payload)
+
+        # Update index record (a new dict: readers may hold the old one)
+        record = dict(existing or {
+            "id": exercise_id,
+            "type": ex_type,
+            "title": title,
+            "pinned_version": version,
+            "overrides": overrides,
+        })
+        record["title"] = title
+        record["type"] = ex_type
+        v_entry = {"version": version, "path": rel_path}
+        versions = list(record.get("versions") or [])
+        if idx.version(exercise_id, version) is not None:
+            versions = [v_entry if v.get("version") == version else v for v in versions]
+        else:
+            versions.append(v_entry)
+            if version < idx.latest_version(exercise_id):
+                versions.sort(key=lambda v: v.get("version", 0))
+        record["versions"] = versions
+        record["pinned_version"] = version
+        idx.put(record)
 
     # -------- Always return JSON so the admin UI never sees an HTML redirect --------
     return jsonify({
@@ -2327,7 +2073,9 @@ def admin_exercises_delete(exercise_id):
       - NEW: Removes folder data/exercises/<type>/<slug>/ (meta.json, current.json, NNN.json)
       - Legacy: removes data/exercises/<exercise_id>@vN.json
       - Removes its record from exercises.index.json
+      - Removes the payload objects (data/exercises/.objects/) its files used
       - Optionally deletes media under static/exercises/media/<exercise_id>/
+        in a background job (poll `purge_status_url` for its outcome)
 
     Body JSON (optional):
       { "purge_media": true|false }   # default: False
@@ -2336,10 +2084,8 @@ def admin_exercises_delete(exercise_id):
         data = request.get_json(silent=True) or {}
         purge_media = bool(data.get("purge_media", False))
 
-        # Load index and find record
-        index_data = _load_exercise_index()
-        ex_list = index_data.get("exercises", [])
-        record = next((e for e in ex_list if e.get("id") == exercise_id), None)
+        # Find the record
+        record = _find_exercise(exercise_id)
         if not record:
             return jsonify({"success": False, "error": "Exercise not found"}), 404
 
@@ -2382,8 +2128,7 @@ def admin_exercises_delete(exercise_id):
                     cand_current = os.path.join(folder, "current.json")
                     if os.path.exists(cand_current):
                         try:
-                            with open(cand_current, "r", encoding="utf-8") as f:
-                                payload = json.load(f) or {}
+                            payload = json.loads(read_exercise_bytes(cand_current)) or {}
                             if str(payload.get("id")) == str(exercise_id):
                                 target_dir = folder
                                 break
@@ -2392,66 +2137,75 @@ def admin_exercises_delete(exercise_id):
                 if target_dir:
                     break
 
-        # --- Delete all version files listed in the index (best-effort) ---
-        for v in version_rows:
-            p = (v or {}).get("path")
-            if not p:
-                continue
-            abs_path = os.path.abspath(os.path.join(project_root, p))
-            try:
-                if os.path.exists(abs_path):
-                    os.remove(abs_path)
-            except Exception:
-                pass
-
-        # --- Remove meta.json and current.json in the resolved folder ---
-        if target_dir and os.path.isdir(target_dir):
-            meta_json = os.path.join(target_dir, "meta.json")
-            current_json = os.path.join(target_dir, "current.json")
-            for f in (meta_json, current_json):
+        # --- Delete the files and the index record under the index lock (no
+        #     save can relink current.json meanwhile); the payload objects the
+        #     files referred to are collected first and removed after ---
+        with _edit_exercise_index() as idx:
+            from .storage import drop_exercise_objects, exercise_object_refs
+            version_rows = (idx.get(exercise_id) or record).get("versions") or []
+            ref_paths = [os.path.abspath(os.path.join(project_root, v["path"]))
+                         for v in version_rows if (v or {}).get("path")]
+            if target_dir:
+                ref_paths.append(os.path.join(target_dir, "current.json"))
+            object_refs = exercise_object_refs(p for p in ref_paths if os.path.isfile(p))
+
+            # --- Delete all version files listed in the index (best-effort) ---
+            for v in version_rows:
+                p = (v or {}).get("path")
+                if not p:
+                    continue
+                abs_path = os.path.abspath(os.path.join(project_root, p))
                 try:
-                    if os.path.exists(f):
-                        os.remove(f)
+                    if os.path.exists(abs_path):
+                        os.remove(abs_path)
                 except Exception:
                     pass
-            # finally remove the folder itself
-            try:
-                shutil.rmtree(target_dir)
-            except Exception:
-                pass
 
-        # --- Legacy cleanup: <id>@vN.json in data/exercises root ---
-        try:
-            legacy_pattern = os.path.join(exercises_root, f"{exercise_id}@v*.json")
-            for fpath in glob.glob(legacy_pattern):
+            # --- Remove meta.json and current.json in the resolved folder ---
+            if target_dir and os.path.isdir(target_dir):
+                meta_json = os.path.join(target_dir, "meta.json")
+                current_json = os.path.join(target_dir, "current.json")
+                for f in (meta_json, current_json):
+                    try:
+                        if os.path.exists(f):
+                            os.remove(f)
+                    except Exception:
+                        pass
+                # finally remove the folder itself
                 try:
-                    os.remove(fpath)
+                    shutil.rmtree(target_dir)
                 except Exception:
                     pass
-        except Exception:
-            pass
 
-        # --- Remove from index and save back ---
-        index_data["exercises"] = [e for e in ex_list if e.get("id") != exercise_id]
-        _save_exercise_index(index_data)
-
-        # --- Optionally purge media folder (legacy media path by id) ---
-        deleted_media = False
-        if purge_media:
-            static_root = os.path.abspath(os.path.join(project_root, "static"))
-            media_dir = os.path.abspath(os.path.join(static_root, "exercises", "media", exercise_id))
+            # --- Legacy cleanup: <id>@vN.json in data/exercises root ---
             try:
-                if os.path.commonpath([media_dir, static_root]) == static_root and os.path.isdir(media_dir):
-                    shutil.rmtree(media_dir)
-                    deleted_media = True
+                legacy_pattern = os.path.join(exercises_root, f"{exercise_id}@v*.json")
+                for fpath in glob.glob(legacy_pattern):
+                    try:
+                        os.remove(fpath)
+                    except Exception:
+                        pass
             except Exception:
                 pass
 
+            idx.remove(exercise_id)
+            deleted_objects = drop_exercise_objects(object_refs)
+
+        # --- Optionally purge media folder (legacy media path by id), as a job ---
+        # (its result, {"deleted": bool, "files": n}, is at purge_status_url)
+        purge_job = purge_status_url = None
+        if purge_media:
+            from . import jobs
+            purge_job = jobs.enqueue("purge_media", {"exercise_id": exercise_id}, dedupe=True)
+            purge_status_url = url_for("admin.admin_job_status", job_id=purge_job)
+
         return jsonify({
             "success": True,
             "deleted": {"id": exercise_id},
-            "deleted_media": deleted_media,
-            "deleted_folder": (target_dir or None)
+            "purge_job": purge_job,
+            "purge_status_url": purge_status_url,
+            "deleted_folder": (target_dir or None),
+            "deleted_objects": deleted_objects,
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -2507,18 +2261,92 @@ def update_glossary_settings():
     return jsonify({"success": True, "settings": saved})
 # === END: Admin endpoints to read/update glossary visibility ===
 
+# === BEGIN: Background jobs (app/jobs.py) ===
+def _job_accepted(job_id):
+    """202 response for a queued job, with where to poll its status."""
+    from . import jobs
+    return jsonify({
+        "success": True,
+        "job": jobs.get(job_id),
+        "status_url": url_for("admin.admin_job_status", job_id=job_id),
+    }), 202
+
+@bp.route("/jobs", methods=["GET"])
+def admin_jobs():
+    """Recent jobs as JSON (?status=queued|running|done|failed, ?limit=)."""
+    from . import jobs
+    status = (request.args.get("status") or "").strip() or None
+    try:
+        limit = max(1, min(500, int(request.args.get("limit", 50))))
+    except ValueError:
+        limit = 50
+    return jsonify({"success": True, "jobs": jobs.queue.list(status, limit)})
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def admin_job_status(job_id):
+    """One job: status (queued/running/done/failed), progress, result or error."""
+    from . import jobs
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job})
+# === END: Background jobs (app/jobs.py) ===
+
+# === BEGIN: Request profiles (app/profiler.py) ===
+@bp.route("/profiles", methods=["GET"])
+def admin_profiles():
+    """Recent request profiles; ?id=<profile id> shows its hottest frames."""
+    from flask import current_app
+    from . import profiler
+    selected = (request.args.get("id") or "").strip()
+    meta = profiler.load_meta(selected) if selected else None
+    return render_template(
+        "admin_profiles.html",
+        enabled=bool(current_app.config.get("PROFILER_TOKEN")),
+        profiles=[m for m in (profiler.load_meta(pid) for pid in profiler.list_ids()) if m],
+        selected=meta,
+        frames=profiler.top_frames(selected) if meta else [],
+    )
+
+@bp.route("/profiles/<profile_id>.collapsed", methods=["GET"])
+def admin_profile_collapsed(profile_id):
+    """Collapsed stacks of one profile (flamegraph.pl / speedscope input)."""
+    from . import profiler
+    path = profiler.collapsed_path(profile_id)
+    if path is None:
+        return jsonify({"success": False, "error": "Profile not found"}), 404
+    return send_from_directory(os.path.dirname(path), os.path.basename(path),
+                               mimetype="text/plain", as_attachment=True)
+# === END: Request profiles (app/profiler.py) ===
+
 @bp.route("/data/glossaries/<country_code>.json")
 def serve_glossary_json(country_code):
     if country_code not in country_map:
         return f"Invalid country code: {country_code}", 404
 
+    from .http_cache import conditional_body, send_data_file
+
+    # SQLite backend: the JSON is an export of the database
+    from .glossary_store import store
+    if store.backend is not None:
+        from .glossary_store import json_export, json_export_gzip
+        snap = store.get(country_map[country_code])
+        if snap is None:
+            return f"No glossary found for {country_code}", 404
+        body, etag = json_export(snap)
+        return conditional_body(body, etag=etag, gzipped=json_export_gzip(snap))
+
+    # Make sure the file reflects edits still waiting for the batched write
+    from .glossary_repo import flush_pending
+    flush_pending(country_map[country_code])
+
     filename = f"{country_map[country_code]}.json"
     glossary_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'glossaries'))
 
     if not os.path.exists(os.path.join(glossary_dir, filename)):
         return f"No glossary found for {country_code}", 404
 
-    return send_from_directory(glossary_dir, filename)
+    return send_data_file(glossary_dir, filename)
 
 # ==== Admin: Home Tiles (list page) ==========================================
 def _tiles_json_path():
@@ -2530,7 +2358,7 @@ def _load_home_tiles():
         return []
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f) or []
+            data = json_load(f, "admin") or []
         # keep only enabled tiles; normalize and sort by "order"
         tiles = []
         for t in data:
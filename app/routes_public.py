@@ -3,6 +3,9 @@ import os
 import json
 from flask import request
 from flask import make_response
+from flask import current_app
+from .glossary_store import country_map, store as glossary_store
+from .metrics import json_load
 
 # === BEGIN: Public Pages loader (flat + foldered) ===
 def _public_pages_path():
@@ -15,7 +18,7 @@ def _public_pages_root():
 def _safe_read_json(path):
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = json_load(f, "public")
         return data
     except Exception:
         return None
@@ -84,7 +87,7 @@ def load_public_glossary_settings(country_map):
         return _public_default_settings(country_map)
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f) or {}
+            data = json_load(f, "public") or {}
         merged = _public_default_settings(country_map)
         # keep only known codes, coerce to bool
         for code in country_map.keys():
@@ -95,31 +98,6 @@ def load_public_glossary_settings(country_map):
         return _public_default_settings(country_map)
 # === END: public-side loader for glossary visibility settings ===
 
-# Map country codes to JSON file base names
-country_map = {
-    "ar": "glosario-regional-argentina",
-    "bo": "glosario-regional-bolivia",
-    "cl": "glosario-regional-chile",
-    "co": "glosario-regional-colombia",
-    "cr": "glosario-regional-costa_rica",
-    "cu": "glosario-regional-cuba",
-    "do": "glosario-regional-republica_dominicana",
-    "ec": "glosario-regional-ecuador",
-    "sv": "glosario-regional-el_salvador",
-    "gq": "glosario-regional-guinea_ecuatorial",
-    "gt": "glosario-regional-guatemala",
-    "hn": "glosario-regional-honduras",
-    "mx": "glosario-regional-mexico",
-    "ni": "glosario-regional-nicaragua",
-    "pa": "glosario-regional-panama",
-    "py": "glosario-regional-paraguay",
-    "pe": "glosario-regional-peru",
-    "pr": "glosario-regional-puerto_rico",
-    "es": "glosario-regional-espana",
-    "uy": "glosario-regional-uruguay",
-    "ve": "glosario-regional-venezuela"
-}
-
 # 🆕 New: map country codes to default glossary colors
 country_colors = {
     "ar": "#74ACDF",  # Argentina blue
@@ -189,7 +167,7 @@ def _public_load_pages():
     if os.path.exists(path):
         try:
             with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f) or []
+                data = json_load(f, "public") or []
             if isinstance(data, list):
                 flat = [p for p in data if isinstance(p, dict)]
         except Exception:
@@ -209,7 +187,7 @@ def _public_load_pages():
                     continue
                 try:
                     with open(page_json, "r", encoding="utf-8") as f:
-                        obj = json.load(f)
+                        obj = json_load(f, "public")
                     if isinstance(obj, dict):
                         foldered.append(obj)
                 except Exception:
@@ -270,6 +248,12 @@ def _set_cached_tiles(lang, tiles):
     _tiles_cache[lang] = tiles
     _tiles_cache_time[lang] = time()
 
+# Hit/miss counts of the homepage tiles cache in index() (exported at /metrics)
+_tiles_stats = {"hits": 0, "misses": 0}
+
+def tiles_cache_stats():
+    return dict(_tiles_stats)
+
 @bp.route("/")
 def index():
     """
@@ -296,12 +280,14 @@ def index():
         # Serve from cache if valid
         if current_mtime >= 0 and cache.get(lang, {}).get("tiles") is not None and cache[lang].get("mtime") == current_mtime:
             tiles = cache[lang]["tiles"]
+            _tiles_stats["hits"] += 1
         else:
+            _tiles_stats["misses"] += 1
             # (Re)load from disk
             loaded_tiles = []
             if os.path.exists(tiles_path):
                 with open(tiles_path, "r", encoding="utf-8") as f:
-                    raw = json.load(f) or []
+                    raw = json_load(f, "public") or []
                     if isinstance(raw, list):
                         normd = []
                         for t in raw:
@@ -375,15 +361,12 @@ def glosarios_index():
     settings = load_public_glossary_settings(country_map)
     enabled_codes = {code for code, on in settings.items() if on}
 
-    # Build a clean, ordered list of countries we actually have files for AND are enabled
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "glossaries"))
+    # Build a clean, ordered list of countries we actually have glossaries for AND are enabled
     items = []
     for cc, base in country_map.items():
         if cc not in enabled_codes:
             continue  # skip disabled glossaries
-        filename = f"{base}.json"
-        path = os.path.join(base_dir, filename)
-        if os.path.exists(path):
+        if glossary_store.exists(base):
             items.append({
                 "code": cc,
                 "name": country_names.get(cc, cc.upper()),
@@ -408,20 +391,38 @@ def glosario(country_code):
     if not settings.get(country_code, False):
         return "Este glosario todavía no está disponible.", 404
 
-    filename = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "glossaries", filename)
-
-    if not os.path.exists(data_path):
+    # Entries come pre-sorted (accent/case-insensitive) from the shared store
+    snap = glossary_store.get(country_map[country_code])
+    if snap is None:
         abort(404, description=f"No glossary found for {country_code}")
-
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f)
-
-    # Sort entries alphabetically by 'word', ignoring accents and case
-    import unicodedata
-    def normalize_for_sort(s):
-        return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").lower()
-    entries.sort(key=lambda e: normalize_for_sort(e.get("word", "")))
+    entries = snap.entries
+
+    # Big glossaries render one page of one letter bucket at a time; the
+    # template fetches the following pages from /api/<cc>/entries on scroll.
+    paging = None
+    size = current_app.config.get("GLOSSARY_PAGE_SIZE", 200)
+    letter = _page_letter(request.args.get("letter"))
+    page = _page_number(request.args.get("page"))
+    if size > 0 and (len(entries) > size or letter or page):
+        from .page_index import get_page_index
+        idx = get_page_index(snap)
+        w = (request.args.get("w") or "").strip()
+        if w and not letter and not page:
+            # ?w=slug deep link: open on the page that holds the entry
+            found = idx.locate(w, size)
+            if found:
+                letter, page = found
+        page = min(page or 1, idx.pages(letter, size))
+        entries, total, pages = idx.page(letter, page, size)
+        paging = {
+            "letter": letter,
+            "page": page,
+            "pages": pages,
+            "total": total,
+            "size": size,
+            "letters": idx.letters,
+            "count_all": idx.count(),
+        }
 
     # ✅ Accent color for this country
     accent_color = country_colors.get(country_code, "#2563eb")
@@ -433,12 +434,75 @@ def glosario(country_code):
     return render_template(
         "public_glosario.html",
         entries=entries,
+        snapshot=snap,
+        paging=paging,
         country_code=country_code,
         accent_color=accent_color,
         country_color=accent_color,  # back-compat
         enabled_glossaries=enabled_glossaries
     )
 
+def _page_letter(s):
+    """?letter= value: "A".."Z", "#" or "" (all)."""
+    s = (s or "").strip().upper()
+    return s if len(s) == 1 and ("A" <= s <= "Z" or s == "#") else ""
+
+def _page_number(s):
+    """?page= value: a positive int, or 0 when missing/invalid."""
+    try:
+        return max(0, int(s or 0))
+    except ValueError:
+        return 0
+
+@bp.route("/api/<country_code>/entries")
+def api_entries(country_code):
+    """
+    Glossary entries one page at a time (used by the paged /<cc>/glosario view).
+      /api/ar/entries?letter=B&page=2      -> page 2 of the "B" bucket
+      /api/ar/entries?page=3&size=100      -> page 3 of the whole glossary
+      /api/ar/entries?slug=boludo,che      -> those entries (deep links, linked words)
+      /api/ar/entries?q=mate               -> best matches for a search box query
+    """
+    if country_code not in country_map:
+        abort(404, description=f"Invalid country code: {country_code}")
+
+    settings = load_public_glossary_settings(country_map)
+    if not settings.get(country_code, False):
+        abort(404, description=f"Glossary not available: {country_code}")
+
+    snap = glossary_store.get(country_map[country_code])
+    if snap is None:
+        abort(404, description=f"No glossary found for {country_code}")
+
+    from .page_index import get_page_index
+    idx = get_page_index(snap)
+    default_size = current_app.config.get("GLOSSARY_PAGE_SIZE", 200) or 200
+    size = min(_page_number(request.args.get("size")) or default_size, 1000)
+
+    slugs = [s.strip() for s in (request.args.get("slug") or "").split(",") if s.strip()]
+    q = (request.args.get("q") or "").strip()
+    if slugs:
+        entries = idx.by_slugs(slugs[:size])
+        payload = {"country_code": country_code, "count": len(entries), "entries": entries}
+    elif q:
+        from .search_index import get_index
+        entries = [e for _score, _pos, e in get_index(snap).search(q, limit=size)]
+        payload = {"country_code": country_code, "query": q, "count": len(entries), "entries": entries}
+    else:
+        letter = _page_letter(request.args.get("letter"))
+        page = _page_number(request.args.get("page")) or 1
+        entries, total, pages = idx.page(letter, page, size)
+        payload = {
+            "country_code": country_code,
+            "letter": letter,
+            "page": page,
+            "pages": pages,
+            "total": total,
+            "next_page": page + 1 if page < pages else None,
+            "entries": entries,
+        }
+    return (json.dumps(payload, ensure_ascii=False), 200, {"Content-Type": "application/json"})
+
 # 🆕 NEW route: list all entries by source
 @bp.route("/<country_code>/source/<kind>/<slug>")
 def entries_by_source(country_code, kind, slug):
@@ -448,46 +512,15 @@ def entries_by_source(country_code, kind, slug):
     if country_code not in country_map:
         abort(404, description=f"Invalid country code: {country_code}")
 
-    filename = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "glossaries", filename)
-    if not os.path.exists(data_path):
+    snap = glossary_store.get(country_map[country_code])
+    if snap is None:
         abort(404, description=f"No glossary found for {country_code}")
 
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f)
+    # collect only entries that reference this source (via the source index)
+    from .source_index import get_source_index
+    results = get_source_index(snap).entries_for_slug(kind, slug)
 
-    # helpers
-    import unicodedata, re
-    def slugify(text):
-        t = unicodedata.normalize("NFD", text or "").encode("ascii", "ignore").decode("ascii").lower()
-        t = t.replace("ñ", "n")
-        t = re.sub(r"[^a-z0-9]+", "-", t)
-        t = re.sub(r"(^-|-$)+", "", t)
-        return t
-
-    # collect only entries that reference this source
-    results = []
-    target_kind = (kind or "").lower()
-    for e in entries:
-        matched = False
-        for s in (e.get("senses") or []):
-            if matched: break
-            for ex in (s.get("examples") or []):
-                src = ex.get("source") or {}
-                if not isinstance(src, dict):
-                    continue
-                if (src.get("kind") or "").lower() != target_kind:
-                    continue
-                src_slug = slugify(src.get("title") or src.get("song") or src.get("handle") or src.get("text") or "")
-                if src_slug == slug:
-                    results.append(e)
-                    matched = True
-                    break
-
-    # sort results by word (accent-insensitive)
-    def normalize_for_sort(s):
-        return unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii").lower()
-    results.sort(key=lambda e: normalize_for_sort(e.get("word", "")))
+    # results keep the store's order, i.e. already sorted by word (accent-insensitive)
 
     # ✅ Respect enable/disable settings BEFORE rendering
     settings = load_public_glossary_settings(country_map)
@@ -514,13 +547,28 @@ def serve_glossary_json(country_code):
     if country_code not in country_map:
         abort(404, description=f"Invalid country code: {country_code}")
 
+    from .glossary_store import json_export, json_export_gzip
+    from .http_cache import conditional_body, send_data_file
+
+    # SQLite backend: the JSON is an export of the database
+    if glossary_store.backend is not None:
+        snap = glossary_store.get(country_map[country_code])
+        if snap is None:
+            abort(404, description=f"No glossary found for {country_code}")
+        body, etag = json_export(snap)
+        return conditional_body(body, etag=etag, gzipped=json_export_gzip(snap))
+
+    # Admin edits are written in batches; make sure the file is current
+    from .glossary_repo import flush_pending
+    flush_pending(country_map[country_code])
+
     filename = f"{country_map[country_code]}.json"
     glossary_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "glossaries"))
 
     if not os.path.exists(os.path.join(glossary_dir, filename)):
         abort(404, description=f"No glossary found for {country_code}")
 
-    return send_from_directory(glossary_dir, filename)
+    return send_data_file(glossary_dir, filename)
 
 # === BEGIN: Serve versioned exercises JSON ===
 def _public_exercises_root():
@@ -550,7 +598,9 @@ def serve_exercise_json(region, filename):
     if not os.path.exists(file_path):
         abort(404, description="Exercise not found")
 
-    return send_from_directory(region_dir, filename)
+    # <id>_v<N>.json never changes once written
+    from .http_cache import PINNED, send_data_file
+    return send_data_file(region_dir, filename, PINNED)
 # === END: Serve versioned exercises JSON ===
 
 # === BEGIN: Serve versioned exercises JSON (flat, no region) ===
@@ -558,33 +608,31 @@ def serve_exercise_json(region, filename):
 def serve_exercise_json_flat(filename):
     """
     Serves a versioned exercise JSON without region:
-      /data/exercises/<exercise_id>@v<version>.json
-
-    If not found at the root, it will also look in any 1-level subfolder
-    (so existing regional subfolders keep working).
+      /data/exercises/<exercise_id>_v<version>.json
+
+    Resolved with a dict lookup in the (id, version) → file map kept next to
+    the exercise index (app/exercise_index.py): legacy <id>_v<N>.json files at
+    the root or in any 1-level subfolder (so existing regional subfolders keep
+    working), then the versions listed in the index. Unknown names are
+    remembered for EXERCISE_FILE_MISS_TTL seconds instead of probing the
+    folders on every request.
     """
     import re
-    root_dir = _public_exercises_root()
+    from .http_cache import PINNED
+    from .exercise_index import exercise_files
 
-    # Basic filename safety: <id>@v<integer>.json
+    # Basic filename safety: <id>_v<integer>.json
     if not re.fullmatch(r"[A-Za-z0-9_-]+_v[0-9]+\.json", filename):
         abort(404, description="Invalid filename")
 
-    # 1) Try root
-    root_path = os.path.join(root_dir, filename)
-    if os.path.exists(root_path):
-        return send_from_directory(root_dir, filename)
-
-    # 2) Try any immediate subfolder (e.g., legacy regional dirs)
-    for entry in os.listdir(root_dir):
-        subdir = os.path.join(root_dir, entry)
-        if not os.path.isdir(subdir):
-            continue
-        candidate = os.path.join(subdir, filename)
-        if os.path.exists(candidate):
-            return send_from_directory(subdir, filename)
-
-    abort(404, description="Exercise not found")
+    path = exercise_files.resolve(filename)
+    if path is None:
+        abort(404, description="Exercise not found")
+    # index versions may be pointers into the object store or deltas
+    try:
+        return _send_exercise_file(os.path.dirname(path), os.path.basename(path), PINNED)
+    except (OSError, ValueError):
+        abort(404, description="Exercise not found")
 # === END: Serve versioned exercises JSON (flat, no region) ===
 
 # ===== NEW: entries filtered by source (episode or whole series, etc.) =====
@@ -619,84 +667,38 @@ def api_entries_by_source(country_code):
         except Exception: return None
     year_i, season_i, episode_i = as_int(year), as_int(season), as_int(episode)
 
-    # load country glossary
-    filename = f"{country_map[country_code]}.json"
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "glossaries", filename)
-    if not os.path.exists(data_path):
-        abort(404, description=f"No glossary found for {country_code}")
-    with open(data_path, "r", encoding="utf-8") as f:
-        entries = json.load(f)
-
-    # helpers
-    import unicodedata, re
-    def normalize_str(s):
-        s = unicodedata.normalize("NFD", s or "")
-        s = s.encode("ascii", "ignore").decode("ascii")
-        return s.lower().strip()
-
-    def slugify(text):
-        t = unicodedata.normalize("NFD", text or "").encode("ascii", "ignore").decode("ascii").lower()
-        t = t.replace("ñ", "n")
-        t = re.sub(r"[^a-z0-9]+", "-", t)
-        t = re.sub(r"(^-|-$)+", "", t)
-        return t
-
-    def source_matches(src):
-        if not isinstance(src, dict): return False
-        k = normalize_str(src.get("kind"))
-        if kind and k != normalize_str(kind): return False
-
-        if k == "serie":
-            if title and normalize_str(src.get("title")) != normalize_str(title): return False
-            if season_i is not None and as_int(src.get("season")) != season_i:   return False
-            if episode_i is not None and as_int(src.get("episode")) != episode_i:return False
-            return True
-
-        if k == "pelicula":
-            if title and normalize_str(src.get("title")) != normalize_str(title): return False
-            if year_i is not None and as_int(src.get("year")) != year_i:         return False
-            return True
-
-        if k == "redes":
-            if handle and normalize_str(src.get("handle")) != normalize_str(handle): return False
-            if not handle and title and normalize_str(src.get("handle")) != normalize_str(title): return False
-            return True
-
-        if k == "cancion":
-            target_song = song or title
-            if target_song and normalize_str(src.get("song")) != normalize_str(target_song): return False
-            if artist and normalize_str(src.get("artist")) != normalize_str(artist):         return False
-            return True
-
-        if k == "otro":
-            if text and normalize_str(src.get("text")) != normalize_str(text): return False
-            if not text and title and normalize_str(src.get("text")) != normalize_str(title): return False
-            return True
-
-        # fallback: try title/handle/text match if provided
-        if title and normalize_str(src.get("title") or src.get("handle") or src.get("text") or "") != normalize_str(title):
-            return False
-        return True
+    from .glossary_store import entry_slug
+    from .glossary_sqlite import get_backend
+
+    backend = get_backend()
+    if backend is not None:
+        # SQLite backend: one indexed query on the sources table
+        if not backend.exists(country_map[country_code]):
+            abort(404, description=f"No glossary found for {country_code}")
+        matches = backend.match_sources(
+            country_map[country_code], kind=kind, title=title, year=year_i, season=season_i,
+            episode=episode_i, handle=handle, song=song, artist=artist, text=text)
+    else:
+        # load country glossary (cached, pre-sorted)
+        snap = glossary_store.get(country_map[country_code])
+        if snap is None:
+            abort(404, description=f"No glossary found for {country_code}")
+
+        # matching examples come from the per-glossary source index, in glossary
+        # order (already sorted by word, accent-insensitive)
+        from .source_index import get_source_index
+        matches = [(snap.entries[pos], n) for pos, n in get_source_index(snap).match(
+            kind=kind, title=title, year=year_i, season=season_i, episode=episode_i,
+            handle=handle, song=song, artist=artist, text=text)]
 
     results = []
-    for e in entries:
-        match_count = 0
-        for s in (e.get("senses") or []):
-            for ex in (s.get("examples") or []):
-                if source_matches(ex.get("source")):
-                    match_count += 1
-        if match_count:
-            results.append({
-                "word": e.get("word", ""),
-                "slug": e.get("slug") or slugify(e.get("word", "")),
-                "audio": e.get("audio") or "",
-                "matches": match_count
-            })
-
-    # sort by word (accent-insensitive), then by matches desc
-    def normkey(w):
-        return unicodedata.normalize("NFKD", w or "").encode("ascii", "ignore").decode("ascii").lower()
-        results.sort(key=lambda r: (normkey(r.get("word", "")), -int(r.get("matches", 0) or 0)))
+    for e, match_count in matches:
+        results.append({
+            "word": e.get("word", ""),
+            "slug": entry_slug(e),
+            "audio": e.get("audio") or "",
+            "matches": match_count
+        })
 
     payload = {
         "country_code": country_code,
@@ -707,24 +709,53 @@ def api_entries_by_source(country_code):
     }
     return (json.dumps(payload), 200, {"Content-Type": "application/json"})
 
+@bp.route("/api/<country_code>/sources")
+def api_sources(country_code):
+    """
+    JSON catalog of every source cited in one country's examples
+    (series, films, songs, social handles, ...), with entry/example counts.
+      /api/ar/sources
+      /api/ar/sources?kind=serie
+    """
+    if country_code not in country_map:
+        abort(404, description=f"Invalid country code: {country_code}")
+
+    settings = load_public_glossary_settings(country_map)
+    if not settings.get(country_code, False):
+        abort(404, description=f"Glossary not available: {country_code}")
+
+    snap = glossary_store.get(country_map[country_code])
+    if snap is None:
+        abort(404, description=f"No glossary found for {country_code}")
+
+    from .source_index import get_source_index, norm
+    sources = get_source_index(snap).catalog()
+    kind = norm(request.args.get("kind"))
+    if kind:
+        sources = [src for src in sources if norm(src.get("kind")) == kind]
+
+    payload = {"country_code": country_code, "count": len(sources), "sources": sources}
+    return (json.dumps(payload), 200, {"Content-Type": "application/json"})
+
 @bp.route("/search")
 def global_search():
     """
     Global search across all regional glossaries.
-    Query param: ?q=term
+    Query params:
+      ?q=term
+      ?mode=fuzzy   (optional) typo-tolerant match on headwords/variants,
+                    e.g. "voludo" → "boludo", "chavon" → "chabón"
     Returns JSON: {"query": "...", "results": [{"country_code": "ar", "country_name": "Argentina", "word": "boludo", "slug": "boludo"}]}
+    (fuzzy results also carry "distance")
     """
     q = (request.args.get("q") or "").strip()
+    mode = (request.args.get("mode") or "").strip().lower()
     if not q:
         return (json.dumps({"query": "", "results": []}), 200, {"Content-Type": "application/json"})
-    # normalize needle
-    import unicodedata, re
-    def normalize(s):
-        s = unicodedata.normalize("NFD", s or "")
-        s = s.encode("ascii", "ignore").decode("ascii")
-        return s.lower()
 
-    needle = normalize(q)
+    import re, unicodedata, heapq
+    from .search_index import get_index
+    from .fuzzy_index import get_trigram_index
 
     def slugify(text):
         t = unicodedata.normalize("NFD", text or "").encode("ascii", "ignore").decode("ascii").lower()
@@ -733,63 +764,101 @@ def global_search():
         t = re.sub(r"(^-|-$)+", "", t)
         return t
 
+    country_names = {
+        "ar": "Argentina","bo": "Bolivia","cl": "Chile","co": "Colombia","cr": "Costa Rica",
+        "cu": "Cuba","do": "República Dominicana","ec": "Ecuador","sv": "El Salvador",
+        "gq": "Guinea Ecuatorial","gt": "Guatemala","hn": "Honduras","mx": "México",
+        "ni": "Nicaragua","pa": "Panamá","py": "Paraguay","pe": "Perú","pr": "Puerto Rico",
+        "es": "España","uy": "Uruguay","ve": "Venezuela"
+    }
+
+    # Each country answers from its own index (top N); then keep the best N
+    # overall (best rank first, country order on ties).
+    fuzzy = (mode == "fuzzy")
+    limit = 20 if fuzzy else 100
+    hits = []
+
+    from .glossary_sqlite import get_backend
+    backend = get_backend()
+    if backend is not None and not fuzzy:
+        # SQLite backend: one FTS5 query across every country, already ranked
+        cc_by_base = {base: cc for cc, base in country_map.items()}
+        for rank, (base, e) in enumerate(backend.search(list(country_map.values()), q, limit=limit)):
+            hits.append((rank, 0, 0, cc_by_base[base], e, None))
+    else:
+        for order, (cc, base) in enumerate(country_map.items()):
+            try:
+                snap = glossary_store.get(base)
+            except Exception:
+                continue
+            if snap is None or not snap.entries:
+                continue
+            if fuzzy:
+                for dist, sim, pos, e in get_trigram_index(snap).search(q, limit=limit):
+                    hits.append(((dist, -sim), order, pos, cc, e, dist))
+            else:
+                for score, pos, e in get_index(snap).search(q, limit=limit):
+                    hits.append((-score, order, pos, cc, e, None))
+
     results = []
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "glossaries"))
+    for _rank, _order, _pos, cc, e, dist in heapq.nsmallest(limit, hits, key=lambda h: h[:3]):
+        row = {
+            "country_code": cc,
+            "country_name": country_names.get(cc, cc.upper()),
+            "word": e.get("word", ""),
+            "slug": e.get("slug") or slugify(e.get("word", "")),
+        }
+        if fuzzy:
+            row["distance"] = dist
+        results.append(row)
 
-    for cc, base in country_map.items():
-        path = os.path.join(base_dir, f"{base}.json")
-        if not os.path.exists(path):
-            continue
+    payload = {"query": q, "results": results}
+    if fuzzy:
+        payload["mode"] = "fuzzy"
+    return (json.dumps(payload), 200, {"Content-Type": "application/json"})
+
+@bp.route("/api/suggest")
+def api_suggest():
+    """
+    Prefix autocomplete over headwords and variant forms (accent-insensitive).
+    Query params:
+      ?q=bol          prefix typed so far
+      ?cc=ar,uy       (optional) country codes; default: every glossary
+      ?limit=10       (optional) max suggestions, 1..50
+    Returns JSON: {"query": "bol", "results": [{"country_code": "ar", "word": "boludo", "match": "boluda", "slug": "boludo"}]}
+    """
+    import heapq
+    from .suggest_index import get_suggest_index
+
+    q = request.args.get("q") or ""
+    try:
+        limit = max(1, min(50, int(request.args.get("limit") or 10)))
+    except ValueError:
+        limit = 10
+    codes = [c.strip().lower() for c in (request.args.get("cc") or "").split(",") if c.strip()]
+    codes = [c for c in codes if c in country_map] or list(country_map.keys())
+
+    if not q.strip():
+        return (json.dumps({"query": q, "results": []}), 200, {"Content-Type": "application/json"})
+
+    # per-country sorted runs → merged by key, first `limit` overall
+    runs = []
+    for cc in codes:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                entries = json.load(f)
+            snap = glossary_store.get(country_map[cc])
         except Exception:
             continue
+        if snap is None or not snap.entries:
+            continue
+        runs.append([(row, cc) for row in get_suggest_index(snap).prefix(q, limit)])
 
-        for e in entries:
-            # build searchable text
-            hay = e.get("word", "") + " "
-            v = e.get("variants", {}) or {}
-            for k in ("ms", "mp", "fs", "fp", "diminutivo", "aumentativo"):
-                arr = v.get(k) or []
-                if isinstance(arr, list):
-                    hay += " " + " ".join(arr)
-            senses = e.get("senses") or []
-            if isinstance(senses, list):
-                for s in senses:
-                    if isinstance(s, dict):
-                        if s.get("definition"):
-                            hay += " " + s["definition"]
-                        eq = s.get("equivalents") or []
-                        if isinstance(eq, list):
-                            hay += " " + " ".join(eq)
-                        exs = s.get("examples") or []
-                        if isinstance(exs, list):
-                            for ex in exs:
-                                if isinstance(ex, dict):
-                                    hay += " " + (ex.get("es") or "") + " " + (ex.get("en") or "")
-
-            if needle in normalize(hay):
-                results.append({
-                    "country_code": cc,
-                    "country_name": {
-                        "ar": "Argentina","bo": "Bolivia","cl": "Chile","co": "Colombia","cr": "Costa Rica",
-                        "cu": "Cuba","do": "República Dominicana","ec": "Ecuador","sv": "El Salvador",
-                        "gq": "Guinea Ecuatorial","gt": "Guatemala","hn": "Honduras","mx": "México",
-                        "ni": "Nicaragua","pa": "Panamá","py": "Paraguay","pe": "Perú","pr": "Puerto Rico",
-                        "es": "España","uy": "Uruguay","ve": "Venezuela"
-                    }.get(cc, cc.upper()),
-                    "word": e.get("word", ""),
-                    "slug": e.get("slug") or slugify(e.get("word", "")),
-                })
-                # keep response snappy
-                if len(results) >= 100:
-                    break
-        if len(results) >= 100:
+    results = []
+    for (key, _variant, form, word, slug), cc in heapq.merge(*runs, key=lambda r: r[0][:2]):
+        results.append({"country_code": cc, "word": word, "match": form, "slug": slug})
+        if len(results) >= limit:
             break
 
-    payload = {"query": q, "results": results}
-    return (json.dumps(payload), 200, {"Content-Type": "application/json"})
+    return (json.dumps({"query": q, "results": results}), 200, {"Content-Type": "application/json"})
 
 @bp.route("/pages", methods=["GET"])
 def public_pages_index():
@@ -864,6 +933,25 @@ def public_page(slug):
 # === END: Public Page view ===
 
 # === BEGIN: Serve new foldered exercises (type/slug) ===
+def _send_exercise_file(folder, filename, policy=None):
+    """
+    send_data_file for an exercise JSON that may be a pointer into the
+    content-addressed store (data/exercises/.objects/): the object's bytes
+    are sent, under this URL's cache policy. Delta versions are rebuilt.
+    """
+    from .http_cache import REVALIDATE, conditional_body, send_data_file
+    from .storage import read_exercise_bytes, resolve_exercise_file
+
+    policy = policy or REVALIDATE
+    path = os.path.join(folder, filename)
+    full = resolve_exercise_file(path)
+    if full is None:
+        # same ETag the bytes would get as a file (http_cache.file_digest)
+        import hashlib
+        data = read_exercise_bytes(path)
+        return conditional_body(data, etag=hashlib.blake2b(data, digest_size=16).hexdigest(), policy=policy)
+    return send_data_file(os.path.dirname(full), os.path.basename(full), policy)
+
 @bp.route("/data/exercises/<ex_type>/<slug>/current.json")
 def serve_exercise_current_by_type_slug(ex_type, slug):
     """
@@ -894,14 +982,11 @@ def serve_exercise_current_by_type_slug(ex_type, slug):
     except Exception:
         abort(404, description="Exercise folder not found")
 
-    # 1) Prefer current.json
+    # 1) Prefer current.json (changes on every save: always revalidated)
     current_name = "current.json"
     current_path = os.path.join(folder, current_name)
     if os.path.exists(current_path):
-        rv = send_from_directory(folder, current_name)
-        # avoid stale caches while editing
-        rv.headers["Cache-Control"] = "no-store"
-        return rv
+        return _send_exercise_file(folder, current_name)
 
     # 2) Fallback to latest numeric NNN.json (e.g., 001.json, 012.json)
     try:
@@ -911,11 +996,31 @@ def serve_exercise_current_by_type_slug(ex_type, slug):
         ]
         if numeric:
             latest = sorted(numeric, key=lambda x: int(x[:-5]))[-1]
-            rv = send_from_directory(folder, latest)
-            rv.headers["Cache-Control"] = "no-store"
-            return rv
+            return _send_exercise_file(folder, latest)
     except Exception:
         pass
 
     abort(404, description="Exercise JSON not found")
+
+@bp.route("/data/exercises/<ex_type>/<slug>/<version>.json")
+def serve_exercise_version_by_type_slug(ex_type, slug, version):
+    """
+    Serve one pinned version of a foldered exercise:
+      data/exercises/<type>/<slug>/NNN.json
+    A version file never changes once written, so it is cached long-term.
+    """
+    import re
+    from .http_cache import PINNED
+
+    ex_type = (ex_type or "").strip().lower()
+    slug    = (slug or "").strip().lower()
+    if not re.fullmatch(r"[a-z0-9_-]+", ex_type) or not re.fullmatch(r"[a-z0-9_-]+", slug):
+        abort(404, description="Invalid exercise path")
+    if not re.fullmatch(r"[0-9]{1,6}", version or ""):
+        abort(404, description="Invalid version")
+
+    folder = os.path.join(_public_exercises_root(), ex_type, slug)
+    if not os.path.isfile(os.path.join(folder, f"{version}.json")):
+        abort(404, description="Exercise version not found")
+    return _send_exercise_file(folder, f"{version}.json", PINNED)
 # === END: Serve new foldered exercises (type/slug) ===
\ No newline at end of file
@@ -0,0 +1,152 @@
+# app/search_index.py
+from __future__ import annotations
+
+import re
+import heapq
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from .glossary_store import GlossarySnapshot, entry_hash, fold
+
+# Per-field weights: a headword hit must outrank a hit inside an example.
+FIELD_WEIGHTS = {
+    "word": 100,
+    "variants": 60,
+    "equivalents": 30,
+    "definition": 15,
+    "examples": 5,
+}
+# Bonus when the query token is a whole token (not just a prefix of one)
+EXACT_TOKEN_BONUS = 0.5
+# Bonus when the whole (folded) query equals the headword
+HEADWORD_BONUS = 1000
+
+VARIANT_KEYS = ("ms", "mp", "fs", "fp", "diminutivo", "aumentativo")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-fold + lowercase `text` and split it into [a-z0-9]+ tokens."""
+    return _TOKEN_RE.findall(fold(text))
+
+
+def entry_fields(e: dict) -> Dict[str, List[str]]:
+    """
+    Collect the searchable strings of a glossary entry, grouped by field
+    (same sources the old haystack concatenated, minus definition HTML tags).
+    """
+    fields = {k: [] for k in FIELD_WEIGHTS}
+    fields["word"].append(e.get("word") or "")
+    v = e.get("variants") or {}
+    if isinstance(v, dict):
+        for k in VARIANT_KEYS:
+            arr = v.get(k) or []
+            if isinstance(arr, list):
+                fields["variants"].extend(x for x in arr if isinstance(x, str))
+    senses = e.get("senses") or []
+    if isinstance(senses, list):
+        for s in senses:
+            if not isinstance(s, dict):
+                continue
+            if isinstance(s.get("definition"), str):
+                fields["definition"].append(_TAG_RE.sub(" ", s["definition"]))
+            eq = s.get("equivalents") or []
+            if isinstance(eq, list):
+                fields["equivalents"].extend(x for x in eq if isinstance(x, str))
+            exs = s.get("examples") or []
+            if isinstance(exs, list):
+                for ex in exs:
+                    if isinstance(ex, dict):
+                        fields["examples"].append(ex.get("es") or "")
+                        fields["examples"].append(ex.get("en") or "")
+    return fields
+
+
+def entry_terms(e: dict) -> Dict[str, int]:
+    """Map each token of an entry to the weight of the best field it occurs in."""
+    terms: Dict[str, int] = {}
+    for field, texts in entry_fields(e).items():
+        w = FIELD_WEIGHTS[field]
+        for text in texts:
+            for tok in tokenize(text):
+                if terms.get(tok, 0) < w:
+                    terms[tok] = w
+    return terms
+
+
+class InvertedIndex:
+    """
+    Token → {entry position: weight} postings for one glossary snapshot,
+    plus a sorted vocabulary so query tokens can be matched as prefixes
+    with two bisects instead of a scan.
+    """
+
+    def __init__(self, snapshot: GlossarySnapshot, previous: Optional["InvertedIndex"] = None):
+        self.entries = snapshot.entries
+        self.headwords = [" ".join(tokenize(e.get("word", ""))) for e in self.entries]
+        # per-entry terms, keyed by entry content so a reload only re-tokenizes
+        # the entries that actually changed
+        reuse = previous.terms_by_hash if previous is not None else {}
+        self.terms_by_hash: Dict[str, Dict[str, int]] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.reused = 0
+        for pos, e in enumerate(self.entries):
+            h = entry_hash(e)
+            terms = reuse.get(h)
+            if terms is None:
+                terms = entry_terms(e)
+            else:
+                self.reused += 1
+            self.terms_by_hash[h] = terms
+            for tok, w in terms.items():
+                self.postings.setdefault(tok, {})[pos] = w
+        self.vocab = sorted(self.postings)
+
+    def _expand(self, tok: str) -> List[str]:
+        """Vocabulary tokens starting with `tok`."""
+        lo = bisect_left(self.vocab, tok)
+        hi = bisect_left(self.vocab, tok + "\x7f", lo)
+        return self.vocab[lo:hi]
+
+    def _match(self, tok: str) -> Dict[int, float]:
+        """Best score per entry for one query token (prefix match)."""
+        scores: Dict[int, float] = {}
+        for t in self._expand(tok):
+            bonus = 1 + EXACT_TOKEN_BONUS if t == tok else 1
+            for pos, w in self.postings[t].items():
+                sc = w * bonus
+                if scores.get(pos, 0) < sc:
+                    scores[pos] = sc
+        return scores
+
+    def search(self, query: str, limit: int = 100) -> List[Tuple[float, int, dict]]:
+        """
+        Entries containing every query token (as a token prefix), best first.
+        Returns [(score, position, entry)], ties broken alphabetically.
+        """
+        toks = tokenize(query)
+        if not toks:
+            return []
+        matches = sorted((self._match(t) for t in dict.fromkeys(toks)), key=len)
+        total = matches[0]
+        for m in matches[1:]:
+            if not total:
+                break
+            total = {pos: sc + m[pos] for pos, sc in total.items() if pos in m}
+        if not total:
+            return []
+
+        needle = " ".join(toks)
+        ranked = heapq.nsmallest(
+            limit,
+            ((-(sc + (HEADWORD_BONUS if self.headwords[pos] == needle else 0)), pos)
+             for pos, sc in total.items()),
+        )
+        return [(-neg, pos, self.entries[pos]) for neg, pos in ranked]
+
+
+def get_index(snapshot: GlossarySnapshot) -> InvertedIndex:
+    """Inverted index for `snapshot`, built on first use and reused after."""
+    return snapshot.derive("inverted_index", InvertedIndex)
@@ -0,0 +1,188 @@
+# app/source_index.py
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from .glossary_store import GlossarySnapshot, entry_hash, fold, slugify
+
+# Which source field names a source, per kind (fallback: title/handle/text)
+NAME_FIELD = {
+    "serie": "title",
+    "pelicula": "title",
+    "redes": "handle",
+    "cancion": "song",
+    "otro": "text",
+}
+
+
+def norm(s) -> str:
+    """Accent-folded, lowercased, stripped (same as the by-source API)."""
+    return fold(s if isinstance(s, str) else ("" if s is None else str(s))).strip()
+
+
+def as_int(s) -> Optional[int]:
+    try:
+        return int(s)
+    except Exception:
+        return None
+
+
+def source_name(src: dict, kind: str) -> str:
+    field = NAME_FIELD.get(kind)
+    if field:
+        return norm(src.get(field))
+    return norm(src.get("title") or src.get("handle") or src.get("text") or "")
+
+
+def source_label(src: dict) -> str:
+    """Display name used by /<cc>/source/<kind>/<slug> links."""
+    return src.get("title") or src.get("song") or src.get("handle") or src.get("text") or ""
+
+
+class SourceRef:
+    """One example's source, pre-normalized."""
+
+    __slots__ = ("kind", "name", "season", "episode", "year", "artist", "slug_kind", "slug", "label")
+
+    def __init__(self, src: dict):
+        self.kind = norm(src.get("kind"))
+        self.name = source_name(src, self.kind)
+        self.season = as_int(src.get("season"))
+        self.episode = as_int(src.get("episode"))
+        self.year = as_int(src.get("year"))
+        self.artist = norm(src.get("artist"))
+        # the slug route compares the raw lowercased kind, not the folded one
+        self.slug_kind = (src.get("kind") or "").lower()
+        self.label = source_label(src)
+        self.slug = slugify(self.label)
+
+
+def entry_sources(e: dict) -> List[SourceRef]:
+    refs = []
+    for s in (e.get("senses") or []):
+        if not isinstance(s, dict):
+            continue
+        for ex in (s.get("examples") or []):
+            src = ex.get("source") if isinstance(ex, dict) else None
+            if isinstance(src, dict):
+                refs.append(SourceRef(src))
+    return refs
+
+
+class SourceIndex:
+    """
+    (kind, normalized title/handle/song/text) → example references for one
+    glossary snapshot, plus a (kind, slug) → entries map for the source
+    pages. Season/episode/year/artist filters only look at the examples of
+    the requested source.
+    """
+
+    def __init__(self, snapshot: GlossarySnapshot, previous: Optional["SourceIndex"] = None):
+        self.entries = snapshot.entries
+        reuse = previous.refs_by_hash if previous is not None else {}
+        self.refs_by_hash: Dict[str, List[SourceRef]] = {}
+        # (kind, name) → [(entry position, ref)]
+        self.by_name: Dict[Tuple[str, str], List[Tuple[int, SourceRef]]] = {}
+        # kind → [(entry position, ref)]
+        self.by_kind: Dict[str, List[Tuple[int, SourceRef]]] = {}
+        # (raw kind, slug) → sorted entry positions
+        self.by_slug: Dict[Tuple[str, str], List[int]] = {}
+
+        for pos, e in enumerate(self.entries):
+            h = entry_hash(e)
+            refs = reuse.get(h)
+            if refs is None:
+                refs = entry_sources(e)
+            self.refs_by_hash[h] = refs
+            for ref in refs:
+                self.by_name.setdefault((ref.kind, ref.name), []).append((pos, ref))
+                self.by_kind.setdefault(ref.kind, []).append((pos, ref))
+                positions = self.by_slug.setdefault((ref.slug_kind, ref.slug), [])
+                if not positions or positions[-1] != pos:
+                    positions.append(pos)
+
+    # --- /<cc>/source/<kind>/<slug> -------------------------------------
+
+    def entries_for_slug(self, kind: str, slug: str) -> List[dict]:
+        return [self.entries[p] for p in self.by_slug.get(((kind or "").lower(), slug), [])]
+
+    # --- /api/<cc>/by-source --------------------------------------------
+
+    def match(self, kind: str = "", title: str = "", year: Optional[int] = None,
+              season: Optional[int] = None, episode: Optional[int] = None,
+              handle: str = "", song: str = "", artist: str = "", text: str = "") -> List[Tuple[int, int]]:
+        """
+        Entries with examples from the requested source, as
+        [(entry position, matching example count)] in glossary order.
+        Same matching rules as the original per-example scan.
+        """
+        kinds = [norm(kind)] if kind else list(self.by_kind.keys())
+        title_n, artist_n = norm(title), norm(artist)
+        counts: Dict[int, int] = {}
+        for k in kinds:
+            if k == "redes":
+                want = norm(handle or title)
+            elif k == "cancion":
+                want = norm(song or title)
+            elif k == "otro":
+                want = norm(text or title)
+            else:
+                want = title_n
+            rows = self.by_name.get((k, want), []) if want else self.by_kind.get(k, [])
+            for pos, ref in rows:
+                if k == "serie":
+                    if season is not None and ref.season != season:
+                        continue
+                    if episode is not None and ref.episode != episode:
+                        continue
+                elif k == "pelicula":
+                    if year is not None and ref.year != year:
+                        continue
+                elif k == "cancion":
+                    if artist_n and ref.artist != artist_n:
+                        continue
+                counts[pos] = counts.get(pos, 0) + 1
+        return sorted(counts.items())
+
+    # --- /api/<cc>/sources ----------------------------------------------
+
+    def catalog(self) -> List[dict]:
+        """
+        Every distinct source with entry/example counts, grouped by kind and
+        normalized name; series also list their (season, episode) pairs.
+        """
+        out = []
+        for (kind, name), rows in self.by_name.items():
+            if not name:
+                continue
+            first = rows[0][1]
+            item = {
+                "kind": first.slug_kind or kind,
+                "title": first.label,
+                "slug": first.slug,
+                "entries": len({pos for pos, _ in rows}),
+                "examples": len(rows),
+            }
+            years = sorted({r.year for _, r in rows if r.year is not None})
+            if years:
+                item["years"] = years
+            if kind == "serie":
+                eps: Dict[Tuple[Optional[int], Optional[int]], int] = {}
+                for _, r in rows:
+                    eps[(r.season, r.episode)] = eps.get((r.season, r.episode), 0) + 1
+                item["episodes"] = [
+                    {"season": s, "episode": ep, "examples": n}
+                    for (s, ep), n in sorted(eps.items(), key=lambda kv: (kv[0][0] or 0, kv[0][1] or 0))
+                ]
+            if kind == "cancion":
+                artists = sorted({r.artist for _, r in rows if r.artist})
+                if artists:
+                    item["artists"] = artists
+            out.append(item)
+        out.sort(key=lambda it: (it["kind"], norm(it["title"])))
+        return out
+
+
+def get_source_index(snapshot: GlossarySnapshot) -> SourceIndex:
+    """Source index for `snapshot`, built on first use and reused after."""
+    return snapshot.derive("source_index", SourceIndex)
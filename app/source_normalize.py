@@ -0,0 +1,533 @@
+# app/source_normalize.py
+"""
+Normalize example["source"] objects across glossaries (the rules that used
+to live only in fix_sources.py):
+
+  - HARD RULE: any "Relatos Salvajes" reference → {"kind":"pelicula","title":"Relatos Salvajes","year":"2014"}
+  - {"kind":"otro","text":"..."} → structured serie/pelicula when the text matches
+    SERIE_PATTERNS / PELICULA_PATTERN (else a minimal "otro")
+  - odd shapes (None, string, missing keys) → a consistent minimal schema
+
+Each glossary is streamed (app/json_stream.py) in chunks of entries that
+are fixed in a process pool. Only changed entries are copied (copy on
+write down to the example), and each changed example is one line of a
+JSON-lines change log:
+
+    {"glossary": "...", "entry": 12, "word": "...", "sense": 0, "example": 1,
+     "rule": "series_fixed", "before": {...}, "after": {...}}
+
+A glossary with no changes is not rewritten. JSON files are rewritten
+under the glossary file lock (after flushing this process's pending admin
+edits); with the SQLite backend, changed entries go through replace().
+
+CLI:
+  python -m app.source_normalize                   # every glossary in country_map
+  python -m app.source_normalize ar uy --dry-run   # only log what would change
+  python -m app.source_normalize --workers 4 --changelog /tmp/sources.jsonl
+
+As a background job: jobs.enqueue("normalize_sources", {"codes": ["ar"]}).
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import time
+import multiprocessing
+from copy import deepcopy
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional, Tuple
+
+from .glossary_store import PROJECT_ROOT, country_map
+
+# Entries per task handed to a pool worker
+CHUNK_SIZE = 500
+LOG_DIR = os.path.join(PROJECT_ROOT, "data", "logs")
+COUNTERS = ("relatos_fixed", "series_fixed", "peliculas_fixed", "otros_coerced", "missing_added")
+
+# ---------- Regex helpers ----------
+YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+
+# Serie patterns (order matters: most specific first)
+SERIE_PATTERNS = [
+    # "Título, Temporada 1, Episodio 1:"
+    re.compile(
+        r"^\s*(?P<title>.+?),\s*Temporada\s*(?P<season>\d+),\s*Episodio\s*(?P<episode>\d+)\b.*",
+        re.IGNORECASE | re.UNICODE
+    ),
+    # "Título, T1E1 - Algo"
+    re.compile(
+        r"^\s*(?P<title>.+?),\s*T(?P<season>\d+)E(?P<episode>\d+)\b.*",
+        re.IGNORECASE | re.UNICODE
+    ),
+]
+
+# Película pattern: "Título (2014), ..."
+PELICULA_PATTERN = re.compile(
+    r"^\s*(?P<title>.+?)\s*\(\s*(?P<year>(19|20)\d{2})\s*\)\b.*",
+    re.UNICODE
+)
+
+
+# ---------- Normalization rules ----------
+def contains_relatos_salvajes(text: str) -> bool:
+    return bool(re.search(r"\bRelatos\s+Salvajes\b", text or "", re.IGNORECASE))
+
+
+def normalize_relato_hard_rule(src_dict: dict | None, text_hint: str = "") -> dict | None:
+    """
+    If the source (or its text) contains 'Relatos Salvajes', return the canonical pelicula object.
+    """
+    if isinstance(src_dict, dict):
+        for key in ("title", "text"):
+            val = src_dict.get(key, "")
+            if isinstance(val, str) and contains_relatos_salvajes(val):
+                return {"kind": "pelicula", "title": "Relatos Salvajes", "year": "2014"}
+    if text_hint and contains_relatos_salvajes(text_hint):
+        return {"kind": "pelicula", "title": "Relatos Salvajes", "year": "2014"}
+    return None
+
+
+def parse_source_text(text: str):
+    """
+    Convert a free-form 'text' into a structured {kind,title,year[,season,episode]} when possible.
+    Returns (normalized_source_dict, success_bool, counters_delta).
+    """
+    s = (text or "").strip()
+
+    # HARD RULE first: any 'Relatos Salvajes'
+    relato = normalize_relato_hard_rule({"text": s})
+    if relato:
+        return relato, True, {"relatos_fixed": 1}
+
+    # Try explicit serie patterns
+    for pat in SERIE_PATTERNS:
+        m = pat.match(s)
+        if m:
+            gd = m.groupdict()
+            title = gd.get("title", "").strip().rstrip(":")
+            season = gd.get("season")
+            episode = gd.get("episode")
+            # Optional: find a year anywhere
+            year = ""
+            ym = YEAR_RE.search(s)
+            if ym:
+                year = ym.group(0)
+            out = {
+                "kind": "serie",
+                "title": title,
+                "year": year,
+                "season": str(int(season)) if season is not None else "",
+                "episode": str(int(episode)) if episode is not None else "",
+            }
+            return out, True, {"series_fixed": 1}
+
+    # Película pattern "Title (YYYY) ..."
+    pm = PELICULA_PATTERN.match(s)
+    if pm:
+        title = pm.group("title").strip()
+        year = pm.group("year")
+        # Drop any trailing ", segmento …" that might sneak into title area
+        title = re.sub(r",\s*segmento.*$", "", title, flags=re.IGNORECASE).strip()
+        out = {"kind": "pelicula", "title": title, "year": year}
+        return out, True, {"peliculas_fixed": 1}
+
+    # Heuristic: mentions Temporada or T#E#
+    if re.search(r"\bTemporada\b", s, flags=re.IGNORECASE) or re.search(r"\bT\d+E\d+\b", s, flags=re.IGNORECASE):
+        season, episode = "", ""
+        m = re.search(r"T(\d+)E(\d+)", s, flags=re.IGNORECASE)
+        if m:
+            season, episode = m.group(1), m.group(2)
+        year = ""
+        ym = YEAR_RE.search(s)
+        if ym:
+            year = ym.group(0)
+        title = s.split(",")[0].strip().rstrip(":")
+        out = {"kind": "serie", "title": title, "year": year, "season": season, "episode": episode}
+        return out, True, {"series_fixed": 1}
+
+    # Heuristic película if it says 'segmento' and has a year
+    if "segmento" in s.lower() and YEAR_RE.search(s):
+        # Title before "(" best-effort; else before first comma; else whole
+        paren = s.find("(")
+        if paren > 0:
+            title = s[:paren].strip()
+        else:
+            title = s.split(",")[0].strip()
+        year = YEAR_RE.search(s).group(0)
+        out = {"kind": "pelicula", "title": title, "year": year}
+        return out, True, {"peliculas_fixed": 1}
+
+    # Fallback: coerce to minimal 'otro' with 'title' (drop legacy 'text')
+    return {"kind": "otro", "title": s, "year": ""}, False, {"otros_coerced": 1}
+
+
+def normalize_source(src):
+    """
+    Normalize a source object. Leaves already-correct objects mostly untouched,
+    but applies the Relatos Salvajes hard rule even if already structured.
+    Returns: (normalized_source, changed?, counters_delta)
+    """
+    counters = {k: 0 for k in COUNTERS}
+
+    # None / missing → minimal empty
+    if src is None:
+        counters["missing_added"] += 1
+        return {"kind": "otro", "title": "", "year": ""}, True, counters
+
+    # Unexpected non-dict (e.g., a plain string) → coerce to 'otro'
+    if not isinstance(src, dict):
+        counters["otros_coerced"] += 1
+        return {"kind": "otro", "title": str(src), "year": ""}, True, counters
+
+    # HARD RULE: if any field references Relatos Salvajes → canonical pelicula
+    relato = normalize_relato_hard_rule(src)
+    if relato:
+        counters["relatos_fixed"] += 1
+        return relato, True, counters
+
+    # Already structured kinds
+    if src.get("kind") in {"pelicula", "serie"} and "title" in src:
+        changed = False
+        out = deepcopy(src)
+        if src["kind"] == "pelicula":
+            # For peliculas, keep only title/year; drop season/episode if present
+            if "season" in out:
+                out.pop("season")
+                changed = True
+            if "episode" in out:
+                out.pop("episode")
+                changed = True
+            if "year" not in out:
+                out["year"] = ""
+                changed = True
+        elif src["kind"] == "serie":
+            # For series, ensure keys exist
+            if "season" not in out:
+                out["season"] = ""
+                changed = True
+            if "episode" not in out:
+                out["episode"] = ""
+                changed = True
+            if "year" not in out:
+                out["year"] = ""
+                changed = True
+        return out, changed, counters
+
+    # Legacy 'otro' with 'text'
+    if src.get("kind") == "otro" and "text" in src:
+        normalized, success, delta = parse_source_text(src.get("text", ""))
+        for k, v in delta.items():
+            counters[k] = counters.get(k, 0) + v
+        return normalized, True, counters
+
+    # Other odd shapes → try to coerce minimally to include required keys
+    changed = False
+    out = deepcopy(src)
+    if "title" not in out:
+        out["title"] = ""
+        changed = True
+    if "year" not in out:
+        out["year"] = ""
+        changed = True
+    if "kind" not in out:
+        out["kind"] = "otro"
+        changed = True
+    if changed:
+        counters["otros_coerced"] += 1
+    return out, changed, counters
+
+
+# ---------- Per-entry diffs ----------
+Diff = Dict[str, Any]
+
+
+def fix_entry(entry: Any) -> Tuple[Optional[dict], List[Diff], Dict[str, int]]:
+    """
+    Normalize the sources of one entry without touching it. Returns
+    (new_entry or None if nothing changed, diffs, counters). The new entry
+    shares every sense/example that did not change with the old one.
+    """
+    counters = {k: 0 for k in COUNTERS}
+    diffs: List[Diff] = []
+    senses = entry.get("senses") if isinstance(entry, dict) else None
+    if not isinstance(senses, list):
+        return None, diffs, counters
+
+    new_senses = None
+    for i, sense in enumerate(senses):
+        examples = sense.get("examples") if isinstance(sense, dict) else None
+        if not isinstance(examples, list):
+            continue
+        new_examples = None
+        for j, ex in enumerate(examples):
+            if not isinstance(ex, dict):
+                continue
+            before = ex.get("source")
+            after, changed, delta = normalize_source(before)
+            # the hard rule "changes" an already canonical source: not a change
+            if not changed or ("source" in ex and after == before):
+                continue
+            rule = next((k for k in COUNTERS if delta.get(k)), "reshaped")
+            for k, v in delta.items():
+                counters[k] += v
+            if new_examples is None:
+                new_examples = list(examples)
+            new_examples[j] = {**ex, "source": after}
+            diffs.append({"sense": i, "example": j, "rule": rule, "before": before, "after": after})
+        if new_examples is not None:
+            if new_senses is None:
+                new_senses = list(senses)
+            new_senses[i] = {**sense, "examples": new_examples}
+
+    if new_senses is None:
+        return None, diffs, counters
+    return {**entry, "senses": new_senses}, diffs, counters
+
+
+def fix_chunk(entries: List[Any]) -> Tuple[List[Tuple[int, dict, List[Diff]]], Dict[str, int]]:
+    """Pool task: ([(offset, new_entry, diffs)] for changed entries only, counters)."""
+    changed = []
+    counters = {k: 0 for k in COUNTERS}
+    for k, e in enumerate(entries):
+        new, diffs, delta = fix_entry(e)
+        for c, v in delta.items():
+            counters[c] += v
+        if new is not None:
+            changed.append((k, new, diffs))
+    return changed, counters
+
+
+# ---------- Engine ----------
+def _chunks(entries: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    it = iter(entries)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class SourceNormalizer:
+    """
+    Runs fix_chunk over glossaries, `workers` processes at a time (1 = in
+    this process), appending every diff to `log` (a text file, or None).
+    Use as a context manager so the pool is shut down.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+                 log: Optional[IO[str]] = None, dry_run: bool = False):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.log = log
+        self.dry_run = dry_run
+        self._pool = None
+
+    def __enter__(self) -> "SourceNormalizer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _map(self, chunks: List[List[Any]]):
+        if self.workers == 1 or len(chunks) == 1:
+            return map(fix_chunk, chunks)
+        if self._pool is None:
+            # spawn: safe from the job runner's threads (and the default on Windows)
+            self._pool = multiprocessing.get_context("spawn").Pool(self.workers)
+        return self._pool.map(fix_chunk, chunks)
+
+    def run(self, name: str, entries: Iterable[Any],
+            emit: Callable[[List[Any], List[Tuple[int, dict, dict]]], None]) -> Dict[str, int]:
+        """
+        Fix `entries` window by window (workers x chunk_size entries in
+        memory). `emit(chunk, changes)` gets each chunk with its changed
+        entries already swapped in, plus (index, old, new) per change.
+        """
+        stats = {"entries": 0, "entries_changed": 0, "changes": 0, **{k: 0 for k in COUNTERS}}
+        window = self.workers * 2
+        chunks = _chunks(entries, self.chunk_size)
+        base = 0
+        while True:
+            batch = list(islice(chunks, window))
+            if not batch:
+                return stats
+            for chunk, (changed, counters) in zip(batch, self._map(batch)):
+                swaps = []
+                for k, new, diffs in changed:
+                    old, chunk[k] = chunk[k], new
+                    swaps.append((base + k, old, new))
+                    stats["changes"] += len(diffs)
+                    if self.log is not None:
+                        for d in diffs:
+                            self.log.write(json.dumps({"glossary": name, "entry": base + k,
+                                                       "word": new.get("word", ""), **d},
+                                                      ensure_ascii=False) + "\n")
+                stats["entries"] += len(chunk)
+                stats["entries_changed"] += len(changed)
+                for c, v in counters.items():
+                    stats[c] += v
+                emit(chunk, swaps)
+                base += len(chunk)
+
+    def json_file(self, path: str, out: Optional[str] = None, indent: Optional[int] = 4,
+                  name: Optional[str] = None) -> Dict[str, int]:
+        """
+        Normalize the glossary file `path` into `out` (default: in place, and
+        only if something changed), streaming it through an ArrayWriter.
+        """
+        from .json_stream import ArrayWriter, iter_array
+
+        out = out or path
+        writer = None if self.dry_run else ArrayWriter(out, indent=indent)
+
+        def emit(chunk, _swaps):
+            if writer:
+                for e in chunk:
+                    writer.write(e)
+
+        try:
+            stats = self.run(name or os.path.basename(path), iter_array(path), emit)
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+        if writer and (stats["entries_changed"] or out != path):
+            writer.close()
+        elif writer:
+            writer.abort()
+        return stats
+
+    def glossary(self, name: str) -> Optional[Dict[str, int]]:
+        """Normalize glossary `name` wherever it lives (None if it does not exist)."""
+        from .glossary_sqlite import get_backend
+        from .glossary_store import store
+
+        backend = get_backend()
+        if backend is not None:
+            if not backend.exists(name):
+                return None
+            return self._sqlite(backend, name)
+
+        from .glossary_repo import flush_pending
+        from .storage import file_lock
+        from . import precompress
+
+        path = store.path_for(name)
+        if not os.path.exists(path):
+            return None
+        flush_pending(name)
+        with file_lock(path):
+            stats = self.json_file(path, name=name)
+            if stats["entries_changed"] and not self.dry_run:
+                precompress.refresh(path)
+        store.invalidate(name)
+        return stats
+
+    def _sqlite(self, backend, name: str) -> Dict[str, int]:
+        from .glossary_repo import GlossaryConflict
+
+        conflicts = 0
+
+        def emit(_chunk, swaps):
+            nonlocal conflicts
+            if self.dry_run:
+                return
+            for _i, old, new in swaps:
+                try:
+                    backend.replace(name, old, new)
+                except GlossaryConflict:
+                    conflicts += 1      # edited meanwhile: the next run picks it up
+
+        stats = self.run(name, backend.entries(name), emit)
+        stats["conflicts"] = conflicts
+        return stats
+
+
+def default_changelog_path() -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return os.path.join(LOG_DIR, f"sources-{stamp}.jsonl")
+
+
+def normalize_glossaries(codes: Optional[List[str]] = None, *, workers: Optional[int] = None,
+                         chunk_size: int = CHUNK_SIZE, changelog: Optional[str] = None,
+                         dry_run: bool = False,
+                         progress: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, Any]:
+    """
+    Normalize the glossaries of `codes` (default: every country in
+    country_map; missing glossaries are skipped). Returns per-country stats,
+    the totals and the change log path.
+    """
+    codes = list(codes) if codes else list(country_map)
+    unknown = [c for c in codes if c not in country_map]
+    if unknown:
+        raise ValueError(f"unknown country codes: {', '.join(unknown)}")
+
+    changelog = changelog or default_changelog_path()
+    os.makedirs(os.path.dirname(os.path.abspath(changelog)), exist_ok=True)
+    t0 = time.perf_counter()
+    results: Dict[str, Any] = {}
+    totals = {"entries": 0, "entries_changed": 0, "changes": 0}
+    with open(changelog, "a", encoding="utf-8") as log, \
+            SourceNormalizer(workers, chunk_size, log=log, dry_run=dry_run) as engine:
+        for n, code in enumerate(codes):
+            if progress:
+                progress(n, len(codes), code)
+            stats = engine.glossary(country_map[code])
+            if stats is None:
+                continue
+            results[code] = stats
+            for k in totals:
+                totals[k] += stats[k]
+    if progress:
+        progress(len(codes), len(codes), "done")
+    if os.path.getsize(changelog) == 0:
+        os.unlink(changelog)
+        changelog = None
+    return {
+        "glossaries": results,
+        **totals,
+        "dry_run": dry_run,
+        "changelog": changelog,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Normalize example sources in every glossary.")
+    ap.add_argument("codes", nargs="*", help="country codes (default: all in country_map)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="entries per pool task")
+    ap.add_argument("--changelog", default=None, help="JSON-lines change log (default: data/logs/sources-<time>.jsonl)")
+    ap.add_argument("--dry-run", action="store_true", help="log the changes without writing the glossaries")
+    args = ap.parse_args(argv)
+
+    try:
+        result = normalize_glossaries(args.codes, workers=args.workers, chunk_size=args.chunk_size,
+                                      changelog=args.changelog, dry_run=args.dry_run)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    for code, stats in result["glossaries"].items():
+        print(f"{code}: {stats['entries_changed']}/{stats['entries']} entries, {stats['changes']} sources "
+              f"(relatos {stats['relatos_fixed']}, series {stats['series_fixed']}, "
+              f"películas {stats['peliculas_fixed']}, otros {stats['otros_coerced']}, "
+              f"missing {stats['missing_added']})")
+    verb = "would change" if args.dry_run else "changed"
+    print(f"{verb} {result['changes']} sources in {result['entries_changed']} entries "
+          f"({result['seconds']}s); log: {result['changelog'] or '(nothing to log)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
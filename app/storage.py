@@ -3,6 +3,8 @@ from __future__ import annotations
 
 import os
 import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Tuple, Dict, Any
 # --- NEW: helpers for organized exercise storage (type/slug/NNN.json) ---
@@ -10,6 +12,10 @@ import re
 import unicodedata
 from pathlib import Path
 
+from .fragment_cache import FragmentCache
+from .glossary_store import file_signature
+from .metrics import json_load
+
 # Where exercises live on disk (adjust if your project uses a different root)
 EX_BASE_DIR = Path("data/exercises")
 
@@ -136,20 +142,623 @@ def oldstyle_rel_path(ex_id: str, version: int) -> str:
     return os.path.join("data", "exercises", f"{ex_id}@v{int(version)}.json").replace("\\", "/")
 
 
+# --- Atomic writes ------------------------------------------------------
+
+def _fsync_dir(dirpath: str) -> None:
+    """Persist a rename by fsyncing its directory (no-op where unsupported)."""
+    try:
+        fd = os.open(dirpath, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows: directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, data: bytes, *, fsync_dir: bool = True) -> None:
+    """
+    Replace `path` with `data` so readers only ever see the old or the new
+    file, never a partial one:
+
+      1) write a temp file in the same directory (same filesystem)
+      2) flush + fsync it
+      3) os.replace() it over `path` (atomic rename)
+      4) optionally fsync the directory so the rename survives a crash
+
+    The existing file's permission bits are kept.
+    """
+    import tempfile
+
+    path = os.fspath(path)
+    dirpath = os.path.dirname(os.path.abspath(path))
+    _ensure_dir(dirpath)
+    fd, tmp = tempfile.mkstemp(dir=dirpath, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if fsync_dir:
+        _fsync_dir(dirpath)
+
+
+def atomic_write_json(path: str, obj, *, indent: int = 2, fsync_dir: bool = True) -> None:
+    """Serialize `obj` (UTF-8, ensure_ascii=False) and write it atomically."""
+    data = json.dumps(obj, ensure_ascii=False, indent=indent).encode("utf-8")
+    atomic_write_bytes(path, data, fsync_dir=fsync_dir)
+
+
+# --- Cross-process locking ----------------------------------------------
+
+try:  # POSIX only; elsewhere the lock is process-local
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+_lock_registry: Dict[str, threading.RLock] = {}
+_lock_registry_guard = threading.Lock()
+_held = threading.local()
+
+
+def lock_path_for(path: str) -> str:
+    """Sidecar lock file (the data file itself is swapped by os.replace)."""
+    return os.path.abspath(os.fspath(path)) + ".lock"
+
+
+@contextmanager
+def file_lock(path: str, *, shared: bool = False):
+    """
+    Advisory lock for the data file at `path`, held across processes
+    (fcntl.flock on `<path>.lock`) and threads. Re-entrant per thread, so
+    helpers that lock internally can be called while the lock is held.
+
+    Usage:
+        with file_lock(index_path):
+            data = load_json(index_path, {})
+            ...modify...
+            save_json(index_path, data)
+    """
+    key = lock_path_for(path)
+    held = getattr(_held, "paths", None)
+    if held is None:
+        held = _held.paths = {}
+    if key in held:
+        held[key] += 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+
+    with _lock_registry_guard:
+        tlock = _lock_registry.setdefault(key, threading.RLock())
+    with tlock:
+        _ensure_dir(os.path.dirname(key))
+        fh = open(key, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            held[key] = 1
+            try:
+                yield
+            finally:
+                del held[key]
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            fh.close()
+
+
 # --- JSON I/O -----------------------------------------------------------
 
 def load_json(path: str, default):
     try:
         with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            return json_load(f, "storage")
     except Exception:
         return default
 
 
 def save_json(path: str, obj) -> None:
-    _ensure_dir(os.path.dirname(path))
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    atomic_write_json(path, obj)
+
+
+# --- Content-addressed exercise payloads --------------------------------
+#
+# A version payload is stored once, under data/exercises/.objects/<sha256>.json
+# (identical saves share one object). NNN.json is a small pointer to it,
+#   {"$object": "<sha256>"}
+# and current.json a hardlink to the same object (a pointer where hardlinks
+# are not supported). Files written before this hold full payloads and are
+# read as they are.
+#
+# Opt-in delta mode (EXERCISE_DELTA_EVERY = K > 0): a version that is not a
+# snapshot (1, K+1, 2K+1, ...) is stored as a JSON patch (RFC 6902) against
+# the previous version of the same folder,
+#   {"$base": "011.json", "$patch": [{"op": "replace", "path": "/items/0/prompt", ...}]}
+# and rebuilt on read (`read_exercise_bytes`, cached). current.json always
+# stays a full copy.
+
+OBJECTS_DIR = os.path.join(EXERCISES_DIR, ".objects")
+POINTER_KEY = "$object"
+DELTA_BASE_KEY = "$base"
+DELTA_PATCH_KEY = "$patch"
+# Pointers are tiny; larger files are payloads (or deltas) and are not parsed
+POINTER_MAX_BYTES = 256
+_POINTER_PREFIX = ('{"' + POINTER_KEY + '"').encode("utf-8")
+_DELTA_PREFIX = ('{"' + DELTA_BASE_KEY + '"').encode("utf-8")
+_HEX64 = re.compile(r"[0-9a-f]{64}")
+# Snapshot interval used by `compact_exercise_history` when none is given
+DEFAULT_SNAPSHOT_EVERY = 10
+# Longest delta chain followed before giving up (a snapshot every K keeps it < K)
+MAX_DELTA_CHAIN = 1000
+# Memory budget for rebuilt delta versions
+REBUILT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+_rebuilt = FragmentCache(REBUILT_CACHE_MAX_BYTES)
+
+
+def payload_bytes(payload) -> bytes:
+    """The on-disk serialization of an exercise payload (same as save_json)."""
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def object_path(digest: str, root: str = EXERCISES_DIR) -> str:
+    return os.path.join(root, ".objects", f"{digest}.json")
+
+
+def put_object(data: bytes, root: str = EXERCISES_DIR) -> str:
+    """Store `data` (if not already stored) and return its sha256 hex digest."""
+    import hashlib
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest, root)
+    if not os.path.exists(path):
+        # concurrent writers of the same object write the same bytes
+        atomic_write_bytes(path, data)
+        from . import precompress
+        precompress.refresh(path)
+    return digest
+
+
+def pointer_bytes(digest: str) -> bytes:
+    return json.dumps({POINTER_KEY: digest}).encode("utf-8")
+
+
+def delta_bytes(base_name: str, ops: list) -> bytes:
+    return json.dumps({DELTA_BASE_KEY: base_name, DELTA_PATCH_KEY: ops},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _read_head(path: str, limit: int) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(limit + 1)
+
+
+def read_pointer(path: str) -> str | None:
+    """The object digest if `path` is a pointer file, else None."""
+    try:
+        head = _read_head(path, POINTER_MAX_BYTES)
+    except OSError:
+        return None
+    if len(head) > POINTER_MAX_BYTES or not head.startswith(_POINTER_PREFIX):
+        return None
+    try:
+        digest = json.loads(head.decode("utf-8")).get(POINTER_KEY)
+    except (ValueError, AttributeError):
+        return None
+    return digest if isinstance(digest, str) and _HEX64.fullmatch(digest) else None
+
+
+def read_delta(path: str) -> dict | None:
+    """{"$base": name, "$patch": ops} if `path` is a delta file, else None."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(_DELTA_PREFIX)) != _DELTA_PREFIX:
+                return None
+            f.seek(0)
+            delta = json.loads(f.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    base = delta.get(DELTA_BASE_KEY) if isinstance(delta, dict) else None
+    if not isinstance(base, str) or os.path.basename(base) != base or not isinstance(delta.get(DELTA_PATCH_KEY), list):
+        return None
+    return delta
+
+
+def _objects_root(path: str) -> str:
+    # data/exercises/<type>/<slug>/NNN.json → data/exercises
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(path))))
+
+
+def resolve_exercise_file(path: str) -> str | None:
+    """
+    Path holding the bytes of an exercise JSON file (follows pointers), or
+    None for a delta, which only exists rebuilt (see `read_exercise_bytes`).
+    """
+    digest = read_pointer(path)
+    if digest is not None:
+        return object_path(digest, _objects_root(path))
+    return None if read_delta(path) is not None else path
+
+
+def read_exercise_bytes(path: str) -> bytes:
+    """
+    Bytes of an exercise JSON file: pointers are followed and deltas rebuilt
+    from their chain. Rebuilt versions are cached under the signatures of
+    every file in their chain, so rewriting a base is never served stale.
+    Raises OSError/ValueError like open()/json.loads.
+    """
+    path = os.path.abspath(path)
+    links = []      # (path, signature, delta or None), newest first
+    p = path
+    while True:
+        if len(links) > MAX_DELTA_CHAIN:
+            raise ValueError(f"delta chain too long: {path}")
+        sig = file_signature(os.stat(p))
+        delta = read_delta(p)
+        links.append((p, sig, delta))
+        if delta is None:
+            break
+        p = os.path.join(os.path.dirname(p), delta[DELTA_BASE_KEY])
+
+    sigs = tuple(sig for _, sig, _ in links)
+    keys = [(p, sigs[i:]) for i, (p, _, _) in enumerate(links)]
+    start, data = len(links) - 1, None
+    for i in range(len(links) - 1):   # only rebuilt deltas are ever cached
+        data = _rebuilt.get(keys[i])
+        if data is not None:
+            start = i
+            break
+    if data is None:
+        with open(resolve_exercise_file(links[-1][0]), "rb") as f:
+            data = f.read()
+    if start == 0:
+        return data
+    doc = json.loads(data.decode("utf-8"))
+    for i in range(start - 1, -1, -1):
+        doc = apply_patch(doc, links[i][2][DELTA_PATCH_KEY])
+        data = payload_bytes(doc)
+        _rebuilt.put(keys[i], data)
+    return data
+
+
+def load_exercise_json(path: str, default=None):
+    """load_json for exercise files that may be pointers or deltas."""
+    try:
+        return json.loads(read_exercise_bytes(path).decode("utf-8"))
+    except Exception:
+        return default
+
+
+def link_object(digest: str, path: str, root: str = EXERCISES_DIR) -> None:
+    """
+    Make `path` a hardlink to the object (atomically replacing it), or a
+    pointer to it where hardlinks are not available.
+    """
+    import uuid
+
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(object_path(digest, root), tmp)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        atomic_write_bytes(path, pointer_bytes(digest))
+
+
+# --- JSON patch (RFC 6902 subset: add / remove / replace) ----------------
+
+def _escape(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(a, b, path: str = "") -> list:
+    """Patch operations turning `a` into `b` (lists compared index by index)."""
+    if type(a) is not type(b):
+        return [{"op": "replace", "path": path, "value": b}]
+    if isinstance(a, dict):
+        ops = [{"op": "remove", "path": f"{path}/{_escape(k)}"} for k in a if k not in b]
+        for k, v in b.items():
+            if k in a:
+                ops.extend(json_diff(a[k], v, f"{path}/{_escape(k)}"))
+            else:
+                ops.append({"op": "add", "path": f"{path}/{_escape(k)}", "value": v})
+        return ops
+    if isinstance(a, list):
+        n = min(len(a), len(b))
+        ops = []
+        for i in range(n):
+            ops.extend(json_diff(a[i], b[i], f"{path}/{i}"))
+        for i in range(len(a) - 1, n - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for i in range(n, len(b)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": b[i]})
+        return ops
+    return [] if a == b else [{"op": "replace", "path": path, "value": b}]
+
+
+def apply_patch(doc, ops: list):
+    """Apply add/remove/replace operations to a copy of `doc`."""
+    import copy
+
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            doc = copy.deepcopy(op.get("value"))
+            continue
+        parent = doc
+        for t in tokens[:-1]:
+            parent = parent[int(t)] if isinstance(parent, list) else parent[t]
+        last = tokens[-1]
+        kind = op["op"]
+        if isinstance(parent, list):
+            i = len(parent) if last == "-" else int(last)
+            if kind == "add":
+                parent.insert(i, op["value"])
+            elif kind == "remove":
+                del parent[i]
+            else:
+                parent[i] = op["value"]
+        else:
+            if kind == "remove":
+                del parent[last]
+            else:
+                parent[last] = op["value"]
+    return doc
+
+
+def _write_delta_or_snapshot(version_file: str, version: int, data: bytes, payload,
+                             every: int, root: str = EXERCISES_DIR) -> str:
+    """
+    Write NNN.json as a delta against the previous version when `every` > 0,
+    `version` is not a snapshot position and the patch reproduces `data`
+    exactly and is smaller; otherwise as a pointer to a full object.
+    Returns "delta" or "object".
+    """
+    folder = os.path.dirname(version_file)
+    base_name = f"{int(version) - 1:03d}.json"
+    base_path = os.path.join(folder, base_name)
+    if every > 0 and (int(version) - 1) % every != 0 and os.path.exists(base_path):
+        try:
+            base = json.loads(read_exercise_bytes(base_path).decode("utf-8"))
+        except (OSError, ValueError):
+            base = None
+        if base is not None:
+            ops = json_diff(base, payload)
+            delta = delta_bytes(base_name, ops)
+            if len(delta) < len(data) and payload_bytes(apply_patch(base, ops)) == data:
+                atomic_write_bytes(version_file, delta)
+                return "delta"
+    atomic_write_bytes(version_file, pointer_bytes(put_object(data, root)))
+    return "object"
+
+
+def _snapshot_dependents(version_file: str, root: str = EXERCISES_DIR) -> int:
+    """
+    Before NNN.json is replaced: rewrite the deltas that rebuild from it
+    (the run of NNN+1, NNN+2, ... each based on the one before) as
+    snapshots, so the later versions keep their bytes. Returns how many.
+    """
+    folder, base_name = os.path.split(version_file)
+    dependents = []
+    n = int(base_name[:-5])
+    while True:
+        n += 1
+        path = os.path.join(folder, f"{n:03d}.json")
+        delta = read_delta(path)
+        if delta is None or delta[DELTA_BASE_KEY] != base_name:
+            break
+        dependents.append(path)
+        base_name = os.path.basename(path)
+    # read them all before rewriting any
+    contents = [read_exercise_bytes(path) for path in dependents]
+    for path, data in zip(dependents, contents):
+        atomic_write_bytes(path, pointer_bytes(put_object(data, root)))
+    return len(dependents)
+
+
+def _linked_object(path: str, root: str = EXERCISES_DIR) -> str | None:
+    """Digest of the object `path` (current.json or NNN.json) links or points to, if any."""
+    import hashlib
+
+    digest = read_pointer(path)
+    if digest is not None:
+        return digest
+    try:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        same = os.path.samefile(path, object_path(digest, root))
+    except OSError:
+        return None
+    return digest if same else None
+
+
+def _drop_unreferenced_object(digest: str, folder: str, root: str = EXERCISES_DIR) -> bool:
+    """
+    Remove a superseded object once nothing refers to it: no hardlink left
+    and no pointer in its folder. Payloads carry their exercise id and
+    version, so an object is never shared with another folder.
+    """
+    path = object_path(digest, root)
+    try:
+        if os.stat(path).st_nlink > 1:
+            return False
+    except OSError:
+        return False
+    for fn in _version_files(folder) + ["current.json"]:
+        if read_pointer(os.path.join(folder, fn)) == digest:
+            return False
+    from . import precompress
+    os.remove(path)
+    precompress.remove(path)
+    return True
+
+
+def exercise_object_refs(paths) -> Dict[str, list]:
+    """
+    digest → files referring to it, for the version files / current.json
+    in `paths` (pointers and hardlinks; deltas hold no object). Collect
+    this before deleting an exercise, then `drop_exercise_objects`.
+    """
+    refs: Dict[str, list] = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        digest = _linked_object(path, _objects_root(path))
+        if digest is not None:
+            refs.setdefault(digest, []).append(path)
+    return refs
+
+
+def drop_exercise_objects(refs: Dict[str, list]) -> int:
+    """
+    Remove the objects of a deleted exercise whose referring files are all
+    gone and that nothing else hardlinks. Payloads carry their exercise id,
+    so no other exercise refers to them. Returns how many were removed.
+    """
+    from . import precompress
+
+    removed = 0
+    for digest, paths in refs.items():
+        if any(os.path.exists(p) for p in paths):
+            continue   # not deleted after all
+        obj = object_path(digest, _objects_root(paths[0]))
+        try:
+            if os.stat(obj).st_nlink > 1:
+                continue
+            os.remove(obj)
+        except OSError:
+            continue
+        precompress.remove(obj)
+        removed += 1
+    return removed
+
+
+# --- Maintenance (python -m app.exercise_index pack|compact|gc) ----------
+
+def _exercise_folders(root: str):
+    for type_name in sorted(os.listdir(root)):
+        type_dir = os.path.join(root, type_name)
+        if type_name.startswith(".") or not os.path.isdir(type_dir):
+            continue
+        for slug in sorted(os.listdir(type_dir)):
+            folder = os.path.join(type_dir, slug)
+            if os.path.isdir(folder):
+                yield folder
+
+
+def _version_files(folder: str):
+    return sorted((fn for fn in os.listdir(folder) if fn.endswith(".json") and fn[:-5].isdigit()),
+                  key=lambda fn: int(fn[:-5]))
+
+
+def _is_full_file(path: str) -> bool:
+    return read_pointer(path) is None and read_delta(path) is None and os.stat(path).st_nlink == 1
+
+
+def pack_exercise_files(root: str = EXERCISES_DIR) -> Dict[str, int]:
+    """
+    Move full NNN.json / current.json payloads (new layout) into the object
+    store, leaving pointers and hardlinks behind. Bytes are kept as they are.
+    """
+    stats = {"files": 0, "objects": 0, "bytes_before": 0}
+    seen = set()
+    for folder in _exercise_folders(root):
+        for fn in _version_files(folder) + ["current.json"]:
+            path = os.path.join(folder, fn)
+            if not os.path.isfile(path) or not _is_full_file(path):
+                continue  # missing or already packed
+            with open(path, "rb") as f:
+                data = f.read()
+            digest = put_object(data, root)
+            if fn == "current.json":
+                link_object(digest, path, root)
+            else:
+                atomic_write_bytes(path, pointer_bytes(digest))
+            stats["files"] += 1
+            stats["bytes_before"] += len(data)
+            if digest not in seen:
+                seen.add(digest)
+                stats["objects"] += 1
+    return stats
+
+
+def compact_exercise_history(root: str = EXERCISES_DIR, every: int = DEFAULT_SNAPSHOT_EVERY) -> Dict[str, int]:
+    """
+    Rewrite each folder's NNN.json chain in delta mode: a snapshot (object
+    pointer) every `every` versions and deltas in between. Every version
+    still reads back byte for byte as before; versions whose patch would
+    not reproduce them exactly stay snapshots. Run `gc_exercise_objects`
+    afterwards to drop the objects only the old pointers used.
+    """
+    stats = {"versions": 0, "deltas": 0, "snapshots": 0}
+    for folder in _exercise_folders(root):
+        names = _version_files(folder)
+        # read the whole chain first: rewriting changes what later files rebuild from
+        contents = [read_exercise_bytes(os.path.join(folder, fn)) for fn in names]
+        for fn, data in zip(names, contents):
+            path = os.path.join(folder, fn)
+            payload = json.loads(data.decode("utf-8"))
+            kind = _write_delta_or_snapshot(path, int(fn[:-5]), data, payload, every, root)
+            stats["versions"] += 1
+            stats["deltas" if kind == "delta" else "snapshots"] += 1
+    return stats
+
+
+def gc_exercise_objects(root: str = EXERCISES_DIR) -> int:
+    """
+    Remove objects no file refers to (e.g. after an exercise was deleted):
+    not named by any pointer and not hardlinked from any current.json.
+    Call with the exercise index locked so no save is half-way done.
+    """
+    objects_dir = os.path.join(root, ".objects")
+    if not os.path.isdir(objects_dir):
+        return 0
+    referenced = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for fn in filenames:
+            if fn.endswith(".json"):
+                digest = read_pointer(os.path.join(dirpath, fn))
+                if digest:
+                    referenced.add(digest)
+    removed = 0
+    for fn in os.listdir(objects_dir):
+        if not fn.endswith(".json"):
+            continue
+        path = os.path.join(objects_dir, fn)
+        if fn[:-5] in referenced or os.stat(path).st_nlink > 1:
+            continue
+        from . import precompress
+        os.remove(path)
+        precompress.remove(path)
+        removed += 1
+    return removed
 
 
 # --- Public API: write a version + keep meta/current --------------------
@@ -162,6 +771,7 @@ def write_exercise_version(
     title: str | None = None,
     ex_type: str | None = None,
     pin: bool = True,
+    delta_every: int = 0,
 ) -> Tuple[str, str]:
     """
     Canonical writer for exercises.
@@ -169,8 +779,12 @@ def write_exercise_version(
     NEW LAYOUT:
       data/exercises/<type>/<slug>/
         meta.json
-        current.json
-        NNN.json           (version file, 3-digit)
+        current.json       (hardlink to the object of the latest version)
+        NNN.json           (version file, 3-digit: pointer to its object)
+      data/exercises/.objects/<sha256>.json
+
+    With delta_every = K > 0, versions between snapshots (1, K+1, ...) are
+    written as patches against the previous version.
 
     Returns (rel_path, abs_path) for the version file (repo-relative path).
     """
@@ -212,12 +826,26 @@ def write_exercise_version(
     current_file = paths["current_file"]
     meta_file    = paths["meta_file"]
 
-    # 1) Write version file
+    # 1) Store the payload once (content-addressed); NNN.json points to it,
+    #    or with delta_every = K > 0 is a patch against the previous version.
+    #    Replacing an existing version first turns the deltas built on it
+    #    into snapshots: later versions are served as immutable URLs.
     _ensure_dir(str(folder))
-    save_json(str(version_file), payload)
-
-    # 2) Write current.json (copy of latest)
-    save_json(str(current_file), payload)
+    root = _objects_root(str(version_file))
+    superseded = {_linked_object(str(current_file), root), read_pointer(str(version_file))}
+    if os.path.exists(version_file):
+        _snapshot_dependents(str(version_file), root)
+    data = payload_bytes(payload)
+    digest = put_object(data, root)
+    _write_delta_or_snapshot(str(version_file), version, data, payload, delta_every, root)
+
+    # 2) current.json: hardlink to the same object (no second copy)
+    link_object(digest, str(current_file), root)
+
+    # The previous current (only current.json holds it when that version is
+    # a delta) or the replaced version's object may now be unreferenced
+    for old in superseded - {None, digest}:
+        _drop_unreferenced_object(old, str(folder), root)
 
     # 3) Update meta.json
     meta = load_json(str(meta_file), {}) or {}
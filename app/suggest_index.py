@@ -0,0 +1,64 @@
+# app/suggest_index.py
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from .glossary_store import GlossarySnapshot, entry_slug
+from .search_index import VARIANT_KEYS
+from .fuzzy_index import normalize_key
+
+
+class SuggestIndex:
+    """
+    Sorted array of accent-folded keys (headwords + variant forms) for one
+    glossary snapshot. A prefix query is two bisects and a short slice.
+    """
+
+    def __init__(self, snapshot: GlossarySnapshot, previous: Optional["SuggestIndex"] = None):
+        rows = []
+        for e in snapshot.entries:
+            word = e.get("word", "")
+            slug = entry_slug(e)
+            forms = [word]
+            v = e.get("variants") or {}
+            if isinstance(v, dict):
+                for k in VARIANT_KEYS:
+                    arr = v.get(k) or []
+                    if isinstance(arr, list):
+                        forms.extend(x for x in arr if isinstance(x, str))
+            seen = set()
+            for i, form in enumerate(forms):
+                key = normalize_key(form)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                # (key, headword-first flag, display form, headword, slug)
+                rows.append((key, 0 if i == 0 else 1, form, word, slug))
+        rows.sort()
+        self.keys = [r[0] for r in rows]
+        self.rows: List[Tuple[str, int, str, str, str]] = rows
+
+    def prefix(self, q: str, limit: int = 10) -> List[Tuple[str, int, str, str, str]]:
+        """Up to `limit` rows whose key starts with the folded query, one per entry."""
+        key = normalize_key(q)
+        if not key:
+            return []
+        # keep a trailing space so "a " only matches multi-word keys
+        if q.endswith(" "):
+            key += " "
+        i = bisect_left(self.keys, key)
+        out, slugs = [], set()
+        n = len(self.keys)
+        while i < n and len(out) < limit and self.keys[i].startswith(key):
+            row = self.rows[i]
+            if row[4] not in slugs:
+                slugs.add(row[4])
+                out.append(row)
+            i += 1
+        return out
+
+
+def get_suggest_index(snapshot: GlossarySnapshot) -> SuggestIndex:
+    """Suggestion index for `snapshot`, built on first use and reused after."""
+    return snapshot.derive("suggest_index", SuggestIndex)
@@ -0,0 +1,159 @@
+# benchmarks/exercise_history.py
+# ------------------------------------------------------------
+# Bytes on disk and read latency of one long exercise version chain,
+# stored three ways:
+#
+#   full     every NNN.json a full copy (the layout before the object store)
+#   objects  `pack`: NNN.json pointers into data/exercises/.objects/
+#   delta K  `compact --every K`: JSON-patch deltas, a snapshot every K
+#
+# Reconstruction latency is measured per version with a cold cache (each
+# read rebuilds the chain from its snapshot) and warm (versions read in
+# order, so each one patches the previous rebuilt version).
+#
+# Runs against a temp folder, never data/exercises.
+#
+#   python benchmarks/exercise_history.py
+#   python benchmarks/exercise_history.py --versions 300 --items 40 --every 5 10 25
+# ------------------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_chain(n_versions: int, n_items: int, seed: int):
+    """Payloads of one cloze exercise edited a little on every save."""
+    rnd = random.Random(seed)
+    words = ["che", "boludo", "laburo", "bondi", "mina", "quilombo", "posta", "re", "copado", "guita"]
+    payload = {
+        "id": "bench-ex",
+        "type": "cloze",
+        "title": "Benchmark cloze",
+        "instructions": "Completá los huecos.",
+        "items": [
+            {"id": f"i{i}", "text": " ".join(rnd.choice(words) for _ in range(25)), "answers": [rnd.choice(words)]}
+            for i in range(n_items)
+        ],
+        "settings": {"shuffle": False, "case_sensitive": False},
+        "meta": {},
+    }
+    chain = []
+    for v in range(1, n_versions + 1):
+        payload = json.loads(json.dumps(payload))
+        payload["version"] = v
+        payload["created_at"] = f"2025-10-{1 + v % 28:02d}T12:{v % 60:02d}:00Z"
+        r = rnd.random()
+        if r < 0.7:
+            item = rnd.choice(payload["items"])
+            item["text"] = " ".join(rnd.choice(words) for _ in range(25))
+        elif r < 0.85:
+            payload["items"].append({"id": f"i{len(payload['items'])}", "text": rnd.choice(words), "answers": []})
+        elif r < 0.95 and len(payload["items"]) > 1:
+            payload["items"].pop(rnd.randrange(len(payload["items"])))
+        else:
+            payload["settings"]["shuffle"] = not payload["settings"]["shuffle"]
+        chain.append(payload)
+    return chain
+
+
+def write_full(root: str, chain) -> str:
+    from app.storage import payload_bytes
+
+    folder = os.path.join(root, "cloze", "benchmark-cloze")
+    os.makedirs(folder, exist_ok=True)
+    for p in chain:
+        with open(os.path.join(folder, f"{p['version']:03d}.json"), "wb") as f:
+            f.write(payload_bytes(p))
+    with open(os.path.join(folder, "current.json"), "wb") as f:
+        f.write(payload_bytes(chain[-1]))
+    return folder
+
+
+def disk_bytes(root: str) -> int:
+    """Bytes of files under root, hardlinks counted once, .gz/.br siblings skipped."""
+    seen, total = set(), 0
+    for dirpath, _dirs, files in os.walk(root):
+        for fn in files:
+            if fn.endswith((".gz", ".br", ".lock")):
+                continue
+            st = os.stat(os.path.join(dirpath, fn))
+            if st.st_ino in seen:
+                continue
+            seen.add(st.st_ino)
+            total += st.st_size
+    return total
+
+
+def read_latencies(folder: str, chain, cold: bool):
+    from app import storage
+
+    out = []
+    for p in chain:
+        path = os.path.join(folder, f"{p['version']:03d}.json")
+        if cold:
+            storage._rebuilt.clear()
+        t = time.perf_counter()
+        data = storage.read_exercise_bytes(path)
+        out.append((time.perf_counter() - t) * 1000)
+        assert data == storage.payload_bytes(p), f"version {p['version']} does not read back identically"
+    return out
+
+
+def pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--versions", type=int, default=200)
+    ap.add_argument("--items", type=int, default=30)
+    ap.add_argument("--every", type=int, nargs="+", default=[5, 10, 25])
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--show", type=int, default=10, help="print per-version latency for the first N versions")
+    args = ap.parse_args()
+
+    from app.storage import compact_exercise_history, gc_exercise_objects, pack_exercise_files
+
+    chain = make_chain(args.versions, args.items, args.seed)
+    print(f"{args.versions} versions, {len(chain[-1]['items'])} items in the last one\n")
+    print(f"{'layout':<10} {'on disk':>10} {'cold p50':>9} {'cold p99':>9} {'cold max':>9} {'warm p50':>9}")
+
+    tmp = tempfile.mkdtemp(prefix="pp-exhist-")
+    try:
+        layouts = [("full", None), ("objects", 0)] + [(f"delta {k}", k) for k in args.every]
+        per_version = {}
+        for name, every in layouts:
+            root = os.path.join(tmp, name.replace(" ", "-"))
+            folder = write_full(root, chain)
+            if every is not None:
+                pack_exercise_files(root)
+                if every > 0:
+                    compact_exercise_history(root, every)
+                gc_exercise_objects(root)
+            cold = read_latencies(folder, chain, cold=True)
+            warm = read_latencies(folder, chain, cold=False)
+            per_version[name] = cold
+            print(f"{name:<10} {disk_bytes(root) / 1024:>8.0f}KB {pct(cold, .5):>7.2f}ms "
+                  f"{pct(cold, .99):>7.2f}ms {max(cold):>7.2f}ms {pct(warm, .5):>7.2f}ms")
+
+        if args.show:
+            names = list(per_version)
+            print(f"\ncold read latency per version (ms)\n{'version':>8} " + " ".join(f"{n:>9}" for n in names))
+            for i in range(min(args.show, len(chain))):
+                print(f"{i + 1:>8} " + " ".join(f"{per_version[n][i]:>9.2f}" for n in names))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+# benchmarks/loadtest.py
+# ------------------------------------------------------------
+# HTTP load generator: starts the app on a local port (or targets --url),
+# then drives it with a weighted mix of visitor sessions from N threads at
+# a time, for each worker count in --workers:
+#
+#   home       GET /
+#   glossary   GET /<cc>/glosario, then 0-2 lazy-loaded /api/<cc>/entries pages
+#   search     search-as-you-type: /api/suggest?q= for each typed prefix,
+#              then /search?q=<word>
+#   page       GET /pages/<slug> (now and then the /pages index)
+#   exercise   GET /data/exercises/<type>/<slug>/current.json or NNN.json
+#
+# Sessions run front to back on one thread (one keep-alive connection per
+# thread), like a browser tab; threads pick the next session as soon as
+# they finish one (closed loop). Every level replays the same sessions.
+# Reported per level: throughput, errors, latency p50/p90/p99/max overall
+# and per request kind.
+#
+# Words, page slugs and exercise paths come from the data the server
+# reads (data/ by default, or a synthetic tree, see benchmarks/suite.py).
+# Everything is local: stdlib http.client and the werkzeug server, no
+# network access needed.
+#
+# Traces: --record writes the generated sessions as JSON lines
+# ({"session", "kind", "method", "path"}), --replay runs a trace instead
+# of generating one (e.g. one captured on another machine or edited by
+# hand).
+#
+#   python benchmarks/loadtest.py
+#   python benchmarks/loadtest.py --workers 1 4 16 --sessions 500 --mix search=60,glossary=40
+#   python benchmarks/loadtest.py --synthetic 100000 --record /tmp/trace.jsonl
+#   python benchmarks/loadtest.py --replay /tmp/trace.jsonl --url http://127.0.0.1:8000
+# ------------------------------------------------------------
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(HERE, ".."))
+RESULTS_DIR = os.path.join(HERE, "results")
+sys.path.insert(0, HERE)
+
+DEFAULT_MIX = {"home": 10, "glossary": 25, "search": 35, "page": 10, "exercise": 20}
+DEFAULT_WORKERS = (1, 2, 4, 8)
+SERVER_ENV = {"JOBS_WORKERS": "0", "PROFILER_TOKEN": ""}
+MAX_WORDS = 5000        # headwords sampled per glossary
+
+
+# --- Catalog: what there is to request ----------------------------------
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def load_catalog(root: str, seed: int = 0) -> dict:
+    """Enabled glossaries with sample words, published pages and exercise files under `root`/data."""
+    sys.path.insert(0, REPO)
+    from app.glossary_store import country_map
+
+    rnd = random.Random(seed)
+    data = os.path.join(root, "data")
+    settings = _read_json(os.path.join(data, "glossaries", "settings.json"), {})
+    glossaries = {}
+    for cc, base in country_map.items():
+        if not settings.get(cc):
+            continue
+        entries = _read_json(os.path.join(data, "glossaries", f"{base}.json"), [])
+        words = [e["word"] for e in entries if isinstance(e, dict) and e.get("word")]
+        if words:
+            glossaries[cc] = {"words": rnd.sample(words, min(len(words), MAX_WORDS)),
+                              "entries": len(words), "pages": max(1, len(words) // 200)}
+    pages = [p["slug"] for p in _read_json(os.path.join(data, "pages", "pages.json"), [])
+             if isinstance(p, dict) and p.get("slug") and p.get("status") == "published"]
+    exercises = []
+    for rec in _read_json(os.path.join(data, "exercises", "exercises.index.json"), {}).get("exercises", []):
+        paths = [v.get("path") for v in rec.get("versions", []) if (v.get("path") or "").count("/") == 4]
+        if paths:
+            exercises.append("/" + paths[-1].rsplit("/", 1)[0] + "/current.json")
+            exercises.append("/" + rnd.choice(paths))
+    return {"glossaries": glossaries, "pages": pages, "exercises": exercises}
+
+
+# --- Sessions -------------------------------------------------------------
+
+def _pick_glossary(glossaries: dict, rnd: random.Random) -> str:
+    # bigger glossaries get proportionally more visits
+    codes = sorted(glossaries)
+    return rnd.choices(codes, [glossaries[cc]["entries"] for cc in codes])[0]
+
+
+def _session(kind: str, catalog: dict, rnd: random.Random) -> list:
+    glossaries = catalog["glossaries"]
+    if kind == "glossary" and glossaries:
+        cc = _pick_glossary(glossaries, rnd)
+        reqs = [("glosario", f"/{cc}/glosario")]
+        pages = glossaries[cc]["pages"]
+        for page in range(2, 2 + min(pages - 1, rnd.randint(0, 2))):
+            reqs.append(("entries", f"/api/{cc}/entries?page={page}"))
+        return reqs
+    if kind == "search" and glossaries:
+        word = rnd.choice(glossaries[_pick_glossary(glossaries, rnd)]["words"])
+        typed = range(2, min(len(word), 6) + 1)
+        reqs = [("suggest", "/api/suggest?q=" + quote(word[:n])) for n in typed]
+        return reqs + [("search", "/search?q=" + quote(word))]
+    if kind == "page" and catalog["pages"]:
+        if rnd.random() < 0.2:
+            return [("pages", "/pages")]
+        return [("page", "/pages/" + quote(rnd.choice(catalog["pages"])))]
+    if kind == "exercise" and catalog["exercises"]:
+        return [("exercise", rnd.choice(catalog["exercises"]))]
+    return [("home", "/")]
+
+
+def generate(catalog: dict, mix: dict, n: int, seed: int = 0) -> list:
+    """`n` sessions, each a list of (kind, path) requests."""
+    rnd = random.Random(seed)
+    kinds = sorted(mix)
+    weights = [mix[k] for k in kinds]
+    return [_session(rnd.choices(kinds, weights)[0], catalog, rnd) for _ in range(n)]
+
+
+def write_trace(path: str, sessions: list) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for sid, reqs in enumerate(sessions):
+            for kind, p in reqs:
+                f.write(json.dumps({"session": sid, "kind": kind, "method": "GET", "path": p}, ensure_ascii=False) + "\n")
+
+
+def read_trace(path: str) -> list:
+    """Sessions from a JSON-lines trace; consecutive lines with the same session id form one."""
+    sessions, last = [], object()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if (rec.get("method") or "GET").upper() != "GET":
+                continue
+            sid = rec.get("session", len(sessions))
+            if sid != last or not sessions:
+                sessions.append([])
+                last = sid
+            sessions[-1].append((rec.get("kind") or "replay", rec["path"]))
+    return sessions
+
+
+# --- Load ---------------------------------------------------------------
+
+def _pct(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))]
+
+
+def _latency(ms: list) -> dict:
+    ms = sorted(ms)
+    return {"count": len(ms), "p50_ms": round(_pct(ms, 50), 2), "p90_ms": round(_pct(ms, 90), 2),
+            "p99_ms": round(_pct(ms, 99), 2), "max_ms": round(ms[-1], 2) if ms else 0.0}
+
+
+def run_level(base_url: str, sessions: list, workers: int, timeout: float = 30.0) -> dict:
+    """Play every session once with `workers` threads; latency and throughput."""
+    url = urlsplit(base_url)
+    prefix = url.path.rstrip("/")
+    lock = threading.Lock()
+    cursor = iter(range(len(sessions)))
+    samples = []    # (kind, status, ms, bytes)
+
+    def worker():
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        mine = []
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                break
+            for kind, path in sessions[i]:
+                t0 = time.perf_counter()
+                try:
+                    conn.request("GET", prefix + path, headers={"Accept-Encoding": "gzip"})
+                    resp = conn.getresponse()
+                    body = resp.read()
+                    mine.append((kind, resp.status, (time.perf_counter() - t0) * 1000, len(body)))
+                except (OSError, http.client.HTTPException):
+                    mine.append((kind, 0, (time.perf_counter() - t0) * 1000, 0))
+                    conn.close()
+        conn.close()
+        with lock:
+            samples.extend(mine)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"load-{k}") for k in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    by_kind = {}
+    for kind, status, ms, _n in samples:
+        by_kind.setdefault(kind, []).append(ms)
+    statuses = {}
+    for _kind, status, _ms, _n in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "workers": workers,
+        "requests": len(samples),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(1 for s in samples if s[1] == 0 or s[1] >= 500),
+        "statuses": statuses,
+        "bytes": sum(s[3] for s in samples),
+        "latency": _latency([s[2] for s in samples]),
+        "kinds": {k: _latency(v) for k, v in sorted(by_kind.items())},
+    }
+
+
+# --- Local server -------------------------------------------------------
+
+def serve(synthetic_size: int, seed: int) -> int:
+    """Child process: build the data (if synthetic), serve on a free port, report 'READY <port> <root>'."""
+    import logging
+    import signal
+    import tempfile
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    root = REPO
+    if synthetic_size:
+        import suite
+        root = os.path.join(tempfile.mkdtemp(prefix="pp-load-"), "tree")
+        suite.build_tree(root, synthetic_size, exercises=200, versions=3, seed=seed)
+    else:
+        sys.path.insert(0, REPO)
+        os.chdir(REPO)
+    from app import create_app
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    # terminate() from the parent: leave serve_forever so the temp tree is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server = make_server("127.0.0.1", 0, create_app("app.config.ProdConfig"), threaded=True,
+                         request_handler=KeepAliveHandler)
+    print(f"READY {server.server_port} {root}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        if synthetic_size:
+            import shutil
+            shutil.rmtree(os.path.dirname(root), ignore_errors=True)
+    return 0
+
+
+def start_server(synthetic_size: int, seed: int, timeout: float = 900.0):
+    """(process, base_url, data root) of a local server started with this script's --serve."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--synthetic", str(synthetic_size), "--seed", str(seed)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, env=dict(os.environ, **SERVER_ENV))
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        line = proc.stdout.readline()
+        if not line:
+            break
+        if line.startswith("READY "):
+            _, port, root = line.rstrip("\n").split(" ", 2)
+            return proc, f"http://127.0.0.1:{port}", root
+    proc.kill()
+    raise RuntimeError("local server did not start")
+
+
+# --- CLI ----------------------------------------------------------------
+
+def parse_mix(text: str) -> dict:
+    mix = dict(DEFAULT_MIX)
+    if text:
+        mix = {}
+        for part in text.split(","):
+            name, _, weight = part.partition("=")
+            if name.strip() not in DEFAULT_MIX:
+                raise argparse.ArgumentTypeError(f"unknown traffic kind: {name} (known: {', '.join(DEFAULT_MIX)})")
+            mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _print_level(r: dict) -> None:
+    lat = r["latency"]
+    print(f"workers {r['workers']:>3}: {r['rps']:>8.1f} req/s  {r['requests']} requests  errors {r['errors']}"
+          f"  p50 {lat['p50_ms']:.1f}  p90 {lat['p90_ms']:.1f}  p99 {lat['p99_ms']:.1f}  max {lat['max_ms']:.1f} ms")
+    for kind, k in r["kinds"].items():
+        print(f"    {kind:<10} n={k['count']:<6} p50 {k['p50_ms']:>8.1f}  p90 {k['p90_ms']:>8.1f}  p99 {k['p99_ms']:>8.1f} ms")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Local HTTP load test with a realistic traffic mix.")
+    ap.add_argument("--workers", type=int, nargs="+", default=list(DEFAULT_WORKERS), help="concurrent clients, one level each")
+    ap.add_argument("--sessions", type=int, default=300, help="sessions per level (generated traffic)")
+    ap.add_argument("--warmup", type=int, default=30, help="sessions played once before measuring")
+    ap.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                    help="weights, e.g. home=10,glossary=25,search=35,page=10,exercise=20")
+    ap.add_argument("--url", default=None, help="running server to target (default: start one locally)")
+    ap.add_argument("--data", default=REPO, help="with --url: project root whose data/ the server reads")
+    ap.add_argument("--synthetic", type=int, default=0, help="serve a synthetic tree with this many 'ar' entries")
+    ap.add_argument("--record", default=None, help="write the generated sessions as a JSON-lines trace")
+    ap.add_argument("--replay", default=None, help="play this JSON-lines trace instead of generated traffic")
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (s)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="results JSON (default: benchmarks/results/load-<time>.json)")
+    ap.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        return serve(args.synthetic, args.seed)
+
+    proc = None
+    try:
+        if args.url:
+            base_url, root = args.url, args.data
+        else:
+            print("starting local server" + (f" ({args.synthetic} synthetic entries)" if args.synthetic else ""),
+                  file=sys.stderr, flush=True)
+            proc, base_url, root = start_server(args.synthetic, args.seed)
+
+        if args.replay:
+            sessions = read_trace(args.replay)
+        else:
+            sessions = generate(load_catalog(root, args.seed), args.mix, args.sessions, args.seed)
+        if args.record:
+            write_trace(args.record, sessions)
+            print(f"trace → {args.record}", file=sys.stderr)
+        if not sessions:
+            print("nothing to send (empty trace)", file=sys.stderr)
+            return 1
+
+        if args.warmup:
+            run_level(base_url, sessions[:args.warmup], 1, args.timeout)
+        levels = []
+        for workers in args.workers:
+            levels.append(run_level(base_url, sessions, workers, args.timeout))
+            _print_level(levels[-1])
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    doc = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "url": args.url or "local",
+            "synthetic": args.synthetic,
+            "replay": args.replay,
+            "sessions": len(sessions),
+            "requests_per_level": sum(len(s) for s in sessions),
+            "mix": None if args.replay else args.mix,
+            "cpus": os.cpu_count(),
+        },
+        "levels": levels,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"results → {out}")
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# benchmarks/stress_glossary_writes.py
+# ------------------------------------------------------------
+# Many processes hammering add/update/delete on ONE glossary file through
+# GlossaryRepository (the admin write path), then a check that nothing was
+# lost: every process's surviving words must be in the final file with the
+# content of their last update.
+#
+# Runs against a temp copy, never data/glossaries.
+#
+#   python benchmarks/stress_glossary_writes.py
+#   python benchmarks/stress_glossary_writes.py --procs 8 --ops 200 --flush-delay 0.01
+# ------------------------------------------------------------
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+NAME = "glosario-stress"
+
+
+def worker(root: str, proc: int, ops: int, flush_delay: float, seed: int, out) -> None:
+    from app.glossary_store import GlossaryStore
+    from app.glossary_repo import GlossaryConflict, GlossaryRepository
+
+    rnd = random.Random(seed + proc)
+    repo = GlossaryRepository(NAME, flush_delay=flush_delay, store=GlossaryStore(root))
+    expected = {}   # word -> last definition we wrote (None = deleted)
+    conflicts = vanished = 0
+    for i in range(ops):
+        r = rnd.random()
+        mine = [w for w, d in expected.items() if d is not None]
+        if r < 0.6 or not mine:
+            word = f"p{proc:02d}-w{i:04d}"
+            d = f"def {proc}/{i}"
+            repo.add({"word": word, "slug": word, "senses": [{"definition": d}]})
+            expected[word] = d
+        elif r < 0.9:
+            word = rnd.choice(mine)
+            d = f"upd {proc}/{i}"
+            try:
+                cur = repo.find(word)
+                if cur is None:         # our own entry disappeared: a lost write
+                    vanished += 1
+                    continue
+                repo.replace(cur, dict(cur, senses=[{"definition": d}]))
+                expected[word] = d
+            except GlossaryConflict:
+                conflicts += 1
+        else:
+            word = rnd.choice(mine)
+            repo.delete_word(word)
+            expected[word] = None
+        if rnd.random() < 0.05:
+            time.sleep(flush_delay)
+    repo.flush()
+    out.put((proc, expected, {"flushes": repo.flushes, "merges": repo.merges, "conflicts": conflicts, "vanished": vanished}))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Multi-process write stress test for the glossary repository.")
+    ap.add_argument("--procs", type=int, default=6)
+    ap.add_argument("--ops", type=int, default=150, help="operations per process")
+    ap.add_argument("--seed-entries", type=int, default=500, help="pre-existing entries in the file")
+    ap.add_argument("--flush-delay", type=float, default=0.02)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--timeout", type=float, default=300, help="seconds to wait for each worker")
+    ap.add_argument("--root", help="directory for the glossary copy (default: a new temp dir)")
+    args = ap.parse_args()
+
+    root = args.root or tempfile.mkdtemp(prefix="glossary-stress-")
+    path = os.path.join(root, f"{NAME}.json")
+    base = [{"word": f"base{i:05d}", "slug": f"base{i:05d}", "senses": []} for i in range(args.seed_entries)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(base, f)
+
+    out = mp.Queue()
+    t0 = time.perf_counter()
+    procs = [mp.Process(target=worker, args=(root, p, args.ops, args.flush_delay, args.seed, out))
+             for p in range(args.procs)]
+    for p in procs:
+        p.start()
+    results = [out.get(timeout=args.timeout) for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    with open(path, "r", encoding="utf-8") as f:
+        final = {e["word"]: e for e in json.load(f)}
+
+    lost, stale, resurrected = [], [], []
+    totals = {"flushes": 0, "merges": 0, "conflicts": 0, "vanished": 0}
+    for proc, expected, stats in results:
+        for k in totals:
+            totals[k] += stats[k]
+        for word, d in expected.items():
+            if d is None:
+                if word in final:
+                    resurrected.append(word)
+            elif word not in final:
+                lost.append(word)
+            elif final[word]["senses"][0]["definition"] != d:
+                stale.append(word)
+    missing_base = [e["word"] for e in base if e["word"] not in final]
+
+    print(json.dumps({
+        "procs": args.procs,
+        "ops_per_proc": args.ops,
+        "seconds": round(elapsed, 3),
+        "final_entries": len(final),
+        **totals,
+        "lost": len(lost),
+        "stale": len(stale),
+        "resurrected": len(resurrected),
+        "missing_base": len(missing_base),
+    }, indent=2))
+    ok = not (lost or stale or resurrected or missing_base or totals["vanished"])
+    print("OK: no lost writes" if ok else f"FAIL: lost={lost[:5]} stale={stale[:5]} resurrected={resurrected[:5]}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
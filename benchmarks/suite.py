@@ -0,0 +1,368 @@
+# benchmarks/suite.py
+# ------------------------------------------------------------
+# Repeatable end-to-end benchmarks of the hot routes, through the Flask
+# test client, on synthetic data (benchmarks/synthetic.py) at several
+# glossary sizes:
+#
+#   search.*            /search (exact word, common phrase, miss, fuzzy)
+#   glosario.*          /ar/glosario (first page, one letter, last page)
+#   by_source.*         /api/ar/by-source (series, one episode, film)
+#   exercise_index.*    _load_exercise_index() warm and after the file changed
+#   admin.*             exercise library page, exercise save, glossary
+#                       add / update requests and the batched file flush
+#
+# Each size runs in its own process on a throwaway tree (a copy of app/,
+# the real templates, synthetic data/), never on data/. The "ar" glossary
+# has SIZE entries, the other countries SIZE // 100 each.
+#
+# Per benchmark: first call (cold caches) and p50/p95/mean of the repeats.
+# Results go to JSON; --compare flags benchmarks whose p50 got slower than
+# the baseline by more than --threshold (exit status 1), so a run on a
+# branch can be checked against one on main:
+#
+#   python benchmarks/suite.py                                # 1k, 10k, 100k
+#   python benchmarks/suite.py --sizes 1000 --out base.json
+#   python benchmarks/suite.py --sizes 1000 --compare base.json
+#   python benchmarks/suite.py --current new.json --compare base.json   # no run
+# ------------------------------------------------------------
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(HERE, ".."))
+RESULTS_DIR = os.path.join(HERE, "results")
+sys.path.insert(0, HERE)
+
+import synthetic  # noqa: E402
+
+TARGET = "ar"
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Child environment: no background job threads, no timer flushes (the
+# flush is measured on its own), JSON backend, profiler off
+CHILD_ENV = {
+    "JOBS_WORKERS": "0",
+    "GLOSSARY_FLUSH_DELAY": "3600",
+    "GLOSSARY_BACKEND": "json",
+    "PROFILER_TOKEN": "",
+    "EXERCISE_DELTA_EVERY": "0",
+}
+
+
+# --- Timing -------------------------------------------------------------
+
+def _pct(sorted_ms, p):
+    return sorted_ms[min(len(sorted_ms) - 1, int(round(p / 100.0 * (len(sorted_ms) - 1))))]
+
+
+def measure(run, prepare=None, repeat=20, max_seconds=10.0, min_repeat=3) -> dict:
+    """First call, then up to `repeat` timed calls (fewer once `max_seconds` is spent)."""
+    if prepare:
+        prepare()
+    t0 = time.perf_counter()
+    run()
+    first = time.perf_counter() - t0
+    times = []
+    deadline = time.perf_counter() + max_seconds
+    while len(times) < repeat and (len(times) < min_repeat or time.perf_counter() < deadline):
+        if prepare:
+            prepare()
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+    ms = sorted(t * 1000 for t in times)
+    return {
+        "n": len(ms),
+        "first_ms": round(first * 1000, 3),
+        "min_ms": round(ms[0], 3),
+        "p50_ms": round(_pct(ms, 50), 3),
+        "p95_ms": round(_pct(ms, 95), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+    }
+
+
+# --- Child: one size on a throwaway tree --------------------------------
+
+def build_tree(root: str, size: int, exercises: int, versions: int, seed: int) -> dict:
+    """Copy of app/ + synthetic data under `root`; returns facts the benchmarks need."""
+    t0 = time.perf_counter()
+    shutil.copytree(os.path.join(REPO, "app"), os.path.join(root, "app"),
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    try:
+        os.symlink(os.path.join(REPO, "templates"), os.path.join(root, "templates"))
+    except OSError:
+        shutil.copytree(os.path.join(REPO, "templates"), os.path.join(root, "templates"))
+    # admin uploads write under static/ relative to the working directory
+    os.makedirs(os.path.join(root, "static"))
+    for d in ("glossaries", "exercises", "pages"):
+        os.makedirs(os.path.join(root, "data", d))
+
+    sys.path.insert(0, root)
+    os.chdir(root)
+    from app.glossary_store import country_map
+
+    glossary_dir = os.path.join(root, "data", "glossaries")
+    target = None
+    for k, (cc, base) in enumerate(country_map.items()):
+        n = size if cc == TARGET else size // 100
+        entries = synthetic.make_glossary(n, seed + k)
+        if cc == TARGET:
+            target = entries
+        with open(os.path.join(glossary_dir, f"{base}.json"), "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=4)
+    with open(os.path.join(glossary_dir, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump({cc: True for cc in country_map}, f)
+    t_glossaries = time.perf_counter() - t0
+
+    # exercises go through the real writer (object store, meta/current/NNN.json)
+    from app import storage
+    from app.exercise_index import exercise_index
+    ids = []
+    for i, (kind, payload) in enumerate(synthetic.make_library(exercises, seed)):
+        ex_id = f"bench{i:06d}"
+        for v in range(1, versions + 1):
+            doc = dict(payload, id=ex_id, version=v, created_at=f"2025-10-{1 + v % 28:02d}T12:00:00Z")
+            storage.write_exercise_version(ex_id, v, doc, title=doc["title"], ex_type=kind, pin=True)
+        ids.append((ex_id, kind, payload))
+    exercise_index.reindex()
+
+    return {
+        "target": target,
+        "exercises": ids,
+        "setup": {
+            "entries": size,
+            "entries_all_countries": size + (len(country_map) - 1) * (size // 100),
+            "glossary_bytes": os.path.getsize(os.path.join(glossary_dir, f"{country_map[TARGET]}.json")),
+            "exercises": exercises,
+            "versions_per_exercise": versions,
+            "glossaries_seconds": round(t_glossaries, 2),
+            "total_seconds": round(time.perf_counter() - t0, 2),
+        },
+    }
+
+
+def _expect(resp, status=200):
+    if resp.status_code != status:
+        raise RuntimeError(f"HTTP {resp.status_code} (expected {status}): {resp.get_data(as_text=True)[:200]}")
+    return resp
+
+
+def run_size(tree: str, size: int, args) -> dict:
+    facts = build_tree(tree, size, args.exercises, args.versions, args.seed)
+    from app import create_app
+    from app.glossary_store import country_map
+    from app.routes_admin import _load_exercise_index
+    from app.glossary_repo import flush_pending
+    from app.exercise_index import exercise_index
+
+    app = create_app()
+    client = app.test_client()
+    target = facts["target"]
+    middle = target[len(target) // 2]["word"]
+    typo = middle[0] + middle[2] + middle[1] + middle[3:]     # swap two letters
+    base = country_map[TARGET]
+    series = synthetic.SERIES[7]
+    # an episode of that series that is actually cited, so the query matches at every size
+    season, episode = next(((x["source"]["season"], x["source"]["episode"])
+                            for e in target for sn in e["senses"] for x in sn["examples"]
+                            if x["source"].get("title") == series), ("1", "1"))
+    counter = iter(range(10 ** 9))
+
+    def get(url, status=200):
+        return lambda: _expect(client.get(url), status)
+
+    def in_app(fn):
+        def run():
+            with app.app_context():
+                fn()
+        return run
+
+    def bump_index_mtime():
+        st = os.stat(exercise_index.path)
+        os.utime(exercise_index.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def exercise_save():
+        ex_id, kind, payload = facts["exercises"][next(counter) % len(facts["exercises"])]
+        body = {"id": ex_id, "type": kind, "title": payload["title"], "items": payload["items"],
+                "columns": payload["columns"], "settings": payload["settings"]}
+        _expect(client.post("/admin/exercises/save", json=body))
+
+    def glossary_add():
+        word = f"zz bench {next(counter):06d}"
+        _expect(client.post(f"/admin/glosario/{TARGET}/add", data={
+            "word": word, "variants": "{}", "senses": json.dumps(target[0]["senses"])}))
+
+    def glossary_update():
+        e = target[next(counter) % len(target)]
+        senses = [dict(s, definition=s["definition"] + " ") for s in e["senses"]]
+        _expect(client.post(f"/admin/glosario/{TARGET}/update", data={
+            "original_word": e["word"], "word": e["word"],
+            "variants": json.dumps(e["variants"]), "senses": json.dumps(senses)}))
+
+    # read benchmarks first: the admin writes below change the glossary
+    plan = [
+        ("search.exact", get(f"/search?q={middle}"), None),
+        ("search.common", get("/search?q=la gamba"), None),
+        ("search.miss", get("/search?q=xqzzyk"), None),
+        ("search.fuzzy", get(f"/search?q={typo}&mode=fuzzy"), None),
+        ("glosario.first_page", get(f"/{TARGET}/glosario"), None),
+        ("glosario.letter", get(f"/{TARGET}/glosario?letter=M"), None),
+        ("glosario.last_page", get(f"/{TARGET}/glosario?page=100000"), None),
+        ("by_source.series", get(f"/api/{TARGET}/by-source?kind=serie&title={series}"), None),
+        ("by_source.episode", get(f"/api/{TARGET}/by-source?kind=serie&title={series}"
+                                  f"&season={season}&episode={episode}"), None),
+        ("by_source.film", get(f"/api/{TARGET}/by-source?kind=pelicula&title={synthetic.FILMS[42]}"), None),
+        ("exercise_index.load", in_app(_load_exercise_index), None),
+        ("exercise_index.reload", in_app(_load_exercise_index), bump_index_mtime),
+        ("admin.exercises_page", get("/admin/exercises"), None),
+        ("admin.exercise_save", exercise_save, None),
+        ("admin.glossary_add", glossary_add, None),
+        ("admin.glossary_update", glossary_update, None),
+        ("admin.glossary_flush", lambda: flush_pending(base), glossary_update),
+    ]
+    wanted = set(args.only or ())
+    results = {}
+    for name, run, prepare in plan:
+        if wanted and not any(name == w or name.startswith(w + ".") for w in wanted):
+            continue
+        try:
+            results[name] = measure(run, prepare, args.repeat, args.max_seconds)
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(f"  [{size}] {name:<24} {_fmt(results[name])}", file=sys.stderr, flush=True)
+    return {"setup": facts["setup"], "benchmarks": results}
+
+
+def _fmt(r: dict) -> str:
+    if "error" in r:
+        return "ERROR " + r["error"]
+    return f"first {r['first_ms']:>9.2f}  p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f} ms  (n={r['n']})"
+
+
+# --- Parent: run sizes, write JSON, compare -----------------------------
+
+def _git(*argv) -> str:
+    try:
+        return subprocess.run(["git", *argv], cwd=REPO, capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_all(args) -> dict:
+    doc = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("child", "child_out", "tree")},
+        },
+        "sizes": {},
+    }
+    env = dict(os.environ, **CHILD_ENV)
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="pp-bench-") as tmp:
+            out = os.path.join(tmp, "result.json")
+            cmd = [sys.executable, os.path.abspath(__file__), "--child", str(size),
+                   "--tree", os.path.join(tmp, "tree"), "--child-out", out,
+                   "--exercises", str(args.exercises), "--versions", str(args.versions),
+                   "--repeat", str(args.repeat), "--max-seconds", str(args.max_seconds),
+                   "--seed", str(args.seed)]
+            for name in args.only or ():
+                cmd += ["--only", name]
+            print(f"== {size} entries", file=sys.stderr, flush=True)
+            proc = subprocess.run(cmd, env=env)
+            if proc.returncode != 0 or not os.path.exists(out):
+                doc["sizes"][str(size)] = {"error": f"benchmark process exited with {proc.returncode}"}
+                continue
+            with open(out, "r", encoding="utf-8") as f:
+                doc["sizes"][str(size)] = json.load(f)
+    return doc
+
+
+def compare(baseline: dict, current: dict, threshold: float, floor_ms: float) -> int:
+    """Print p50 deltas; returns the number of regressions."""
+    regressions = 0
+    print(f"baseline {baseline['meta'].get('commit') or '?'} → current {current['meta'].get('commit') or '?'}"
+          f" (p50, regression = slower by >{threshold:.0%} and >{floor_ms} ms)")
+    for size, cur in current.get("sizes", {}).items():
+        old = baseline.get("sizes", {}).get(size)
+        if not old or "benchmarks" not in old or "benchmarks" not in cur:
+            continue
+        print(f"-- {size} entries")
+        for name, r in cur["benchmarks"].items():
+            o = old["benchmarks"].get(name)
+            if not o or "p50_ms" not in o or "p50_ms" not in r:
+                continue
+            delta = r["p50_ms"] - o["p50_ms"]
+            ratio = r["p50_ms"] / o["p50_ms"] if o["p50_ms"] else float("inf")
+            slow = ratio > 1 + threshold and delta > floor_ms
+            regressions += slow
+            print(f"  {name:<24} {o['p50_ms']:>9.2f} → {r['p50_ms']:>9.2f} ms  {ratio - 1:+7.1%}"
+                  + ("  REGRESSION" if slow else ""))
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="End-to-end route benchmarks on synthetic glossaries and exercises.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="entries in the 'ar' glossary")
+    ap.add_argument("--exercises", type=int, default=500, help="synthetic exercises")
+    ap.add_argument("--versions", type=int, default=3, help="versions per exercise")
+    ap.add_argument("--repeat", type=int, default=20, help="timed calls per benchmark")
+    ap.add_argument("--max-seconds", type=float, default=10.0, help="stop repeating a benchmark after this long")
+    ap.add_argument("--only", action="append", help="benchmark name or group (e.g. search); repeatable")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="results JSON (default: benchmarks/results/bench-<time>.json)")
+    ap.add_argument("--compare", default=None, help="baseline results JSON to compare against")
+    ap.add_argument("--current", default=None, help="with --compare: compare this results JSON instead of running")
+    ap.add_argument("--threshold", type=float, default=0.25, help="p50 slowdown counted as a regression")
+    ap.add_argument("--floor-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    ap.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--child-out", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--tree", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child is not None:
+        result = run_size(args.tree, args.child, args)
+        with open(args.child_out, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    if args.current:
+        with open(args.current, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    else:
+        doc = run_all(args)
+        out = args.out or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%dT%H%M%S')}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"results → {out}")
+        for size, r in doc["sizes"].items():
+            print(f"-- {size} entries" + (f": {r['error']}" if "error" in r else ""))
+            for name, b in r.get("benchmarks", {}).items():
+                print(f"  {name:<24} {_fmt(b)}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(baseline, doc, args.threshold, args.floor_ms) else 0
+    failed = any("error" in r for r in doc["sizes"].values()) or any(
+        "error" in b for r in doc["sizes"].values() for b in r.get("benchmarks", {}).values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# benchmarks/synthetic.py
+# ------------------------------------------------------------
+# Deterministic synthetic data in the real on-disk schemas, for the
+# benchmark suite (benchmarks/suite.py):
+#
+#   make_glossary(n, seed)       entries shaped like data/glossaries/*.json
+#                                (word, slug, variants, audio, senses with
+#                                examples and structured sources)
+#   make_exercise(kind, i, seed) payloads shaped like data/exercises/<type>/
+#                                <slug>/NNN.json (tf, mcq, cloze, dictation,
+#                                dnd_text)
+#
+# Same (n, seed) → same data, so runs on different commits compare.
+# Words are unique (a fixed-length syllable code of a permuted index), mix
+# accents and ñ (accent-insensitive sort and search paths), and ~10% are
+# multi-word expressions. Sources come from fixed pools, so a by-source
+# query matches a similar share of a glossary at every size.
+#
+#   python benchmarks/synthetic.py --entries 1000 --out /tmp/glosario.json
+# ------------------------------------------------------------
+
+import argparse
+import json
+import random
+import sys
+
+CONSONANTS = "bcdfglmnprstvzñ"
+VOWELS = "aeiouáé"
+SYLLABLES = [c + v for c in CONSONANTS for v in VOWELS]      # 105, all 2 chars
+WORD_SYLLABLES = 3
+WORD_SPACE = len(SYLLABLES) ** WORD_SYLLABLES                 # 1,157,625 words
+_STRIDE = 7919                                                # coprime with WORD_SPACE
+
+TAILS = ["de", "la gamba", "al pedo", "en pedo", "la posta", "con fritas"]
+WORD_CLASSES = ["sustantivo masculino", "sustantivo femenino", "adjetivo", "verbo", "interjección", "locución"]
+TAGS = ["🇦🇷 Argentina", "📈 común", "🗣️ coloquial", "⚠️ vulgar", "🍺 bebida", "💼 trabajo", "👥 personas"]
+EQUIVALENTS = ["dude", "beer", "job", "bus", "mess", "money", "cool", "truth", "girl", "guy"]
+
+SERIES = [f"Serie {k:03d}" for k in range(200)]
+FILMS = [f"Película {k:03d}" for k in range(150)]
+SONGS = [(f"Canción {k:02d}", f"Artista {k % 20:02d}") for k in range(50)]
+HANDLES = [f"@cuenta{k:02d}" for k in range(50)]
+
+EXERCISE_KINDS = ["tf", "mcq", "cloze", "dictation", "dnd_text"]
+
+
+def word_at(i: int, seed: int = 0) -> str:
+    """The i-th synthetic headword (unique for 0 <= i < WORD_SPACE)."""
+    code = (i * _STRIDE + seed) % WORD_SPACE
+    parts = []
+    for _ in range(WORD_SYLLABLES):
+        code, r = divmod(code, len(SYLLABLES))
+        parts.append(SYLLABLES[r])
+    return "".join(parts)
+
+
+def slugify(word: str) -> str:
+    # same rule as the admin add/update routes
+    slug = word.lower().replace("ñ", "n")
+    return "".join(ch if ch.isalnum() or ch == " " else "-" for ch in slug).replace(" ", "-")
+
+
+def make_source(rnd: random.Random) -> dict:
+    r = rnd.random()
+    if r < 0.55:
+        return {"kind": "serie", "title": rnd.choice(SERIES), "year": str(rnd.randint(1995, 2025)),
+                "season": str(rnd.randint(1, 5)), "episode": str(rnd.randint(1, 12))}
+    if r < 0.90:
+        return {"kind": "pelicula", "title": rnd.choice(FILMS), "year": str(rnd.randint(1980, 2025))}
+    if r < 0.95:
+        song, artist = rnd.choice(SONGS)
+        return {"kind": "cancion", "song": song, "artist": artist}
+    return {"kind": "redes", "handle": rnd.choice(HANDLES)}
+
+
+def make_entry(i: int, rnd: random.Random, seed: int = 0) -> dict:
+    word = word_at(i, seed)
+    if rnd.random() < 0.1:
+        word = f"{word} {rnd.choice(TAILS)}"
+    slug = slugify(word)
+    senses = []
+    for s in range(rnd.choice((1, 1, 1, 2, 2, 3))):
+        examples = []
+        for x in range(rnd.choice((1, 1, 2))):
+            examples.append({
+                "es": f"Che, {' '.join(word_at(rnd.randrange(WORD_SPACE)) for _ in range(6))} `{word}` "
+                      f"{' '.join(word_at(rnd.randrange(WORD_SPACE)) for _ in range(4))}.",
+                "en": "Hey, that is a synthetic example sentence used for benchmarking only.",
+                "source": make_source(rnd),
+                "linked_words": [word_at(rnd.randrange(WORD_SPACE))] if rnd.random() < 0.2 else [],
+                "audio": f"static/audio/examples/{slug}/ex-{slug}-{s + 1:02d}{x + 1}.mp3",
+            })
+        senses.append({
+            "id": f"s{s + 1}",
+            "tag_word_class": [rnd.choice(WORD_CLASSES)],
+            "tag_general": rnd.sample(TAGS, 2),
+            "definition": f"<p>Forma <em>coloquial</em> de decir <strong>{word_at(rnd.randrange(WORD_SPACE))}</strong>"
+                          f", muy usada en contextos {rnd.choice(['informales', 'laborales', 'familiares'])}.</p>",
+            "equivalents": rnd.sample(EQUIVALENTS, rnd.randint(1, 3)),
+            "see_also": [],
+            "examples": examples,
+        })
+    return {
+        "word": word,
+        "slug": slug,
+        "variants": {"ms": [], "mp": [], "fs": [], "fp": [], "diminutivo": [], "aumentativo": []},
+        "audio": f"static/audio/word/w-{slug}.mp3",
+        "senses": senses,
+    }
+
+
+def make_glossary(n: int, seed: int = 0) -> list:
+    """`n` entries, unsorted (the app sorts on load)."""
+    rnd = random.Random(seed)
+    return [make_entry(i, rnd, seed) for i in range(n)]
+
+
+def _media(rnd: random.Random) -> dict:
+    return {"youtube_url": None, "image_alt": None, "audio": None, "video": None,
+            "image": "/static/exercises/media/bench/q_image.jpg" if rnd.random() < 0.3 else None}
+
+
+def make_exercise(kind: str, i: int, seed: int = 0, n_items: int = 8) -> dict:
+    """One exercise payload (without id/version/created_at, set by the writer)."""
+    rnd = random.Random(seed * 1_000_003 + i)
+    words = [word_at(rnd.randrange(WORD_SPACE)) for _ in range(n_items * 4)]
+    columns, settings = {}, {}
+    if kind == "tf":
+        items = [{"prompt": f"¿«{w}» es una palabra?", "answer": rnd.random() < 0.5, "feedback_correct": "¡Bien!",
+                  "feedback_incorrect": "No.", "hint": None, "media": _media(rnd)} for w in words[:n_items]]
+    elif kind == "mcq":
+        items = [{"prompt": f"¿Qué significa «{words[k]}»?",
+                  "choices": [{"key": key, "text": words[k * 4 + j], "feedback": None} for j, key in enumerate("ABCD")],
+                  "answer": rnd.choice("ABCD"), "hint": None, "media": _media(rnd)} for k in range(n_items)]
+    elif kind == "cloze":
+        items = [{"prompt": f"Ayer {w} [[B1]] con los pibes.",
+                  "blanks": [{"key": "B1", "answers": [words[-1 - k]], "case_sensitive": False, "normalize_accents": True,
+                              "hint": None, "feedback_correct": None, "feedback_incorrect": None}],
+                  "feedback_correct": None, "feedback_incorrect": None, "hint": None, "media": _media(rnd)}
+                 for k, w in enumerate(words[:n_items])]
+    elif kind == "dictation":
+        items = [{"answer": " ".join(words[k * 4:k * 4 + 4]), "hint": None, "media": _media(rnd)} for k in range(n_items)]
+        settings = {"case_sensitive": False, "punctuation_sensitive": False, "accent_sensitive": True, "trim_user_input": True}
+    else:
+        columns = [{"id": "ser", "label": "Ser"}, {"id": "estar", "label": "Estar"}]
+        items = [{"id": f"i{k + 1}", "text": w, "correct_column": rnd.choice(["ser", "estar"]), "feedback_correct": None,
+                  "feedback_incorrect": None, "media": _media(rnd)} for k, w in enumerate(words[:n_items])]
+        settings = {"shuffle_items": False}
+    return {
+        "type": kind,
+        "title": f"Bench {kind} {i:05d}",
+        "media": None,
+        "instructions": None,
+        "columns": columns,
+        "items": items,
+        "settings": settings,
+        "meta": {},
+    }
+
+
+def make_library(n: int, seed: int = 0):
+    """(kind, payload) for `n` exercises, types round-robin."""
+    for i in range(n):
+        kind = EXERCISE_KINDS[i % len(EXERCISE_KINDS)]
+        yield kind, make_exercise(kind, i, seed)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Write one synthetic glossary file.")
+    ap.add_argument("--entries", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(make_glossary(args.entries, args.seed), f, ensure_ascii=False, indent=4)
+    print(f"{args.entries} entries → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
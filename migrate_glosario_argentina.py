@@ -13,17 +13,33 @@ Usage (examples):
   python migrate_glosario_argentina.py
   python migrate_glosario_argentina.py --input "old_glosario.json"
   python migrate_glosario_argentina.py --input "path/to/old.json" --existing "data/glossaries/glosario-regional-argentina.json" --output "data/glossaries/glosario-regional-argentina.MIGRATED.json" --sort
+
+Big legacy dumps: --stream reads both files one entry at a time, merges
+against an on-disk word index (a temp SQLite file next to the output) and
+writes the output incrementally, so memory stays bounded by a batch of
+entries. --workers N (implies --stream) normalizes entries in N processes.
+The output is byte-identical to the default in-memory mode.
+  python migrate_glosario_argentina.py --input "dump.json" --stream
+  python migrate_glosario_argentina.py --input "dump.json" --workers 4 --sort
 """
 
-import argparse, json, os, sys, re, unicodedata
+import argparse, json, os, sys, re, sqlite3, tempfile, unicodedata
+from itertools import islice
+from multiprocessing import Pool
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.json_stream import ArrayWriter, iter_array
+from app.storage import atomic_write_json
 
 # --- Project path defaults
 DEFAULT_INPUT   = Path("old_glosario.json")  # <-- put your OLD file here or pass --input
 DEFAULT_EXISTING= Path("data/glossaries/glosario-regional-argentina.json")
 DEFAULT_OUTPUT  = Path("data/glossaries/glosario-regional-argentina.MIGRATED.json")
 
+# Entries handed to the worker pool per round trip in --stream mode
+STREAM_BATCH = 2000
+
 # --- Helpers
 def slugify(text: str) -> str:
     text = (text or "").strip().lower().replace("ñ", "n")
@@ -192,14 +208,135 @@ def index_by_word(entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
                 idx[w] = e
     return idx
 
+# --- Streaming mode
+# One row per casefolded word, like index_by_word(); `ord` keeps first-seen
+# order and a later entry only replaces the row when it is strictly richer,
+# which is exactly what the in-memory merge does.
+_MERGE_SCHEMA = """
+CREATE TABLE merged (
+    key      TEXT PRIMARY KEY,
+    ord      INTEGER NOT NULL,
+    score    INTEGER NOT NULL,
+    doc      TEXT NOT NULL,
+    sort_key TEXT NOT NULL
+)
+"""
+_MERGE_UPSERT = """
+INSERT INTO merged (key, ord, score, doc, sort_key) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET score = excluded.score, doc = excluded.doc, sort_key = excluded.sort_key
+WHERE excluded.score > merged.score
+"""
+
+MergeRow = Tuple[str, int, str, str]  # key, score, doc (indent=2 JSON), sort key
+
+def merge_row(e: Dict[str, Any]) -> Optional[MergeRow]:
+    w = (e.get("word") or "").strip().casefold()
+    if not w:
+        return None
+    doc = json.dumps(e, ensure_ascii=False, indent=2)
+    return w, entry_richness_score(e), doc, normalize_for_sort(e.get("word", ""))
+
+def convert_row(old: Dict[str, Any]) -> Optional[MergeRow]:
+    """Pool worker: OLD entry -> merge row of its NEW shape (None if it has no word)."""
+    new_e = to_new_format(old)
+    return merge_row(new_e) if new_e else None
+
+def batched(items: Iterable[Any], n: int) -> Iterable[List[Any]]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+def stream_entries(path: Path, what: str) -> Iterable[Any]:
+    if not path.exists():
+        return
+    try:
+        yield from iter_array(path)
+    except ValueError as e:
+        raise ValueError(f"{what}: {e}") from None
+
+def migrate_streaming(args) -> Dict[str, Any]:
+    """
+    Streaming merge (see the module docstring). `args` needs input, existing,
+    output (Paths), sort and workers. Returns the counts; raises ValueError
+    on malformed input. Also run as the "migrate_glossary" background job.
+    """
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    fd, db_path = tempfile.mkstemp(dir=args.output.parent, prefix=".migrate-", suffix=".sqlite3")
+    os.close(fd)
+    pool = Pool(args.workers) if args.workers > 1 else None
+    try:
+        db = sqlite3.connect(db_path)
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute(_MERGE_SCHEMA)
+        ord_ = 0
+
+        def upsert(rows: Iterable[Optional[MergeRow]]) -> int:
+            nonlocal ord_
+            n = 0
+            for row in rows:
+                if row is None:
+                    continue
+                key, score, doc, sort_key = row
+                db.execute(_MERGE_UPSERT, (key, ord_, score, doc, sort_key))
+                ord_ += 1
+                n += 1
+            return n
+
+        # Pass 1: existing entries (already in the new shape)
+        existing_count = 0
+        for batch in batched(stream_entries(args.existing, "--existing"), STREAM_BATCH):
+            existing_count += len(batch)
+            upsert(merge_row(e) for e in batch)
+        db.commit()
+
+        # Pass 2: OLD entries, normalized (in the pool if there is one) and merged
+        converted = 0
+        for batch in batched(stream_entries(args.input, "--input"), STREAM_BATCH):
+            rows = pool.map(convert_row, batch) if pool else map(convert_row, batch)
+            converted += upsert(rows)
+        db.commit()
+
+        order = "sort_key, ord" if args.sort else "ord"
+        with ArrayWriter(args.output, indent=2) as out:
+            for (doc,) in db.execute(f"SELECT doc FROM merged ORDER BY {order}"):
+                out.write_raw(doc)
+        db.close()
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        os.unlink(db_path)
+
+    return {"converted": converted, "existing": existing_count, "merged": out.count, "output": str(args.output)}
+
+def print_summary(stats: Dict[str, Any]) -> None:
+    print(f"✅ Converted {stats['converted']} entries from OLD file.")
+    print(f"↪  Existing entries loaded: {stats['existing']}")
+    print(f"📦 Final merged count: {stats['merged']}")
+    print(f"💾 Wrote: {stats['output']}")
+
 def main():
     ap = argparse.ArgumentParser(description="Migrate old glossary JSON → new multi-sense format")
     ap.add_argument("--input", "-i", type=Path, default=DEFAULT_INPUT, help="Path to OLD glossary JSON")
     ap.add_argument("--existing", "-e", type=Path, default=DEFAULT_EXISTING, help="Path to CURRENT new JSON (to merge into)")
     ap.add_argument("--output", "-o", type=Path, default=DEFAULT_OUTPUT, help="Where to write migrated output")
     ap.add_argument("--sort", action="store_true", help="Sort alphabetically by 'word'")
+    ap.add_argument("--stream", action="store_true", help="Bounded memory: stream input/output, merge on disk")
+    ap.add_argument("--workers", type=int, default=1, help="Processes normalizing entries (> 1 implies --stream)")
     args = ap.parse_args()
 
+    if args.stream or args.workers > 1:
+        try:
+            print_summary(migrate_streaming(args))
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
     old_raw = load_json(args.input)
     if not isinstance(old_raw, list):
         print("❌ --input must be a list of entries.", file=sys.stderr)
@@ -232,15 +369,12 @@ def main():
     if args.sort:
         out.sort(key=lambda e: normalize_for_sort(e.get("word", "")))
 
-    # Ensure output dir
-    args.output.parent.mkdir(parents=True, exist_ok=True)
-    with args.output.open("w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    # Atomic write (creates the output dir if needed)
+    atomic_write_json(args.output, out, indent=2)
 
-    print(f"✅ Converted {len(converted)} entries from OLD file.")
-    print(f"↪  Existing entries loaded: {len(existing_raw) if isinstance(existing_raw, list) else 0}")
-    print(f"📦 Final merged count: {len(out)}")
-    print(f"💾 Wrote: {args.output}")
+    print_summary({"converted": len(converted),
+                   "existing": len(existing_raw) if isinstance(existing_raw, list) else 0,
+                   "merged": len(out), "output": str(args.output)})
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+# tests/test_exercise_index.py
+# The cached exercise registry (app/exercise_index.py).
+import pytest
+
+from app import exercise_index as ei
+
+
+def record(ex_id, version=1):
+    path = f"data/exercises/tf/{ex_id}/{version:03d}.json"
+    return {"id": ex_id, "type": "tf", "title": ex_id, "pinned_version": version,
+            "versions": [{"version": version, "path": path}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ei.ExerciseIndexStore(str(tmp_path))
+    with s.edit() as idx:
+        idx.put(record("uno"))
+    return s
+
+
+def test_readers_see_edits_only_after_the_write(store):
+    before = store.index()
+    with store.edit() as idx:
+        idx.put(record("uno", 2))
+        idx.put(record("dos"))
+        # readers keep the previous index while the block runs
+        assert store.index() is before
+        assert before.latest_version("uno") == 1 and before.get("dos") is None
+    after = store.index()
+    assert after is not before
+    assert after.latest_version("uno") == 2 and after.get("dos") is not None
+    assert before.get("uno")["pinned_version"] == 1
+
+
+def test_failed_edit_leaves_the_cache_alone(store, monkeypatch):
+    before = store.index()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ei, "atomic_write_json", fail)
+    with pytest.raises(OSError):
+        with store.edit() as idx:
+            idx.remove("uno")
+    assert store.index() is before and before.get("uno") is not None
+
+
+def test_corrupt_index_is_rebuilt_by_a_job(store, tmp_path, monkeypatch):
+    from app import jobs
+
+    monkeypatch.setattr(jobs, "queue", jobs.JobQueue(str(tmp_path / "jobs.sqlite3")))
+    before = store.index()
+    with open(store.path, "w") as f:
+        f.write("{not json")
+
+    # the last good copy is served while a reindex job is pending
+    assert store.index() is before
+    assert store.reindexing
+    job_id = store.reindex_in_background()
+    assert jobs.get(job_id)["kind"] == "exercise_reindex"
+    assert store.index() is before and store.reindex_in_background() == job_id
+
+    assert jobs.JobRunner(jobs.queue).run_one()
+    assert jobs.get(job_id)["status"] == jobs.DONE
+    assert not store.reindexing
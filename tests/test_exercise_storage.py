@@ -0,0 +1,126 @@
+# tests/test_exercise_storage.py
+# Versioned exercise files (app/storage.py): delta chains, the rebuilt-version
+# cache and object cleanup, against a temporary data/exercises tree.
+import json
+import os
+
+import pytest
+
+from app import storage
+
+
+@pytest.fixture
+def exercises_dir(tmp_path, monkeypatch):
+    root = tmp_path / "exercises"
+    monkeypatch.setattr(storage, "EX_BASE_DIR", root)
+    storage._rebuilt.clear()
+    yield root
+    storage._rebuilt.clear()
+
+
+def payload(version, prompt="¿Verdadero o falso?"):
+    return {
+        "id": "ex1",
+        "type": "tf",
+        "title": "Mi ejercicio",
+        "version": version,
+        "items": [{"prompt": f"{prompt} #{k}", "answer": k % 2 == 0} for k in range(20)],
+    }
+
+
+def save(version, doc=None, delta_every=0):
+    doc = doc or payload(version)
+    _, abs_path = storage.write_exercise_version("ex1", version, doc, title="Mi ejercicio",
+                                                 ex_type="tf", delta_every=delta_every)
+    return abs_path
+
+
+def read(folder, version):
+    return storage.read_exercise_bytes(str(folder / f"{version:03d}.json"))
+
+
+def objects(root):
+    return sorted(fn for fn in os.listdir(root / ".objects") if fn.endswith(".json"))
+
+
+def test_delta_versions_read_back(exercises_dir):
+    for v in range(1, 5):
+        save(v, delta_every=10)
+    folder = exercises_dir / "tf" / "mi-ejercicio"
+    assert storage.read_delta(str(folder / "001.json")) is None
+    assert storage.read_delta(str(folder / "004.json")) is not None
+    for v in range(1, 5):
+        assert json.loads(read(folder, v)) == payload(v)
+
+
+def test_overwrite_keeps_later_deltas(exercises_dir):
+    for v in range(1, 6):
+        save(v, delta_every=10)
+    folder = exercises_dir / "tf" / "mi-ejercicio"
+    before = {v: read(folder, v) for v in range(1, 6)}
+
+    save(2, payload(2, prompt="Reescrito"), delta_every=10)
+
+    assert json.loads(read(folder, 2)) == payload(2, prompt="Reescrito")
+    for v in (1, 3, 4, 5):
+        assert read(folder, v) == before[v]
+    # the versions built on the old 002 are snapshots now
+    for v in (3, 4, 5):
+        assert storage.read_delta(str(folder / f"{v:03d}.json")) is None
+
+
+def test_rebuilt_cache_follows_base_changes(exercises_dir):
+    for v in range(1, 4):
+        save(v, delta_every=10)
+    folder = exercises_dir / "tf" / "mi-ejercicio"
+    assert json.loads(read(folder, 3))["title"] == "Mi ejercicio"   # now cached
+
+    # another worker rewrites the snapshot the chain starts from
+    base = payload(1)
+    base["title"] = "Título nuevo"
+    storage.atomic_write_bytes(str(folder / "001.json"), storage.payload_bytes(base))
+
+    assert json.loads(read(folder, 3))["title"] == "Título nuevo"
+
+
+def test_delta_saves_leave_no_orphan_objects(exercises_dir):
+    for v in range(1, 7):
+        save(v, delta_every=10)
+    # the 001 snapshot and the object current.json links to
+    assert len(objects(exercises_dir)) == 2
+    assert storage.gc_exercise_objects(str(exercises_dir)) == 0
+
+
+def test_snapshot_saves_keep_every_version_object(exercises_dir):
+    for v in range(1, 7):
+        save(v)
+    assert len(objects(exercises_dir)) == 6
+    assert storage.gc_exercise_objects(str(exercises_dir)) == 0
+
+
+def test_overwrite_drops_replaced_object(exercises_dir):
+    save(1)
+    save(2)
+    save(1, payload(1, prompt="Reescrito"))
+    folder = exercises_dir / "tf" / "mi-ejercicio"
+    assert json.loads(read(folder, 1)) == payload(1, prompt="Reescrito")
+    assert json.loads(read(folder, 2)) == payload(2)
+    assert len(objects(exercises_dir)) == 2   # the new 001 (also current.json) and 002
+    assert storage.gc_exercise_objects(str(exercises_dir)) == 0
+
+
+@pytest.mark.parametrize("delta_every", [0, 10])
+def test_deleted_exercise_objects_are_dropped(exercises_dir, delta_every):
+    import shutil
+
+    for v in range(1, 4):
+        save(v, delta_every=delta_every)
+    folder = exercises_dir / "tf" / "mi-ejercicio"
+    refs = storage.exercise_object_refs(str(folder / fn) for fn in ("001.json", "002.json", "003.json", "current.json"))
+    assert refs
+
+    # nothing is dropped while the files still refer to the objects
+    assert storage.drop_exercise_objects(refs) == 0
+    shutil.rmtree(folder)
+    assert storage.drop_exercise_objects(refs) == len(refs)
+    assert objects(exercises_dir) == []
@@ -0,0 +1,39 @@
+# tests/test_fragment_cache.py
+# Cached glossary card HTML (app/fragment_cache.py).
+from jinja2 import DictLoader, Environment
+
+from app import fragment_cache
+from app.glossary_store import GlossarySnapshot, entry_hash
+
+
+def snapshot(entries, previous=None):
+    return GlossarySnapshot("glosario-test", "glosario-test.json", (0, 0, 0), entries, previous=previous)
+
+
+def test_entry_hashes_live_on_the_snapshot(monkeypatch):
+    che, mate = {"word": "che"}, {"word": "mate"}
+    old = snapshot([che, mate])
+    hashes = fragment_cache.entry_hashes(old)
+    assert hashes[id(che)] == (che, entry_hash(che))
+    assert fragment_cache.entry_hashes(old) is hashes
+
+    # the next snapshot only hashes the entries it does not share
+    hashed = []
+    monkeypatch.setattr(fragment_cache, "entry_hash", lambda e: hashed.append(e) or entry_hash(e))
+    edited = {"word": "mate", "senses": ["infusión"]}
+    new = snapshot([che, edited], previous=old)
+    assert fragment_cache.entry_hashes(new)[id(che)] is hashes[id(che)]
+    assert hashed == [edited]
+
+
+def test_cards_are_reused_until_the_entry_changes(monkeypatch):
+    monkeypatch.setattr(fragment_cache, "cache", fragment_cache.FragmentCache())
+    env = Environment(loader=DictLoader({"card.html": "<p>{{ entry.word }} {{ lang }}</p>"}))
+    che, mate = {"word": "che"}, {"word": "mate"}
+    snap = snapshot([che, mate])
+
+    html = fragment_cache.render_entry_cards(env, "card.html", [che, mate], snapshot=snap)
+    assert str(html) == "<p>che es</p>\n<p>mate es</p>"
+    fragment_cache.render_entry_cards(env, "card.html", [che, {"word": "mate", "x": 1}], snapshot=snap)
+    stats = fragment_cache.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
@@ -0,0 +1,55 @@
+# tests/test_fuzzy_index.py
+# Typo-tolerant headword lookup (app/fuzzy_index.py).
+import pytest
+
+from app.fuzzy_index import TrigramIndex, bounded_damerau_levenshtein
+from app.glossary_store import GlossarySnapshot
+
+WORDS = ["birra", "cagar", "cheto", "coso", "bola", "che", "laburo", "quilombo", "boludo", "pibe"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    entries = [{"word": w, "variants": {}} for w in WORDS]
+    entries.append({"word": "mina", "variants": {"fs": ["minita"]}})
+    return TrigramIndex(GlossarySnapshot("test", "", (0, 0, 0), entries))
+
+
+def found(index, query):
+    return [e["word"] for _d, _sim, _pos, e in index.search(query)]
+
+
+@pytest.mark.parametrize("query, word", [
+    ("ibrra", "birra"),
+    ("acgar", "cagar"),
+    ("hceto", "cheto"),
+    ("ocso", "coso"),
+    ("obla", "bola"),
+    ("hce", "che"),
+    ("lbauro", "laburo"),
+    ("quilmobo", "quilombo"),
+])
+def test_transpositions_are_found(index, query, word):
+    assert found(index, query)[0] == word
+
+
+@pytest.mark.parametrize("query, word", [
+    ("bira", "birra"),
+    ("kilombo", "quilombo"),
+    ("boludoo", "boludo"),
+    ("minta", "mina"),
+])
+def test_other_typos_are_found(index, query, word):
+    assert word in found(index, query)
+
+
+def test_exact_match_ranks_first(index):
+    results = index.search("pibe")
+    assert results[0][0] == 0 and results[0][3]["word"] == "pibe"
+
+
+def test_distance_budget(index):
+    assert found(index, "xyz") == []
+    assert found(index, "zzzzzz") == []
+    assert bounded_damerau_levenshtein("bola", "obla", 1) == 1
+    assert bounded_damerau_levenshtein("bola", "alob", 1) is None
@@ -0,0 +1,114 @@
+# tests/test_glossary_repo.py
+# Batched admin writes to a glossary file (app/glossary_repo.py).
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app import glossary_repo
+from app.glossary_repo import GlossaryDuplicate, GlossaryRepository
+from app.glossary_store import GlossaryStore
+
+NAME = "glosario-test"
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    (tmp_path / f"{NAME}.json").write_text(json.dumps([{"word": "che", "slug": "che", "senses": []}]))
+
+    def make(flush_delay=0.0):
+        return GlossaryRepository(NAME, flush_delay=flush_delay, store=GlossaryStore(str(tmp_path)))
+    return make
+
+
+def on_disk(repo):
+    with open(repo.path, encoding="utf-8") as f:
+        return [e["word"] for e in json.load(f)]
+
+
+def wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_add_refuses_duplicate_words(make_repo):
+    repo = make_repo()
+    repo.add({"word": "birra", "slug": "birra"})
+    with pytest.raises(GlossaryDuplicate):
+        repo.add({"word": "Birra", "slug": "birra-2"})
+    assert on_disk(repo) == ["birra", "che"]
+
+
+def test_add_sees_words_written_by_another_process(make_repo):
+    repo, other = make_repo(flush_delay=60), make_repo()
+    repo.find("che")                          # loaded before the other write
+    other.add({"word": "mate", "slug": "mate"})
+    with pytest.raises(GlossaryDuplicate):
+        repo.add({"word": "mate", "slug": "mate"})
+    assert not repo.dirty
+
+
+def test_failed_background_flush_is_logged_and_retried(make_repo, monkeypatch, caplog):
+    monkeypatch.setattr(glossary_repo, "FLUSH_RETRY_DELAY", 0.05)
+    real_write = glossary_repo.atomic_write_json
+    calls = []
+
+    def flaky_write(*args, **kwargs):
+        calls.append(args[0])
+        if len(calls) == 1:
+            raise OSError("disk full")
+        return real_write(*args, **kwargs)
+
+    monkeypatch.setattr(glossary_repo, "atomic_write_json", flaky_write)
+    repo = make_repo(flush_delay=0.01)
+    with caplog.at_level(logging.ERROR, logger="app.glossary_repo"):
+        repo.add({"word": "laburo", "slug": "laburo"})
+        wait_for(lambda: repo.flushes == 1)
+
+    assert len(calls) == 2 and repo.flush_errors == 1
+    assert "Writing glossary glosario-test failed" in caplog.text
+    assert not repo.dirty
+    assert on_disk(repo) == ["che", "laburo"]
+
+
+@pytest.mark.parametrize("theirs, kind, message", [
+    (lambda other: other.replace(other.find("che"), {"word": "che", "slug": "che", "senses": ["vos"]}),
+     "edit", '"che" was also edited by another process; keeping ours'),
+    (lambda other: other.delete_word("che"),
+     "resurrect", '"che" was deleted by another process; restoring our edit'),
+])
+def test_merge_overrides_are_logged_and_counted(make_repo, caplog, theirs, kind, message):
+    from app import metrics
+
+    repo, other = make_repo(flush_delay=60), make_repo()
+    ours = {"word": "che", "slug": "che", "senses": ["che, boludo"]}
+    repo.replace(repo.find("che"), ours)      # journaled, not written yet
+    theirs(other)
+    before = dict(metrics.glossary_conflicts._values)
+    with caplog.at_level(logging.WARNING, logger="app.glossary_repo"):
+        assert repo.flush()
+
+    assert (repo.merges, repo.conflicts) == (1, 1)
+    assert message in caplog.text
+    label = (NAME, kind)
+    assert metrics.glossary_conflicts._values[label] == before.get(label, 0) + 1
+    with open(repo.path, encoding="utf-8") as f:
+        assert json.load(f) == [ours]
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    # the multi-process merge path, via benchmarks/stress_glossary_writes.py
+    script = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "stress_glossary_writes.py")
+    run = subprocess.run(
+        [sys.executable, script, "--procs", "3", "--ops", "30", "--seed-entries", "50",
+         "--timeout", "60", "--root", str(tmp_path)],
+        capture_output=True, text=True, timeout=120,
+    )
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert "OK: no lost writes" in run.stdout